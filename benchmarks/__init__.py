@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for the generated client. Run from the repository root, e.g. `python -m benchmarks.codec`
+"""
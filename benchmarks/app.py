@@ -0,0 +1,98 @@
+"""
+The FastAPI app that the benchmark suite generates its client from and sends its requests to.
+
+The large list is serialized once per count, so that the benchmarks measure the client rather than the server.
+"""
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, List
+
+from fastapi import APIRouter, FastAPI, File, Form
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+class SmallObject(BaseModel):
+    id: int
+    name: str
+    price: float
+    tags: List[str]
+
+
+class Category(BaseModel):
+    id: int
+    name: str
+
+
+class ListItem(BaseModel):
+    id: int
+    name: str
+    category: Category
+    tags: List[str]
+    description: str
+    available: bool
+
+
+class FormResult(BaseModel):
+    name: str
+    quantity: int
+    note: str
+
+
+class UploadResult(BaseModel):
+    length: int
+    sha256: str
+
+
+@lru_cache(maxsize=None)
+def make_list_content(count: int) -> bytes:
+    items = [
+        ListItem(
+            id=i,
+            name=f"item-{i}",
+            category=Category(id=i % 10, name=f"category-{i % 10}"),
+            tags=[f"tag-{j}" for j in range(3)],
+            description=f"Item {i} of the large list benchmark",
+            available=i % 2 == 0,
+        )
+        for i in range(count)
+    ]
+    return json.dumps([item.dict() for item in items]).encode("utf-8")
+
+
+def bench_router() -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/small/{item_id}", response_model=SmallObject)
+    async def small_object(item_id: int) -> SmallObject:
+        return SmallObject(id=item_id, name=f"item-{item_id}", price=item_id * 1.5, tags=["a", "b"])
+
+    @router.get("/large_list", response_model=List[ListItem])
+    async def large_list(count: int) -> Any:
+        return Response(content=make_list_content(count), media_type="application/json")
+
+    @router.post("/form", response_model=FormResult)
+    async def form_post(name: str = Form(...), quantity: int = Form(...), note: str = Form("")) -> FormResult:
+        return FormResult(name=name, quantity=quantity, note=note)
+
+    @router.post("/upload", response_model=UploadResult)
+    async def file_upload(file: bytes = File(...)) -> UploadResult:
+        return UploadResult(length=len(file), sha256=hashlib.sha256(file).hexdigest())
+
+    return router
+
+
+app = FastAPI()
+app.include_router(bench_router(), tags=["bench"])
+
+
+@app.on_event("startup")
+async def startup() -> None:
+    """
+    Use the operation names as operation_id, as the test server app does
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            route.operation_id = route.name
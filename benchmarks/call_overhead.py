@@ -0,0 +1,129 @@
+"""
+Measures the client-side overhead of a call through the generated apis, with the network stubbed out.
+
+The httpx client sends the requests to a dispatcher that returns a canned response without any I/O, so the times are
+those of building the request, passing it through httpx and parsing the response.
+
+* "build_request": the generic path, which formats the url and parses it whole
+* "build_operation_request": the generated apis' path, which fills in the operation's precompiled path template
+* "request": a complete call through `ApiClient.request`, as the generated apis used to make
+* "api": a complete call through the generated async api method
+"""
+import argparse
+import time
+from asyncio import get_event_loop
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from httpx import Response
+from httpx.config import Timeout
+from httpx.dispatch.base import AsyncDispatcher
+from httpx.models import Request
+
+from example.client import models as m
+from example.client.api.user_api import OPERATIONS
+from example.client.api_client import ApiClient, AsyncApis
+
+ORDER_CONTENT = b'{"id": 1, "petId": 1, "quantity": 1, "status": "placed", "complete": false}'
+RESPONSES: Dict[Tuple[str, str], bytes] = {
+    (
+        "GET",
+        "/user/user1",
+    ): b'{"id": 1, "username": "user1", "firstName": "first", "lastName": "last", "userStatus": 1}',
+    ("GET", "/user/login"): b'"logged in"',
+    ("POST", "/store/order"): ORDER_CONTENT,
+    ("GET", "/store/inventory"): b'{"available": 1, "pending": 2, "sold": 3}',
+}
+
+
+class StubDispatcher(AsyncDispatcher):
+    """
+    Responds to each request with canned content, without sending it
+    """
+
+    async def send(self, request: Request, timeout: Timeout = None) -> Response:
+        content = RESPONSES[(request.method, request.url.path)]
+        return Response(200, content=content, headers={"content-type": "application/json"}, request=request)
+
+
+def time_per_call(func: Callable[[], Any], count: int) -> float:
+    for _ in range(min(count, 100)):
+        func()
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count
+
+
+def time_per_async_call(func: Callable[[], Awaitable[Any]], count: int) -> float:
+    async def run(n: int) -> None:
+        for _ in range(n):
+            await func()
+
+    loop = get_event_loop()
+    loop.run_until_complete(run(min(count, 100)))
+    start = time.perf_counter()
+    loop.run_until_complete(run(count))
+    return (time.perf_counter() - start) / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    client = ApiClient(host="http://localhost:8000", dispatch=StubDispatcher())
+    apis = AsyncApis(client)
+    order = m.Order.parse_raw(ORDER_CONTENT)
+    get_user = OPERATIONS["get_user_by_name"]
+
+    builds: Dict[str, Callable[[], Any]] = {
+        "build_request": lambda: client.build_request(
+            method="GET", url="/user/{username}", path_params={"username": "user1"}, operation_id="get_user_by_name"
+        ),
+        "build_operation_request": lambda: client.build_operation_request(get_user, path_params={"username": "user1"}),
+    }
+    calls: Dict[str, Dict[str, Callable[[], Awaitable[Any]]]] = {
+        "get_user_by_name": {
+            "request": lambda: client.request(
+                type_=m.User,
+                method="GET",
+                url="/user/{username}",
+                path_params={"username": "user1"},
+                operation_id="get_user_by_name",
+            ),
+            "api": lambda: apis.user_api.get_user_by_name(username="user1"),
+        },
+        "login_user": {
+            "request": lambda: client.request(
+                type_=str,
+                method="GET",
+                url="/user/login",
+                params={"username": "user1", "password": "password"},
+                operation_id="login_user",
+            ),
+            "api": lambda: apis.user_api.login_user(username="user1", password="password"),
+        },
+        "place_order": {
+            "request": lambda: client.request(
+                type_=m.Order, method="POST", url="/store/order", operation_id="place_order", json=order.to_jsonable()
+            ),
+            "api": lambda: apis.store_api.place_order(body=order),
+        },
+        "get_inventory": {
+            "request": lambda: client.request(
+                type_=Dict[str, int], method="GET", url="/store/inventory", operation_id="get_inventory"
+            ),
+            "api": lambda: apis.store_api.get_inventory(),
+        },
+    }
+
+    print(f"{'benchmark':<40} {'µs/call':>10}")
+    for name, build in builds.items():
+        print(f"{name:<40} {time_per_call(build, args.calls) * 1e6:>10.1f}")
+    for operation_id, paths in calls.items():
+        for path, call in paths.items():
+            print(f"{operation_id + ' / ' + path:<40} {time_per_async_call(call, args.calls) * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares the json codecs on payloads the size of a `find_pets_by_status` response.
+
+The "httpx" row is the previous behavior: `json.dumps(...).encode()` for request bodies, and
+`response.json()` (text decoding followed by `json.loads`) for responses.
+"""
+import argparse
+import json
+import timeit
+from functools import partial
+from typing import Any, Callable, Dict, List
+
+from example.client.codec import JsonCodec, OrjsonCodec, orjson
+
+
+def make_pets(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": i,
+            "category": {"id": i % 10, "name": f"category-{i % 10}"},
+            "name": f"pet-{i}",
+            "photoUrls": [f"https://example.com/pets/{i}/photo.png"],
+            "tags": [{"id": j, "name": f"tag-{j}"} for j in range(3)],
+            "status": "available",
+        }
+        for i in range(count)
+    ]
+
+
+def time_per_call(func: Callable[[], Any], repeat: int) -> float:
+    number = 10
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pets", type=int, default=1000, help="Number of pets in the payload")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pets = make_pets(args.pets)
+    content = json.dumps(pets).encode("utf-8")
+    print(f"Payload: {args.pets} pets, {len(content)} bytes\n")
+
+    encoders: Dict[str, Callable[[], Any]] = {"httpx": lambda: json.dumps(pets).encode("utf-8")}
+    decoders: Dict[str, Callable[[], Any]] = {"httpx": lambda: json.loads(content.decode("utf-8"))}
+    codecs: Dict[str, JsonCodec] = {"stdlib": JsonCodec()}
+    if orjson is not None:
+        codecs["orjson"] = OrjsonCodec()
+    for name, codec in codecs.items():
+        encoders[name] = partial(codec.dumps, pets)
+        decoders[name] = partial(codec.loads, content)
+
+    timings = {
+        name: (time_per_call(encoders[name], args.repeat), time_per_call(decoders[name], args.repeat))
+        for name in encoders
+    }
+    baseline_encode, baseline_decode = timings["httpx"]
+    print(f"{'codec':<8} {'encode (ms)':>12} {'speedup':>8} {'decode (ms)':>12} {'speedup':>8}")
+    for name, (encode, decode) in timings.items():
+        print(
+            f"{name:<8} {encode * 1000:>12.3f} {baseline_encode / encode:>7.2f}x "
+            f"{decode * 1000:>12.3f} {baseline_decode / decode:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
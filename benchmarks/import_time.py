@@ -0,0 +1,140 @@
+"""
+Measures how long a client generated from a spec with many tags takes to import and to set up its apis.
+
+A synthetic spec is written with `--tags` tags, each with `--operations` operations on a model of its own, and a
+client is generated from it with `scripts/generate.sh` into `benchmarks/generated/` (`--no-generate` reuses it).
+Each measurement runs in a new interpreter, so that nothing is already imported:
+
+* "import": `import <client>.api_client`
+* "apis": `AsyncApis(ApiClient(...))`
+* "first group": the first access to an api group, which imports its module
+* "all groups": accessing every api group, as `AsyncApis.__init__` used to do
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from .suite import GENERATED_DIR, ROOT
+
+CLIENT_NAME = "many_tags_client"
+
+MEASURE = """
+import json, resource, time
+start = time.perf_counter()
+import {client}.api_client as api_client
+imported = time.perf_counter()
+apis = api_client.AsyncApis(api_client.ApiClient(host="http://localhost"))
+built = time.perf_counter()
+apis.tag_0_api
+first = time.perf_counter()
+if {all_groups}:
+    for name in api_client.API_CLASS_NAMES:
+        getattr(apis, name)
+done = time.perf_counter()
+print(json.dumps({{
+    "import": imported - start,
+    "apis": built - imported,
+    "first group": first - built,
+    "all groups": done - first,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def make_spec(tags: int, operations: int) -> Dict[str, Any]:
+    paths: Dict[str, Any] = {}
+    schemas: Dict[str, Any] = {}
+    for tag in range(tags):
+        model = f"Tag{tag}Item"
+        schemas[model] = {
+            "title": model,
+            "type": "object",
+            "required": ["id", "name"],
+            "properties": {
+                "id": {"title": "Id", "type": "integer"},
+                "name": {"title": "Name", "type": "string"},
+                "tags": {"title": "Tags", "type": "array", "items": {"type": "string"}},
+            },
+        }
+        ref = {"$ref": f"#/components/schemas/{model}"}
+        for operation in range(operations):
+            paths[f"/tag_{tag}/operation_{operation}/{{item_id}}"] = {
+                "get": {
+                    "tags": [f"tag_{tag}"],
+                    "operationId": f"tag_{tag}_operation_{operation}",
+                    "parameters": [
+                        {"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}},
+                        {"name": "q", "in": "query", "required": False, "schema": {"type": "string"}},
+                    ],
+                    "responses": {"200": {"description": "OK", "content": {"application/json": {"schema": ref}}}},
+                }
+            }
+    return {
+        "openapi": "3.0.2",
+        "info": {"title": "Many tags", "version": "0.1.0"},
+        "paths": paths,
+        "components": {"schemas": schemas},
+    }
+
+
+def generate_client(tags: int, operations: int) -> None:
+    os.makedirs(GENERATED_DIR, exist_ok=True)
+    spec_path = os.path.join(GENERATED_DIR, f"{CLIENT_NAME}.json")
+    with open(spec_path, "w") as file:
+        json.dump(make_spec(tags, operations), file)
+    shutil.rmtree(os.path.join(GENERATED_DIR, CLIENT_NAME), ignore_errors=True)
+    subprocess.run(
+        [
+            os.path.join(ROOT, "scripts", "generate.sh"),
+            "-i",
+            spec_path,
+            "-p",
+            CLIENT_NAME,
+            "-o",
+            GENERATED_DIR,
+            "-t",
+            "/tmp",
+        ],
+        check=True,
+    )
+
+
+def measure(all_groups: bool) -> Dict[str, float]:
+    code = MEASURE.format(client=CLIENT_NAME, all_groups=all_groups)
+    env = {**os.environ, "PYTHONPATH": GENERATED_DIR}
+    process = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    result: Dict[str, float] = json.loads(process.stdout)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tags", type=int, default=300)
+    parser.add_argument("--operations", type=int, default=5, help="Operations per tag")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-generate", action="store_true", help="Reuse the client in benchmarks/generated")
+    args = parser.parse_args()
+
+    if not args.no_generate:
+        generate_client(args.tags, args.operations)
+
+    print(f"{'benchmark':<16} {'lazy (ms)':>10} {'all (ms)':>10}")
+    runs: Dict[bool, List[Dict[str, float]]] = {
+        all_groups: [measure(all_groups) for _ in range(args.repeat)] for all_groups in (False, True)
+    }
+    for name in ("import", "apis", "first group", "all groups"):
+        lazy, eager = (statistics.median(run[name] for run in runs[all_groups]) for all_groups in (False, True))
+        print(f"{name:<16} {lazy * 1000:>10.1f} {eager * 1000:>10.1f}")
+    lazy_rss, eager_rss = (
+        statistics.median(run["max_rss_mb"] for run in runs[all_groups]) for all_groups in (False, True)
+    )
+    print(f"{'max rss (MB)':<16} {lazy_rss:>10.1f} {eager_rss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measures the per-request overhead of middleware as a function of the number of middlewares.
+
+Only the middleware chain is timed: it ends in a `send` that returns a canned response without any I/O. The
+"nested" columns are the previous `add_middleware`, which wrapped each middleware in a closure that defined a
+new `call_next` coroutine function on every request.
+"""
+import argparse
+import time
+from asyncio import get_event_loop
+from typing import Dict, List
+
+from httpx import Request, Response
+
+from example.client.api_client import BaseMiddleware, MiddlewareT, Send, build_middleware_chain
+
+REQUEST = Request("GET", "http://test/any")
+RESPONSE = Response(200, request=REQUEST, content=b'{"hello":"world"}')
+
+
+async def send(request: Request) -> Response:
+    return RESPONSE
+
+
+async def passthrough(request: Request, call_next: Send) -> Response:
+    return await call_next(request)
+
+
+def wrap(middleware: MiddlewareT, current_middleware: MiddlewareT) -> MiddlewareT:
+    async def new_middleware(request: Request, call_next: Send) -> Response:
+        async def inner_send(request: Request) -> Response:
+            return await current_middleware(request, call_next)
+
+        return await middleware(request, inner_send)
+
+    return new_middleware
+
+
+def nested_chain(middlewares: List[MiddlewareT]) -> Send:
+    current_middleware: MiddlewareT = BaseMiddleware()
+    for middleware in middlewares:
+        current_middleware = wrap(middleware, current_middleware)
+    return lambda request: current_middleware(request, send)
+
+
+def time_per_request(chain: Send, requests: int, repeat: int) -> float:
+    async def run() -> float:
+        start = time.perf_counter()
+        for _ in range(requests):
+            await chain(REQUEST)
+        return (time.perf_counter() - start) / requests
+
+    loop = get_event_loop()
+    return min(loop.run_until_complete(run()) for _ in range(repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'middlewares':>11} {'nested (us)':>12} {'chain (us)':>12} {'speedup':>8}")
+    for count in (0, 1, 2, 4, 8, 16):
+        middlewares: List[MiddlewareT] = [passthrough] * count
+        timings: Dict[str, float] = {
+            "nested": time_per_request(nested_chain(middlewares), args.requests, args.repeat) * 1e6,
+            "chain": time_per_request(build_middleware_chain(middlewares, send), args.requests, args.repeat) * 1e6,
+        }
+        speedup = timings["nested"] / timings["chain"]
+        print(f"{count:>11} {timings['nested']:>12.3f} {timings['chain']:>12.3f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Runs a FastAPI app on localhost in a subprocess for the duration of a benchmark
+"""
+import socket
+import time
+from contextlib import contextmanager
+from multiprocessing import Process
+from typing import Any, Iterator
+
+
+def run_server(app: Any, host: str, port: int) -> None:
+    import uvicorn
+
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=0.1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server did not start listening on {host}:{port}")
+            time.sleep(0.05)
+
+
+@contextmanager
+def serve(app: Any, host: str = "127.0.0.1", port: int = 8001) -> Iterator[str]:
+    """
+    Yields the url of the running server
+    """
+    process = Process(target=run_server, args=(app, host, port), daemon=True)
+    process.start()
+    try:
+        wait_for_port(host, port)
+        yield f"http://{host}:{port}"
+    finally:
+        process.terminate()
+        process.join(5)
@@ -0,0 +1,223 @@
+"""
+Measures the requests/sec and latency of a client generated from `benchmarks/app.py`, against that app on localhost.
+
+Each operation (a small object, a large list, a form post and a file upload) is measured through the async apis,
+with `--concurrency` requests in flight, and through the sync apis, one request at a time. The results are written
+as JSON to `benchmarks/results/` (by default, named after the current commit), and `--compare` prints the change from
+an earlier results file:
+
+    python -m benchmarks.suite
+    git checkout other-branch && python -m benchmarks.suite --compare benchmarks/results/<commit>.json
+
+The client is generated with `scripts/generate.sh` (so the openapi-generator docker image must already be pulled for
+the suite to run offline), into `benchmarks/generated/`; `--no-generate` reuses a previously generated client.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from asyncio import get_event_loop
+from datetime import datetime
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .server import serve
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+GENERATED_DIR = os.path.join(ROOT, "benchmarks", "generated")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+CLIENT_NAME = "bench_client"
+
+OPERATIONS = ("small_object", "large_list", "form", "file_upload")
+
+
+def generate_client(host: str) -> None:
+    os.makedirs(GENERATED_DIR, exist_ok=True)
+    # generate.sh won't overwrite an existing client, so remove the one generated by the previous run
+    shutil.rmtree(os.path.join(GENERATED_DIR, CLIENT_NAME), ignore_errors=True)
+    subprocess.run(
+        [
+            os.path.join(ROOT, "scripts", "generate.sh"),
+            "-i",
+            f"{host}/openapi.json",
+            "-p",
+            CLIENT_NAME,
+            "-o",
+            GENERATED_DIR,
+            "-t",
+            "/tmp",
+            "-m",
+        ],
+        check=True,
+    )
+
+
+def import_client() -> Any:
+    if GENERATED_DIR not in sys.path:
+        sys.path.insert(0, GENERATED_DIR)
+    return importlib.import_module(f"{CLIENT_NAME}.api_client")
+
+
+def make_calls(apis: Any, args: argparse.Namespace) -> Dict[str, Callable[[int], Any]]:
+    """
+    Returns a function per operation that makes its i-th call through `apis` (either the async or the sync apis)
+    """
+    upload = os.urandom(args.upload_size)
+    return {
+        "small_object": lambda i: apis.bench_api.small_object(item_id=i),
+        "large_list": lambda i: apis.bench_api.large_list(count=args.list_size),
+        "form": lambda i: apis.bench_api.form_post(name=f"name-{i}", quantity=i, note="benchmark"),
+        "file_upload": lambda i: apis.bench_api.file_upload(file=BytesIO(upload)),
+    }
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def run_async(call: Callable[[int], Awaitable[Any]], client: Any, requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+
+    async def timed_call(i: int) -> None:
+        start = time.perf_counter()
+        await call(i)
+        latencies.append(time.perf_counter() - start)
+
+    async def run(count: int) -> None:
+        for result in await client.map(timed_call, range(count), concurrency=concurrency):
+            if result.error is not None:
+                raise result.error
+
+    loop = get_event_loop()
+    loop.run_until_complete(run(min(requests, concurrency * 2)))  # warm up the connections
+    latencies.clear()
+    start = time.perf_counter()
+    loop.run_until_complete(run(requests))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_sync(call: Callable[[int], Any], requests: int) -> Dict[str, float]:
+    for i in range(min(requests, 10)):
+        call(i)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(requests):
+        call_start = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_suite(host: str, args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    api_client = import_client()
+    client = api_client.ApiClient(host=host)
+    async_calls = make_calls(api_client.AsyncApis(client), args)
+    sync_calls = make_calls(api_client.SyncApis(client), args)
+
+    results = {}
+    for operation in args.operations:
+        requests = args.requests // 10 if operation in ("large_list", "file_upload") else args.requests
+        results[f"{operation}/async"] = run_async(async_calls[operation], client, requests, args.concurrency)
+        results[f"{operation}/sync"] = run_sync(sync_calls[operation], requests)
+        for mode in ("async", "sync"):
+            print_result(f"{operation}/{mode}", results[f"{operation}/{mode}"])
+    return results
+
+
+def print_result(name: str, result: Dict[str, float], baseline: Optional[Dict[str, float]] = None) -> None:
+    line = f"{name:<24} {result['rps']:>10.1f} {result['p50_ms']:>10.3f} {result['p99_ms']:>10.3f}"
+    if baseline is not None:
+        line += (
+            f" {change(baseline['rps'], result['rps']):>+9.1f}% {change(baseline['p99_ms'], result['p99_ms']):>+9.1f}%"
+        )
+    print(line)
+
+
+def change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: str, max_regression: Optional[float]) -> bool:
+    """
+    Prints the change of each result from the baseline; returns False if any requests/sec dropped by more than
+    `max_regression` percent
+    """
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    print(f"\nCompared to {baseline_path} ({baseline.get('commit')}):")
+    print(f"{'benchmark':<24} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'req/s':>10} {'p99':>10}")
+    passed = True
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        print_result(name, result, old)
+        if max_regression is not None and change(old["rps"], result["rps"]) < -max_regression:
+            passed = False
+    return passed
+
+
+def git_commit() -> str:
+    process = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return process.stdout.strip() or "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per small operation (a tenth for large)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight for the async apis")
+    parser.add_argument("--list-size", type=int, default=1000, help="Items in the large list")
+    parser.add_argument("--upload-size", type=int, default=1024 * 1024, help="Bytes in the uploaded file")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--no-generate", action="store_true", help="Reuse the client in benchmarks/generated")
+    parser.add_argument("--output", help="Where to write the results (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="An earlier results file to compare with")
+    parser.add_argument("--max-regression", type=float, help="Exit with an error if any req/s drops by more (%%)")
+    args = parser.parse_args()
+
+    from .app import app
+
+    commit = git_commit()
+    with serve(app) as host:
+        if not args.no_generate:
+            generate_client(host)
+        print(f"{'benchmark':<24} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+        results = run_suite(host, args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        record = {
+            "commit": commit,
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "list_size": args.list_size,
+                "upload_size": args.upload_size,
+            },
+            "results": results,
+        }
+        json.dump(record, file, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare and not compare(results, args.compare, args.max_regression):
+        sys.exit(f"Requests/sec regressed by more than {args.max_regression}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares the ways the sync apis can wait for requests, against the test server app on localhost.
+
+* "event_loop": `get_event_loop().run_until_complete` on the calling thread for every request (the default)
+* "background_loop": requests are submitted to one long-lived loop on a daemon thread
+* "blocking": requests are sent through a blocking `httpx.Client`, without an event loop
+
+With threads, "event_loop" needs a client (and connection pool) per thread, since each thread has its own loop;
+the other modes share a single client between all of the threads.
+"""
+import argparse
+import time
+from asyncio import new_event_loop, set_event_loop
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from example.client.api_client import ApiClient, SyncMode
+
+from .server import serve
+
+SYNC_MODES: Tuple[SyncMode, ...] = ("event_loop", "background_loop", "blocking")
+
+
+def make_client(host: str, sync_mode: SyncMode) -> ApiClient:
+    return ApiClient(host=host, sync_mode=sync_mode)
+
+
+def call(client: ApiClient, count: int) -> List[float]:
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.request_sync(type_=Dict[str, Any], method="GET", url="/any")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_threads(host: str, sync_mode: SyncMode, threads: int, count: int) -> List[float]:
+    shared_client = make_client(host, sync_mode)
+
+    def worker(_: int) -> List[float]:
+        if sync_mode != "event_loop":
+            return call(shared_client, count)
+        set_event_loop(new_event_loop())
+        return call(make_client(host, sync_mode), count)
+
+    with ThreadPoolExecutor(threads) as executor:
+        return [latency for latencies in executor.map(worker, range(threads)) for latency in latencies]
+
+
+def report(label: str, latencies: List[float], elapsed: float) -> None:
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(
+        f"{label:<28} {len(latencies) / elapsed:>10.1f} {p50 * 1000:>10.3f} {p99 * 1000:>10.3f}",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per thread")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    from tests.server_app import app
+
+    with serve(app) as host:
+        print(f"{'mode':<28} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+        for sync_mode in SYNC_MODES:
+            client = make_client(host, sync_mode)
+            call(client, 50)  # warm up the connection
+            start = time.perf_counter()
+            latencies = call(client, args.requests)
+            report(f"{sync_mode}", latencies, time.perf_counter() - start)
+        for sync_mode in SYNC_MODES:
+            start = time.perf_counter()
+            latencies = run_threads(host, sync_mode, args.threads, args.requests)
+            report(f"{sync_mode} x{args.threads} threads", latencies, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
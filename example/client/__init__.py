@@ -1,12 +1,2 @@
-import inspect
-
-from pydantic import BaseModel
-
-from example.client import models
+from example.client import models  # noqa F401
 from example.client.api_client import ApiClient, AsyncApis, SyncApis  # noqa F401
-
-for model in inspect.getmembers(models, inspect.isclass):
-    if model[1].__module__ == "example.client.models":
-        model_class = model[1]
-        if isinstance(model_class, BaseModel):
-            model_class.update_forward_refs()
@@ -1,23 +1,128 @@
 # flake8: noqa E501
-from asyncio import get_event_loop
-from typing import IO, TYPE_CHECKING, Any, Awaitable, Dict, List
-
-from fastapi.encoders import jsonable_encoder
+from typing import IO, TYPE_CHECKING, Any, AsyncIterator, Awaitable, Dict, List
 
 from example.client import models as m
+from example.client.encoding import encode
+from example.client.operations import Operation
 
 if TYPE_CHECKING:
     from example.client.api_client import ApiClient
 
 
+OPERATIONS = {
+    "add_pet": Operation(
+        "add_pet",
+        "POST",
+        "/pet",
+        None,
+        path_params=(),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=True,
+    ),
+    "delete_pet": Operation(
+        "delete_pet",
+        "DELETE",
+        "/pet/{petId}",
+        None,
+        path_params=("petId",),
+        query_params=(),
+        header_params=("api_key",),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "find_pets_by_status": Operation(
+        "find_pets_by_status",
+        "GET",
+        "/pet/findByStatus",
+        List[m.Pet],
+        path_params=(),
+        query_params=("status",),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "find_pets_by_tags": Operation(
+        "find_pets_by_tags",
+        "GET",
+        "/pet/findByTags",
+        List[m.Pet],
+        path_params=(),
+        query_params=("tags",),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "get_pet_by_id": Operation(
+        "get_pet_by_id",
+        "GET",
+        "/pet/{petId}",
+        m.Pet,
+        path_params=("petId",),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "update_pet": Operation(
+        "update_pet",
+        "PUT",
+        "/pet",
+        None,
+        path_params=(),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=True,
+    ),
+    "update_pet_with_form": Operation(
+        "update_pet_with_form",
+        "POST",
+        "/pet/{petId}",
+        None,
+        path_params=("petId",),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(
+            "name",
+            "status",
+        ),
+        body=False,
+    ),
+    "upload_file": Operation(
+        "upload_file",
+        "POST",
+        "/pet/{petId}/uploadImage",
+        m.ApiResponse,
+        path_params=("petId",),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(
+            "additionalMetadata",
+            "file",
+        ),
+        body=False,
+    ),
+}
+
+
 class _PetApi:
     def __init__(self, api_client: "ApiClient"):
         self.api_client = api_client
 
     def _build_for_add_pet(self, body: m.Pet) -> Awaitable[None]:
-        body = jsonable_encoder(body)
+        body = encode(body)
 
-        return self.api_client.request(type_=None, method="POST", url="/pet", json=body)
+        return self.api_client.request_operation(OPERATIONS["add_pet"], json=body)
 
     def _build_for_delete_pet(self, pet_id: int, api_key: str = None) -> Awaitable[None]:
         path_params = {"petId": str(pet_id)}
@@ -26,13 +131,7 @@ class _PetApi:
         if api_key is not None:
             headers["api_key"] = str(api_key)
 
-        return self.api_client.request(
-            type_=None,
-            method="DELETE",
-            url="/pet/{petId}",
-            path_params=path_params,
-            headers=headers,
-        )
+        return self.api_client.request_operation(OPERATIONS["delete_pet"], path_params=path_params, headers=headers)
 
     def _build_for_find_pets_by_status(self, status: List[str]) -> Awaitable[List[m.Pet]]:
         """
@@ -40,11 +139,16 @@ class _PetApi:
         """
         query_params = {"status": str(status)}
 
-        return self.api_client.request(
-            type_=List[m.Pet],
-            method="GET",
-            url="/pet/findByStatus",
-            params=query_params,
+        return self.api_client.request_operation(OPERATIONS["find_pets_by_status"], params=query_params)
+
+    def _build_iter_for_find_pets_by_status(self, status: List[str]) -> AsyncIterator[m.Pet]:
+        """
+        Multiple status values can be provided with comma separated strings
+        """
+        query_params = {"status": str(status)}
+
+        return self.api_client.request_operation_iter(
+            OPERATIONS["find_pets_by_status"], item_type=m.Pet, params=query_params
         )
 
     def _build_for_find_pets_by_tags(self, tags: List[str]) -> Awaitable[List[m.Pet]]:
@@ -53,11 +157,16 @@ class _PetApi:
         """
         query_params = {"tags": str(tags)}
 
-        return self.api_client.request(
-            type_=List[m.Pet],
-            method="GET",
-            url="/pet/findByTags",
-            params=query_params,
+        return self.api_client.request_operation(OPERATIONS["find_pets_by_tags"], params=query_params)
+
+    def _build_iter_for_find_pets_by_tags(self, tags: List[str]) -> AsyncIterator[m.Pet]:
+        """
+        Multiple tags can be provided with comma separated strings. Use tag1, tag2, tag3 for testing.
+        """
+        query_params = {"tags": str(tags)}
+
+        return self.api_client.request_operation_iter(
+            OPERATIONS["find_pets_by_tags"], item_type=m.Pet, params=query_params
         )
 
     def _build_for_get_pet_by_id(self, pet_id: int) -> Awaitable[m.Pet]:
@@ -66,17 +175,12 @@ class _PetApi:
         """
         path_params = {"petId": str(pet_id)}
 
-        return self.api_client.request(
-            type_=m.Pet,
-            method="GET",
-            url="/pet/{petId}",
-            path_params=path_params,
-        )
+        return self.api_client.request_operation(OPERATIONS["get_pet_by_id"], path_params=path_params)
 
     def _build_for_update_pet(self, body: m.Pet) -> Awaitable[None]:
-        body = jsonable_encoder(body)
+        body = encode(body)
 
-        return self.api_client.request(type_=None, method="PUT", url="/pet", json=body)
+        return self.api_client.request_operation(OPERATIONS["update_pet"], json=body)
 
     def _build_for_update_pet_with_form(self, pet_id: int, name: str = None, status: str = None) -> Awaitable[None]:
         path_params = {"petId": str(pet_id)}
@@ -88,8 +192,8 @@ class _PetApi:
         if status is not None:
             data["status"] = status
 
-        return self.api_client.request(
-            type_=None, method="POST", url="/pet/{petId}", path_params=path_params, data=data, files=files or None
+        return self.api_client.request_operation(
+            OPERATIONS["update_pet_with_form"], path_params=path_params, data=data, files=files or None
         )
 
     def _build_for_upload_file(
@@ -104,13 +208,8 @@ class _PetApi:
         if file is not None:
             files["file"] = file
 
-        return self.api_client.request(
-            type_=m.ApiResponse,
-            method="POST",
-            url="/pet/{petId}/uploadImage",
-            path_params=path_params,
-            data=data,
-            files=files,
+        return self.api_client.request_operation(
+            OPERATIONS["upload_file"], path_params=path_params, data=data, files=files
         )
 
 
@@ -127,12 +226,28 @@ class AsyncPetApi(_PetApi):
         """
         return await self._build_for_find_pets_by_status(status=status)
 
+    def find_pets_by_status_iter(self, status: List[str]) -> AsyncIterator[m.Pet]:
+        """
+        Multiple status values can be provided with comma separated strings
+
+        Yields the items of the response as they are received, rather than waiting for the complete response
+        """
+        return self._build_iter_for_find_pets_by_status(status=status)
+
     async def find_pets_by_tags(self, tags: List[str]) -> List[m.Pet]:
         """
         Multiple tags can be provided with comma separated strings. Use tag1, tag2, tag3 for testing.
         """
         return await self._build_for_find_pets_by_tags(tags=tags)
 
+    def find_pets_by_tags_iter(self, tags: List[str]) -> AsyncIterator[m.Pet]:
+        """
+        Multiple tags can be provided with comma separated strings. Use tag1, tag2, tag3 for testing.
+
+        Yields the items of the response as they are received, rather than waiting for the complete response
+        """
+        return self._build_iter_for_find_pets_by_tags(tags=tags)
+
     async def get_pet_by_id(self, pet_id: int) -> m.Pet:
         """
         Returns a single pet
@@ -152,41 +267,41 @@ class AsyncPetApi(_PetApi):
 class SyncPetApi(_PetApi):
     def add_pet(self, body: m.Pet) -> None:
         coroutine = self._build_for_add_pet(body=body)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def delete_pet(self, pet_id: int, api_key: str = None) -> None:
         coroutine = self._build_for_delete_pet(pet_id=pet_id, api_key=api_key)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def find_pets_by_status(self, status: List[str]) -> List[m.Pet]:
         """
         Multiple status values can be provided with comma separated strings
         """
         coroutine = self._build_for_find_pets_by_status(status=status)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def find_pets_by_tags(self, tags: List[str]) -> List[m.Pet]:
         """
         Multiple tags can be provided with comma separated strings. Use tag1, tag2, tag3 for testing.
         """
         coroutine = self._build_for_find_pets_by_tags(tags=tags)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def get_pet_by_id(self, pet_id: int) -> m.Pet:
         """
         Returns a single pet
         """
         coroutine = self._build_for_get_pet_by_id(pet_id=pet_id)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def update_pet(self, body: m.Pet) -> None:
         coroutine = self._build_for_update_pet(body=body)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def update_pet_with_form(self, pet_id: int, name: str = None, status: str = None) -> None:
         coroutine = self._build_for_update_pet_with_form(pet_id=pet_id, name=name, status=status)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def upload_file(self, pet_id: int, additional_metadata: str = None, file: IO[Any] = None) -> m.ApiResponse:
         coroutine = self._build_for_upload_file(pet_id=pet_id, additional_metadata=additional_metadata, file=file)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
@@ -1,15 +1,66 @@
 # flake8: noqa E501
-from asyncio import get_event_loop
 from typing import TYPE_CHECKING, Awaitable, Dict
 
-from fastapi.encoders import jsonable_encoder
-
 from example.client import models as m
+from example.client.encoding import encode
+from example.client.operations import Operation
 
 if TYPE_CHECKING:
     from example.client.api_client import ApiClient
 
 
+OPERATIONS = {
+    "delete_order": Operation(
+        "delete_order",
+        "DELETE",
+        "/store/order/{orderId}",
+        None,
+        path_params=("orderId",),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "get_inventory": Operation(
+        "get_inventory",
+        "GET",
+        "/store/inventory",
+        Dict[str, int],
+        path_params=(),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "get_order_by_id": Operation(
+        "get_order_by_id",
+        "GET",
+        "/store/order/{orderId}",
+        m.Order,
+        path_params=("orderId",),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "place_order": Operation(
+        "place_order",
+        "POST",
+        "/store/order",
+        m.Order,
+        path_params=(),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=True,
+    ),
+}
+
+
 class _StoreApi:
     def __init__(self, api_client: "ApiClient"):
         self.api_client = api_client
@@ -20,12 +71,7 @@ class _StoreApi:
         """
         path_params = {"orderId": str(order_id)}
 
-        return self.api_client.request(
-            type_=None,
-            method="DELETE",
-            url="/store/order/{orderId}",
-            path_params=path_params,
-        )
+        return self.api_client.request_operation(OPERATIONS["delete_order"], path_params=path_params)
 
     def _build_for_get_inventory(
         self,
@@ -33,11 +79,7 @@ class _StoreApi:
         """
         Returns a map of status codes to quantities
         """
-        return self.api_client.request(
-            type_=Dict[str, int],
-            method="GET",
-            url="/store/inventory",
-        )
+        return self.api_client.request_operation(OPERATIONS["get_inventory"])
 
     def _build_for_get_order_by_id(self, order_id: int) -> Awaitable[m.Order]:
         """
@@ -45,17 +87,12 @@ class _StoreApi:
         """
         path_params = {"orderId": str(order_id)}
 
-        return self.api_client.request(
-            type_=m.Order,
-            method="GET",
-            url="/store/order/{orderId}",
-            path_params=path_params,
-        )
+        return self.api_client.request_operation(OPERATIONS["get_order_by_id"], path_params=path_params)
 
     def _build_for_place_order(self, body: m.Order) -> Awaitable[m.Order]:
-        body = jsonable_encoder(body)
+        body = encode(body)
 
-        return self.api_client.request(type_=m.Order, method="POST", url="/store/order", json=body)
+        return self.api_client.request_operation(OPERATIONS["place_order"], json=body)
 
 
 class AsyncStoreApi(_StoreApi):
@@ -89,7 +126,7 @@ class SyncStoreApi(_StoreApi):
         For valid response try integer IDs with positive integer value. Negative or non-integer values will generate API errors
         """
         coroutine = self._build_for_delete_order(order_id=order_id)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def get_inventory(
         self,
@@ -98,15 +135,15 @@ class SyncStoreApi(_StoreApi):
         Returns a map of status codes to quantities
         """
         coroutine = self._build_for_get_inventory()
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def get_order_by_id(self, order_id: int) -> m.Order:
         """
         For valid response try integer IDs with value >= 1 and <= 10. Other values will generated exceptions
         """
         coroutine = self._build_for_get_order_by_id(order_id=order_id)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def place_order(self, body: m.Order) -> m.Order:
         coroutine = self._build_for_place_order(body=body)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
@@ -1,15 +1,117 @@
 # flake8: noqa E501
-from asyncio import get_event_loop
 from typing import TYPE_CHECKING, Awaitable, List
 
-from fastapi.encoders import jsonable_encoder
-
 from example.client import models as m
+from example.client.encoding import encode
+from example.client.operations import Operation
 
 if TYPE_CHECKING:
     from example.client.api_client import ApiClient
 
 
+OPERATIONS = {
+    "create_user": Operation(
+        "create_user",
+        "POST",
+        "/user",
+        None,
+        path_params=(),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=True,
+    ),
+    "create_users_with_array_input": Operation(
+        "create_users_with_array_input",
+        "POST",
+        "/user/createWithArray",
+        None,
+        path_params=(),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=True,
+    ),
+    "create_users_with_list_input": Operation(
+        "create_users_with_list_input",
+        "POST",
+        "/user/createWithList",
+        None,
+        path_params=(),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=True,
+    ),
+    "delete_user": Operation(
+        "delete_user",
+        "DELETE",
+        "/user/{username}",
+        None,
+        path_params=("username",),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "get_user_by_name": Operation(
+        "get_user_by_name",
+        "GET",
+        "/user/{username}",
+        m.User,
+        path_params=("username",),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "login_user": Operation(
+        "login_user",
+        "GET",
+        "/user/login",
+        str,
+        path_params=(),
+        query_params=(
+            "username",
+            "password",
+        ),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "logout_user": Operation(
+        "logout_user",
+        "GET",
+        "/user/logout",
+        None,
+        path_params=(),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=False,
+    ),
+    "update_user": Operation(
+        "update_user",
+        "PUT",
+        "/user/{username}",
+        None,
+        path_params=("username",),
+        query_params=(),
+        header_params=(),
+        cookie_params=(),
+        form_params=(),
+        body=True,
+    ),
+}
+
+
 class _UserApi:
     def __init__(self, api_client: "ApiClient"):
         self.api_client = api_client
@@ -18,19 +120,19 @@ class _UserApi:
         """
         This can only be done by the logged in user.
         """
-        body = jsonable_encoder(body)
+        body = encode(body)
 
-        return self.api_client.request(type_=None, method="POST", url="/user", json=body)
+        return self.api_client.request_operation(OPERATIONS["create_user"], json=body)
 
     def _build_for_create_users_with_array_input(self, body: List[m.User]) -> Awaitable[None]:
-        body = jsonable_encoder(body)
+        body = encode(body)
 
-        return self.api_client.request(type_=None, method="POST", url="/user/createWithArray", json=body)
+        return self.api_client.request_operation(OPERATIONS["create_users_with_array_input"], json=body)
 
     def _build_for_create_users_with_list_input(self, body: List[m.User]) -> Awaitable[None]:
-        body = jsonable_encoder(body)
+        body = encode(body)
 
-        return self.api_client.request(type_=None, method="POST", url="/user/createWithList", json=body)
+        return self.api_client.request_operation(OPERATIONS["create_users_with_list_input"], json=body)
 
     def _build_for_delete_user(self, username: str) -> Awaitable[None]:
         """
@@ -38,41 +140,22 @@ class _UserApi:
         """
         path_params = {"username": str(username)}
 
-        return self.api_client.request(
-            type_=None,
-            method="DELETE",
-            url="/user/{username}",
-            path_params=path_params,
-        )
+        return self.api_client.request_operation(OPERATIONS["delete_user"], path_params=path_params)
 
     def _build_for_get_user_by_name(self, username: str) -> Awaitable[m.User]:
         path_params = {"username": str(username)}
 
-        return self.api_client.request(
-            type_=m.User,
-            method="GET",
-            url="/user/{username}",
-            path_params=path_params,
-        )
+        return self.api_client.request_operation(OPERATIONS["get_user_by_name"], path_params=path_params)
 
     def _build_for_login_user(self, username: str, password: str) -> Awaitable[str]:
         query_params = {"username": str(username), "password": str(password)}
 
-        return self.api_client.request(
-            type_=str,
-            method="GET",
-            url="/user/login",
-            params=query_params,
-        )
+        return self.api_client.request_operation(OPERATIONS["login_user"], params=query_params)
 
     def _build_for_logout_user(
         self,
     ) -> Awaitable[None]:
-        return self.api_client.request(
-            type_=None,
-            method="GET",
-            url="/user/logout",
-        )
+        return self.api_client.request_operation(OPERATIONS["logout_user"])
 
     def _build_for_update_user(self, username: str, body: m.User) -> Awaitable[None]:
         """
@@ -80,11 +163,9 @@ class _UserApi:
         """
         path_params = {"username": str(username)}
 
-        body = jsonable_encoder(body)
+        body = encode(body)
 
-        return self.api_client.request(
-            type_=None, method="PUT", url="/user/{username}", path_params=path_params, json=body
-        )
+        return self.api_client.request_operation(OPERATIONS["update_user"], path_params=path_params, json=body)
 
 
 class AsyncUserApi(_UserApi):
@@ -130,40 +211,40 @@ class SyncUserApi(_UserApi):
         This can only be done by the logged in user.
         """
         coroutine = self._build_for_create_user(body=body)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def create_users_with_array_input(self, body: List[m.User]) -> None:
         coroutine = self._build_for_create_users_with_array_input(body=body)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def create_users_with_list_input(self, body: List[m.User]) -> None:
         coroutine = self._build_for_create_users_with_list_input(body=body)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def delete_user(self, username: str) -> None:
         """
         This can only be done by the logged in user.
         """
         coroutine = self._build_for_delete_user(username=username)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def get_user_by_name(self, username: str) -> m.User:
         coroutine = self._build_for_get_user_by_name(username=username)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def login_user(self, username: str, password: str) -> str:
         coroutine = self._build_for_login_user(username=username, password=password)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def logout_user(
         self,
     ) -> None:
         coroutine = self._build_for_logout_user()
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
 
     def update_user(self, username: str, body: m.User) -> None:
         """
         This can only be done by the logged in user.
         """
         coroutine = self._build_for_update_user(username=username, body=body)
-        return get_event_loop().run_until_complete(coroutine)
+        return self.api_client.run_sync(coroutine)
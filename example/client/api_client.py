@@ -1,45 +1,853 @@
-from asyncio import get_event_loop
-from typing import Any, Awaitable, Callable, Dict, Generic, Type, TypeVar, overload
+from asyncio import (
+    AbstractEventLoop,
+    CancelledError,
+    Future,
+    Queue,
+    ensure_future,
+    gather,
+    get_event_loop,
+    new_event_loop,
+    run_coroutine_threadsafe,
+    shield,
+)
+from collections import abc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from importlib import import_module
+from operator import attrgetter
+from random import random
+from ssl import SSLContext
+from threading import Lock, Thread, current_thread
+from time import monotonic
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    overload,
+)
 
-from httpx import AsyncClient, Request, Response
-from pydantic import ValidationError, parse_obj_as
+# httpx 0.11's internals (backends, content streams, dispatch) are used too, which is why the generated requirements
+# pin httpx to 0.11.x
+from httpx import URL, AsyncClient, Client, Cookies, Headers, PoolLimits, QueryParams, Request, Response, Timeout
+from httpx.backends.base import BaseLock, BaseSemaphore, BaseSocketStream, ConcurrencyBackend, lookup_backend
+from httpx.content_streams import ByteStream, ContentStream
+from httpx.dispatch.connection import HTTPConnection
+from httpx.dispatch.connection_pool import ConnectionPool
+from httpx.models import Origin
+from httpx.utils import ElapsedTimer
+from pydantic import BaseModel, ValidationError, create_model
+from pydantic.typing import display_as_type
+from typing_extensions import Literal
 
-from example.client.api.pet_api import AsyncPetApi, SyncPetApi
-from example.client.api.store_api import AsyncStoreApi, SyncStoreApi
-from example.client.api.user_api import AsyncUserApi, SyncUserApi
+from example.client.codec import JsonCodec, iter_json_array
 from example.client.exceptions import ResponseHandlingException, UnexpectedResponse
+from example.client.operations import Operation
+from example.client.streams import replayable_stream
+
+if TYPE_CHECKING:
+    from example.client.api.pet_api import AsyncPetApi, SyncPetApi
+    from example.client.api.store_api import AsyncStoreApi, SyncStoreApi
+    from example.client.api.user_api import AsyncUserApi, SyncUserApi
 
 ClientT = TypeVar("ClientT", bound="ApiClient")
 
+# The class name of each api group, by module (and attribute) name
+API_CLASS_NAMES = {
+    "pet_api": "PetApi",
+    "store_api": "StoreApi",
+    "user_api": "UserApi",
+}
+
+
+def load_api(apis: Any, name: str, prefix: str) -> Any:
+    """
+    Imports the api group `name` and sets its `prefix` ("Async" or "Sync") class, instantiated for `apis.client`, as
+    an attribute of `apis`, so that it is only loaded once
+    """
+    class_name = API_CLASS_NAMES.get(name)
+    if class_name is None:
+        raise AttributeError(f"{type(apis).__name__!r} object has no attribute {name!r}")
+    module = import_module(f"example.client.api.{name}")
+    api = getattr(module, prefix + class_name)(apis.client)
+    setattr(apis, name, api)
+    return api
+
 
 class AsyncApis(Generic[ClientT]):
+    """
+    The async api groups; each is imported when it is first used, so that clients for large specs load quickly
+    """
+
+    pet_api: "AsyncPetApi"
+    store_api: "AsyncStoreApi"
+    user_api: "AsyncUserApi"
+
     def __init__(self, client: ClientT):
         self.client = client
 
-        self.pet_api = AsyncPetApi(self.client)
-        self.store_api = AsyncStoreApi(self.client)
-        self.user_api = AsyncUserApi(self.client)
+    if not TYPE_CHECKING:  # so that mypy still reports misspelled api groups
+
+        def __getattr__(self, name: str) -> Any:
+            return load_api(self, name, "Async")
 
 
 class SyncApis(Generic[ClientT]):
+    """
+    The sync api groups; each is imported when it is first used, so that clients for large specs load quickly
+    """
+
+    pet_api: "SyncPetApi"
+    store_api: "SyncStoreApi"
+    user_api: "SyncUserApi"
+
     def __init__(self, client: ClientT):
         self.client = client
 
-        self.pet_api = SyncPetApi(self.client)
-        self.store_api = SyncStoreApi(self.client)
-        self.user_api = SyncUserApi(self.client)
+    if not TYPE_CHECKING:  # so that mypy still reports misspelled api groups
+
+        def __getattr__(self, name: str) -> Any:
+            return load_api(self, name, "Sync")
 
 
 T = TypeVar("T")
 Send = Callable[[Request], Awaitable[Response]]
 MiddlewareT = Callable[[Request, Send], Awaitable[Response]]
+Parser = Callable[[Any], Any]
+
+
+class ParserCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    currsize: int
+
+
+class ParserRegistry:
+    """
+    Holds a prebuilt validator for each response type, so parsing a response doesn't recreate pydantic models,
+    and a prebuilt unvalidated parser (see `build_unvalidated_parser`) for each type parsed without validation
+    """
+
+    def __init__(self) -> None:
+        self._parsers: Dict[Any, Parser] = {}
+        self._unvalidated_parsers: Dict[Any, Parser] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get_parser(self, type_: Type[T], validate: bool = True) -> Callable[[Any], T]:
+        parsers = self._parsers if validate else self._unvalidated_parsers
+        parser = parsers.get(type_)
+        if parser is None:
+            self._misses += 1
+            parser = parsers[type_] = build_parser(type_) if validate else build_unvalidated_parser(type_)
+        else:
+            self._hits += 1
+        return parser
+
+    def parse(self, type_: Type[T], obj: Any, validate: bool = True) -> T:
+        return self.get_parser(type_, validate)(obj)
+
+    def cache_info(self) -> ParserCacheInfo:
+        currsize = len(self._parsers) + len(self._unvalidated_parsers)
+        return ParserCacheInfo(hits=self._hits, misses=self._misses, currsize=currsize)
+
+    def cache_clear(self) -> None:
+        self._parsers.clear()
+        self._unvalidated_parsers.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+def build_parser(type_: Any) -> Parser:
+    """
+    Models are validated directly; any other type is wrapped in a `__root__` model, as in `pydantic.parse_obj_as`
+    """
+    if isinstance(type_, type) and issubclass(type_, BaseModel):
+        return type_.parse_obj
+    parsing_model = create_model(f"ParsingModel[{display_as_type(type_)}]", __root__=(type_, ...))
+
+    def parse(obj: Any) -> Any:
+        return parsing_model(__root__=obj).__root__
+
+    return parse
+
+
+JSON_TYPES = {str, int, float, bool, type(None), Any}
+LIST_ORIGINS = {list, abc.Sequence, abc.MutableSequence, abc.Iterable, abc.Collection}
+SET_ORIGINS = {set, frozenset, abc.Set, abc.MutableSet}
+DICT_ORIGINS = {dict, abc.Mapping, abc.MutableMapping}
+
+
+def identity(obj: Any) -> Any:
+    return obj
+
+
+def build_unvalidated_parser(type_: Any, parsers: Dict[Any, Parser] = None) -> Parser:
+    """
+    Builds values of `type_` from decoded JSON without validating them: models are created with `construct()`
+    (recursively, with the JSON keys mapped from the fields' aliases to their names), and lists, sets and dicts
+    are rebuilt with their items converted. Lists and dicts of JSON types are returned as they are.
+
+    Types that JSON doesn't represent directly (e.g., datetimes or enums), and unions other than `Optional`, are
+    still validated, but only for their own values rather than for the whole response.
+    """
+    if parsers is None:
+        parsers = {}
+    parser = parsers.get(type_)
+    if parser is not None:
+        return parser
+    if type_ in JSON_TYPES:
+        return identity
+    if isinstance(type_, type) and issubclass(type_, BaseModel):
+        return build_model_constructor(type_, parsers)
+
+    origin = getattr(type_, "__origin__", None)
+    args: Tuple[Any, ...] = getattr(type_, "__args__", None) or ()
+    if origin is Union:
+        item_types = [arg for arg in args if arg is not type(None)]  # noqa E721
+        if len(item_types) != 1:
+            return build_parser(type_)
+        item_parser = build_unvalidated_parser(item_types[0], parsers)
+        return item_parser if item_parser is identity else lambda obj: None if obj is None else item_parser(obj)
+    if origin in LIST_ORIGINS or (origin is tuple and len(args) == 2 and args[1] is Ellipsis):
+        item_parser = build_unvalidated_parser(args[0] if args else Any, parsers)
+        if origin is tuple:
+            return lambda obj: tuple(item_parser(item) for item in obj)
+        return item_parser if item_parser is identity else lambda obj: [item_parser(item) for item in obj]
+    if origin in SET_ORIGINS:
+        item_parser = build_unvalidated_parser(args[0] if args else Any, parsers)
+        return lambda obj: {item_parser(item) for item in obj}
+    if origin in DICT_ORIGINS:
+        value_parser = build_unvalidated_parser(args[1] if args else Any, parsers)
+        if value_parser is identity:
+            return identity
+        return lambda obj: {key: value_parser(value) for key, value in obj.items()}
+    parser = parsers[type_] = build_parser(type_)
+    return parser
+
+
+REQUIRED = object()
+IMMUTABLE_DEFAULTS = (str, int, float, bool, type(None))
+
+
+def build_model_constructor(model: Type[BaseModel], parsers: Dict[Any, Parser]) -> Parser:
+    """
+    Returns a function with the same result as `model.construct(...)` with the converted values of `obj`'s fields.
+
+    Unless the model needs `construct` (for a field with a mutable default or a default factory, or for private
+    attributes), the instance is created directly, which is about twice as fast.
+    """
+    fields: List[Tuple[str, str, Parser, Any]] = []
+    use_construct = bool(getattr(model, "__private_attributes__", None))
+    for field in model.__fields__.values():
+        if not field.required and (
+            getattr(field, "default_factory", None) is not None or not isinstance(field.default, IMMUTABLE_DEFAULTS)
+        ):
+            use_construct = True
+
+    def construct(obj: Any) -> Any:
+        if not isinstance(obj, dict):
+            return model.parse_obj(obj)
+        values = {}
+        fields_set = set()
+        for alias, name, parser, default in fields:
+            if alias in obj:
+                value = obj[alias]
+                values[name] = value if value is None else parser(value)
+                fields_set.add(name)
+            elif default is not REQUIRED:
+                values[name] = default
+        if use_construct:
+            return model.construct(_fields_set=fields_set, **{name: values[name] for name in fields_set})
+        instance = model.__new__(model)
+        object.__setattr__(instance, "__dict__", values)
+        object.__setattr__(instance, "__fields_set__", fields_set)
+        return instance
+
+    def construct_root(obj: Any) -> Any:
+        return model.construct(__root__=fields[0][2](obj))
+
+    # Registered before the fields are built, so that self-referencing models refer to this parser
+    parsers[model] = construct_root if "__root__" in model.__fields__ else construct
+    for name, field in model.__fields__.items():
+        parser = build_unvalidated_parser(field.outer_type_, parsers)
+        fields.append((field.alias, name, parser, REQUIRED if field.required else field.default))
+    return parsers[model]
+
+
+default_parser_registry = ParserRegistry()
+
+ItemT = TypeVar("ItemT")
+
+
+class BulkResult(Generic[ItemT, T]):
+    """
+    The outcome of a single call made by `ApiClient.map`; exactly one of `value` and `error` is set
+    """
+
+    __slots__ = ("index", "item", "value", "error")
+
+    def __init__(self, index: int, item: ItemT, value: T = None, error: Exception = None) -> None:
+        self.index = index
+        self.item = item
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self) -> T:
+        if self.error is not None:
+            raise self.error
+        return self.value  # type: ignore
+
+    def __repr__(self) -> str:
+        outcome = f"value={self.value!r}" if self.error is None else f"error={self.error!r}"
+        return f"BulkResult(index={self.index}, item={self.item!r}, {outcome})"
+
+
+class BulkProgress:
+    """
+    Counters for a running `ApiClient.map` call; pass one in to read them from another task while it runs
+    """
+
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed
+
+    @property
+    def succeeded(self) -> int:
+        return self.completed - self.failed
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else monotonic()
+        return end - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """
+        Completed calls per second
+        """
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"BulkProgress(submitted={self.submitted}, completed={self.completed}, failed={self.failed}, "
+            f"throughput={self.throughput:.1f}/s)"
+        )
+
+
+class BackgroundLoop:
+    """
+    An event loop that runs forever on a daemon thread, started on first use.
+
+    Coroutines can be submitted to it from any thread, so many threads can share a single client (and its
+    connection pool) without each needing an event loop of their own.
+    """
+
+    def __init__(self, name: str = "api-client-loop") -> None:
+        self.name = name
+        self._loop: Optional[AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+
+    @property
+    def loop(self) -> AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = new_event_loop()
+                    self._thread = Thread(target=loop.run_forever, name=self.name, daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def run(self, awaitable: Awaitable[T]) -> T:
+        """
+        Blocks the calling thread until `awaitable` has completed on the background loop
+        """
+        if self._thread is not None and self._thread is current_thread():
+            raise RuntimeError("BackgroundLoop.run can't be called from the background loop's own thread")
+        return run_coroutine_threadsafe(as_coroutine(awaitable), self.loop).result()
+
+    def close(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None and thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+async def as_coroutine(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+default_background_loop = BackgroundLoop()
+
+# Set while a request is run by `run_blocking`, so that `ApiClient.send_inner` uses the blocking client
+blocking_send: ContextVar[bool] = ContextVar("blocking_send", default=False)
+
+
+def run_blocking(awaitable: Awaitable[T]) -> T:
+    """
+    Runs `awaitable` to completion on the calling thread without an event loop.
+
+    This works because nothing awaited while sending a request through the blocking client ever suspends;
+    if something does (e.g., a middleware performing asynchronous I/O), a RuntimeError is raised.
+    """
+    coroutine = as_coroutine(awaitable)
+    token = blocking_send.set(True)
+    try:
+        coroutine.send(None)
+    except StopIteration as e:
+        return e.value
+    finally:
+        blocking_send.reset(token)
+    coroutine.close()
+    raise RuntimeError("A request run with sync_mode='blocking' tried to wait on asynchronous I/O")
+
+
+SyncMode = Literal["event_loop", "background_loop", "blocking"]
+ValidationMode = Literal["full", "sample", "none"]
+
+# Set by `ApiClient.validation` to override the client's validation mode
+validation_mode: ContextVar[Optional[ValidationMode]] = ContextVar("validation_mode", default=None)
+
+
+class PoolSettings(BaseModel):
+    """
+    Connection pool configuration for `ApiClient`:
+
+    * max_connections: the most connections that may be open at once (requests beyond this wait for a connection)
+    * max_keepalive_connections: the most connections kept open for reuse once their responses have been read
+    * keepalive_expiry: seconds an idle connection is kept open for reuse
+    * http2: whether to negotiate HTTP/2, which multiplexes concurrent requests over a single connection
+    """
+
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 10
+    keepalive_expiry: float = 5.0
+    http2: bool = False
+
+    def pool_limits(self) -> PoolLimits:
+        return PoolLimits(soft_limit=self.max_keepalive_connections, hard_limit=self.max_connections)
+
+
+class RequestTiming:
+    """
+    The time spent in each phase of a request made through `ApiClient.send`, passed to the client's listeners.
+
+    Phases are in seconds, summed over the attempts if the request was sent more than once (e.g., by
+    `RetryMiddleware`; `attempts` is 0 if middleware returned a response without sending it):
+
+    * pool_wait: waiting for a connection from the pool
+    * connect: opening a new connection, including the TLS handshake
+    * server: sending the request and waiting for the response headers
+    * read: reading the response content
+    * decode: decoding the JSON content
+    * validate: parsing the decoded content into the response type
+
+    `pool_wait` and `connect` are only measured for the async client; in "blocking" sync mode they are part of
+    `server`. `total` includes the time spent in middleware.
+    """
+
+    __slots__ = (
+        "operation_id",
+        "method",
+        "url_template",
+        "status_code",
+        "error",
+        "attempts",
+        "pool_wait",
+        "connect",
+        "server",
+        "read",
+        "decode",
+        "validate",
+        "total",
+        "request_bytes",
+        "response_bytes",
+    )
+
+    PHASES = ("pool_wait", "connect", "server", "read", "decode", "validate")
+
+    def __init__(self, operation_id: Optional[str], method: str, url_template: str) -> None:
+        self.operation_id = operation_id
+        self.method = method
+        self.url_template = url_template
+        self.status_code: Optional[int] = None
+        self.error: Optional[str] = None  # the name of the exception raised, if any
+        self.attempts = 0
+        self.pool_wait = self.connect = self.server = self.read = self.decode = self.validate = self.total = 0.0
+        self.request_bytes = self.response_bytes = 0
+
+    def phases(self) -> Dict[str, float]:
+        return {phase: getattr(self, phase) for phase in self.PHASES}
+
+    def __repr__(self) -> str:
+        phases = ", ".join(f"{phase}={duration * 1000:.2f}ms" for phase, duration in self.phases().items())
+        return (
+            f"RequestTiming({self.operation_id or self.url_template}, status_code={self.status_code}, {phases}, "
+            f"total={self.total * 1000:.2f}ms)"
+        )
+
+
+RequestListener = Callable[[RequestTiming], None]
+request_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+class ConnectionStats:
+    """
+    Counts the connections the async client has opened, and the requests sent over an already-open connection
+    """
+
+    __slots__ = ("new", "reused")
+
+    def __init__(self) -> None:
+        self.new = 0
+        self.reused = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.new + self.reused
+        return self.reused / total if total else 0.0
+
+    def __repr__(self) -> str:
+        return f"ConnectionStats(new={self.new}, reused={self.reused})"
+
+
+class TimedBackend(ConcurrencyBackend):
+    """
+    Wraps the httpx concurrency backend used by the connection pool, to add the time spent opening connections
+    (including the TLS handshake) to the timing of the request they are opened for
+    """
+
+    def __init__(self, backend: ConcurrencyBackend) -> None:
+        self.backend = backend
+
+    async def open_tcp_stream(
+        self, hostname: str, port: int, ssl_context: Optional[SSLContext], timeout: Timeout
+    ) -> BaseSocketStream:
+        return await self.timed(self.backend.open_tcp_stream(hostname, port, ssl_context, timeout))
+
+    async def open_uds_stream(
+        self, path: str, hostname: Optional[str], ssl_context: Optional[SSLContext], timeout: Timeout
+    ) -> BaseSocketStream:
+        return await self.timed(self.backend.open_uds_stream(path, hostname, ssl_context, timeout))
+
+    @staticmethod
+    async def timed(opening: Awaitable[BaseSocketStream]) -> BaseSocketStream:
+        timing = request_timing.get()
+        if timing is None:
+            return await opening
+        start = monotonic()
+        try:
+            return await opening
+        finally:
+            timing.connect += monotonic() - start
+
+    def time(self) -> float:
+        return self.backend.time()
+
+    def create_semaphore(self, max_value: int, exc_class: type) -> BaseSemaphore:
+        return self.backend.create_semaphore(max_value, exc_class)
+
+    def create_lock(self) -> BaseLock:
+        return self.backend.create_lock()
+
+
+class StatsConnectionPool(ConnectionPool):
+    """
+    An httpx connection pool that records whether each request was sent over a new or a reused connection, and
+    the time requests spend waiting for a connection (the time spent connecting is recorded by `TimedBackend`)
+    """
+
+    def __init__(
+        self,
+        stats: ConnectionStats,
+        keepalive_expiry: float,
+        backend: Union[str, ConcurrencyBackend] = "auto",
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(backend=TimedBackend(lookup_backend(backend)), **kwargs)
+        self.stats = stats
+        self.KEEP_ALIVE_EXPIRY = keepalive_expiry
+
+    def pop_connection(self, origin: Origin) -> Optional[HTTPConnection]:
+        connection = super().pop_connection(origin)
+        if connection is None:
+            self.stats.new += 1
+        else:
+            self.stats.reused += 1
+        return connection
+
+    async def acquire_connection(self, origin: Origin, timeout: Timeout = None) -> HTTPConnection:
+        timing = request_timing.get()
+        if timing is None:
+            return await super().acquire_connection(origin, timeout=timeout)
+        start = monotonic()
+        try:
+            return await super().acquire_connection(origin, timeout=timeout)
+        finally:
+            timing.pool_wait += monotonic() - start
+
+
+class RequestCoalescer:
+    """
+    Collapses identical GET requests made while one is already in flight: the duplicates wait for the first
+    request and get the same parsed result (the same instance, so it must not be modified).
+
+    Requests are identical if they have the same url (including the query), headers and response type.
+    """
+
+    def __init__(self) -> None:
+        self.in_flight: "Dict[Any, Future[Any]]" = {}
+        self.sent = 0
+        self.collapsed = 0
+
+    def get_key(self, request: Request, type_: Any) -> Any:
+        if request.method != "GET" or blocking_send.get():
+            return None
+        return str(request.url), tuple(sorted(request.headers.items())), type_
+
+    async def send(self, key: Any, send: Callable[[], Awaitable[T]]) -> T:
+        future = self.in_flight.get(key)
+        if future is not None and future.get_loop() is get_event_loop():
+            self.collapsed += 1
+        else:
+            self.sent += 1
+            future = ensure_future(send())
+            self.in_flight[key] = future
+            future.add_done_callback(lambda done: self._remove(key, done))
+        # Shielded, so that cancelling one of the callers doesn't cancel the request for the others
+        result: T = await shield(future)
+        return result
+
+    def _remove(self, key: Any, future: "Future[Any]") -> None:
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
+
+    def __repr__(self) -> str:
+        return f"RequestCoalescer(sent={self.sent}, collapsed={self.collapsed}, in_flight={len(self.in_flight)})"
+
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+class ApiRequest(Request):
+    """
+    A request made for an operation of the generated apis; middleware can use `operation_id` to tell them apart.
+    `url_template` is the operation's path, before the path parameters are substituted.
+
+    `idempotent` is the value of the operation's `x-idempotent` extension in the spec, and otherwise depends on the
+    method.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        *,
+        operation_id: str = None,
+        idempotent: bool = None,
+        url_template: str = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(method, url, **kwargs)
+        self.operation_id = operation_id
+        self.url_template = url_template
+        self.idempotent = idempotent if idempotent is not None else self.method in IDEMPOTENT_METHODS
+
+    @classmethod
+    def for_operation(
+        cls,
+        operation: Operation,
+        url: URL,
+        headers: Headers,
+        cookies: Dict[str, str] = None,
+        stream: ContentStream = None,
+    ) -> "ApiRequest":
+        """
+        Builds a request for `operation` without calling `Request.__init__`, which would parse `url` again
+        """
+        request = cls.__new__(cls)
+        request.method = operation.method
+        request.url = url
+        request.headers = headers
+        if cookies:
+            Cookies(cookies).set_cookie_header(request)
+        request.stream = stream if stream is not None else ByteStream(b"")
+        request.timer = ElapsedTimer()
+        request.operation_id = operation.operation_id
+        request.url_template = operation.path
+        idempotent = operation.idempotent
+        request.idempotent = idempotent if idempotent is not None else operation.method in IDEMPOTENT_METHODS
+        request.prepare()
+        return request
+
+
+def join_url(base_url: URL, path: str, query: Optional[str]) -> URL:
+    """
+    Returns `base_url` with `path` appended and `query` set, without parsing and normalizing the whole url again as
+    `URL(str)` does; `path` and `query` must already be percent-encoded
+    """
+    base = base_url._uri_reference
+    url = URL.__new__(URL)
+    url._uri_reference = base.copy_with(path=(base.path or "") + path, query=query)
+    url._full_path = None
+    return url
+
+
+def supports_join_url() -> bool:
+    """
+    Returns whether `join_url` works with the installed httpx, whose `URL` internals it uses (the generated
+    requirements pin httpx to 0.11.x); if it doesn't, `ApiClient.build_operation_request` falls back to `build_request`
+    """
+    try:
+        url = join_url(URL("http://localhost/v2"), "/pet/a%20b", "status=sold")
+        return str(url) == "http://localhost/v2/pet/a%20b?status=sold" and url.full_path == "/v2/pet/a%20b?status=sold"
+    except Exception:
+        return False
+
+
+JOIN_URL_SUPPORTED = supports_join_url()
 
 
 class ApiClient:
-    def __init__(self, host: str = None, **kwargs: Any) -> None:
+    def __init__(
+        self,
+        host: str = None,
+        parser_registry: ParserRegistry = None,
+        codec: JsonCodec = None,
+        sync_mode: SyncMode = "event_loop",
+        pool: PoolSettings = None,
+        coalesce_requests: bool = False,
+        validate: ValidationMode = "full",
+        validate_sample_rate: float = 0.01,
+        **kwargs: Any,
+    ) -> None:
+        """
+        `pool` configures the connection pool size, keep-alive and HTTP/2; any other keyword arguments are passed
+        to the httpx client. `codec` encodes request bodies and decodes responses (`JsonCodec` by default; see
+        `codec.OrjsonCodec` for a faster one).
+
+        `validate` determines how responses are parsed; it can be overridden for some calls with `validation`:
+
+        * "full": validate every response
+        * "none": build the response models with `construct()`, without validation, which is much faster for
+          large responses but must only be used with servers that are trusted to respond as their spec says
+        * "sample": validate a random `validate_sample_rate` of the responses and build the others without
+          validation, so that a server that stops following its spec is still noticed
+
+        With `coalesce_requests`, identical GET requests sent concurrently share a single request and parsed
+        result; see `RequestCoalescer`.
+
+        `sync_mode` determines how the Sync*Api classes wait for requests:
+
+        * "event_loop": run each request to completion on the calling thread's event loop
+        * "background_loop": submit each request to a shared event loop running on a daemon thread; this works
+          from any number of threads, but the client should then only be used through the sync apis
+        * "blocking": send each request through a blocking `httpx.Client` with its own connection pool, without
+          using asyncio at all; the request building, middleware and response parsing are the same as for the
+          async apis, but middleware must not perform asynchronous I/O
+        """
         self.host = host
-        self.middleware: MiddlewareT = BaseMiddleware()
-        self._async_client = AsyncClient(**kwargs)
+        self.parser_registry = parser_registry if parser_registry is not None else default_parser_registry
+        self.codec = codec if codec is not None else JsonCodec()
+        self.sync_mode = sync_mode
+        self.background_loop = default_background_loop
+        self.middlewares: List[MiddlewareT] = []
+        self.listeners: List[RequestListener] = []
+        self.pool = pool if pool is not None else PoolSettings()
+        self.connection_stats = ConnectionStats()
+        self.coalescer = RequestCoalescer() if coalesce_requests else None
+        self.validate = validate
+        self.validate_sample_rate = validate_sample_rate
+        self._base_url: Optional[Tuple[str, URL]] = None
+        kwargs.setdefault("pool_limits", self.pool.pool_limits())
+        self._async_client = self.build_async_client(**kwargs)
+        self._sync_client: Optional[Client] = Client(**kwargs) if sync_mode == "blocking" else None
+        self.compile_middleware()
+
+    def build_async_client(self, **kwargs: Any) -> AsyncClient:
+        if "dispatch" in kwargs or "app" in kwargs:
+            return AsyncClient(http2=self.pool.http2, **kwargs)
+        dispatch = StatsConnectionPool(
+            self.connection_stats,
+            self.pool.keepalive_expiry,
+            verify=kwargs.get("verify", True),
+            cert=kwargs.get("cert"),
+            trust_env=kwargs.get("trust_env", True),
+            pool_limits=kwargs["pool_limits"],
+            http2=self.pool.http2,
+            backend=kwargs.pop("backend", "auto"),
+            uds=kwargs.pop("uds", None),
+        )
+        return AsyncClient(http2=self.pool.http2, dispatch=dispatch, **kwargs)
+
+    async def __aenter__(self: ClientT) -> ClientT:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Closes the connections held by the client, and by any middleware with an `aclose` method
+        """
+        for middleware in self.middlewares:
+            aclose = getattr(middleware, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        await self._async_client.aclose()
+        if self._sync_client is not None:
+            self._sync_client.close()
+
+    def close(self) -> None:
+        """
+        Like `aclose`, for use alongside the sync apis
+        """
+        self.run_sync(self.aclose())
+
+    async def warm_up(self, connections: int = 1) -> int:
+        """
+        Opens `connections` connections to `host` concurrently, so that the first requests can reuse them instead of
+        waiting to connect (and for the TLS handshake).
+
+        Returns the number of connections opened. At most `pool.max_keepalive_connections` of them are kept open,
+        for up to `pool.keepalive_expiry` seconds.
+        """
+        if self.host is None:
+            raise ValueError("warm_up requires the client to have a host")
+        opened = self.connection_stats.new
+        await gather(*(self.send_inner(Request("HEAD", self.host)) for _ in range(connections)))
+        return self.connection_stats.new - opened
 
     @overload
     async def request(
@@ -56,11 +864,105 @@ class ApiClient:
     async def request(  # noqa F811
         self, *, type_: Any, method: str, url: str, path_params: Dict[str, Any] = None, **kwargs: Any
     ) -> Any:
+        request = self.build_request(method=method, url=url, path_params=path_params, **kwargs)
+        return await self.send(request, type_)
+
+    async def request_iter(
+        self, *, item_type: Type[T], method: str, url: str, path_params: Dict[str, Any] = None, **kwargs: Any
+    ) -> AsyncIterator[T]:
+        """
+        Yields the items of a JSON array response as they are received, without buffering the whole response
+        """
+        request = self.build_request(method=method, url=url, path_params=path_params, **kwargs)
+        async for item in self.send_iter(request, item_type):
+            yield item
+
+    def build_request(
+        self,
+        *,
+        method: str,
+        url: str,
+        path_params: Dict[str, Any] = None,
+        operation_id: str = None,
+        idempotent: bool = None,
+        **kwargs: Any,
+    ) -> ApiRequest:
         if path_params is None:
             path_params = {}
+        url_template = url
         url = (self.host or "") + url.format(**path_params)
-        request = Request(method, url, **kwargs)
-        return await self.send(request, type_)
+        body = kwargs.pop("json", None)
+        if body is not None:
+            # Encode with the codec here rather than letting httpx use the standard library
+            headers = Headers(kwargs.get("headers"))
+            headers.setdefault("content-type", self.codec.media_type)
+            kwargs["headers"] = headers
+            kwargs["data"] = self.codec.dumps(body)
+        stream = replayable_stream(kwargs.get("data"))
+        if stream is not None:
+            # Files and iterators are wrapped so the request can be sent again (e.g., by AuthMiddleware)
+            del kwargs["data"]
+            kwargs["stream"] = stream
+        return ApiRequest(
+            method, url, operation_id=operation_id, idempotent=idempotent, url_template=url_template, **kwargs
+        )
+
+    async def request_operation(self, operation: Operation, **kwargs: Any) -> Any:
+        """
+        Used by the generated apis to make a request for `operation`; see `build_operation_request`
+        """
+        request = self.build_operation_request(operation, **kwargs)
+        return await self.send(request, operation.response_type)
+
+    async def request_operation_iter(self, operation: Operation, item_type: Type[T], **kwargs: Any) -> AsyncIterator[T]:
+        request = self.build_operation_request(operation, **kwargs)
+        async for item in self.send_iter(request, item_type):
+            yield item
+
+    def build_operation_request(
+        self,
+        operation: Operation,
+        *,
+        path_params: Dict[str, str] = None,
+        params: Dict[str, Any] = None,
+        headers: Dict[str, str] = None,
+        cookies: Dict[str, str] = None,
+        json: Any = None,
+        **kwargs: Any,
+    ) -> ApiRequest:
+        """
+        Builds the request for a call of `operation`, filling in its precompiled path template and appending it to the
+        parsed host, rather than formatting the url and parsing it whole as `build_request` does.
+
+        Form and file uploads (`data` and `files`) go through `build_request`, as do all requests if the installed
+        httpx isn't one whose `URL` internals `join_url` works with.
+        """
+        path = operation.build_path(path_params)
+        if kwargs or self.host is None or not JOIN_URL_SUPPORTED:
+            request = self.build_request(
+                method=operation.method,
+                url=path,
+                operation_id=operation.operation_id,
+                idempotent=operation.idempotent,
+                params=params,
+                headers=headers,
+                cookies=cookies,
+                json=json,
+                **kwargs,
+            )
+            request.url_template = operation.path
+            return request
+
+        base_url = self._base_url
+        if base_url is None or base_url[0] != self.host:
+            base_url = self._base_url = (self.host, URL(self.host))
+        url = join_url(base_url[1], path, str(QueryParams(params)) if params else None)
+        request_headers = Headers(headers)
+        stream = None
+        if json is not None:
+            request_headers.setdefault("content-type", self.codec.media_type)
+            stream = ByteStream(self.codec.dumps(json))
+        return ApiRequest.for_operation(operation, url, request_headers, cookies, stream)
 
     @overload
     def request_sync(self, *, type_: Type[T], **kwargs: Any) -> T:
@@ -74,36 +976,320 @@ class ApiClient:
         """
         This method is not used by the generated apis, but is included for convenience
         """
-        return get_event_loop().run_until_complete(self.request(type_=type_, **kwargs))
+        return self.run_sync(self.request(type_=type_, **kwargs))
+
+    @contextmanager
+    def validation(self, mode: ValidationMode) -> Iterator[None]:
+        """
+        Overrides the validation mode for the calls made within the block, e.g.
+
+            with client.validation("none"):
+                pets = await apis.pet_api.find_pets_by_status(["available"])
+        """
+        token = validation_mode.set(mode)
+        try:
+            yield
+        finally:
+            validation_mode.reset(token)
+
+    def should_validate(self) -> bool:
+        mode = validation_mode.get() or self.validate
+        if mode == "sample":
+            return random() < self.validate_sample_rate
+        return mode != "none"
+
+    def run_sync(self, awaitable: Awaitable[T]) -> T:
+        """
+        Used by the Sync*Api classes to wait for the result of a request, as determined by `sync_mode`
+        """
+        if self.sync_mode == "blocking":
+            return run_blocking(awaitable)
+        if self.sync_mode == "background_loop":
+            return self.background_loop.run(awaitable)
+        return get_event_loop().run_until_complete(awaitable)
 
     async def send(self, request: Request, type_: Type[T]) -> T:
-        response = await self.middleware(request, self.send_inner)
+        if self.coalescer is not None:
+            key = self.coalescer.get_key(request, type_)
+            if key is not None:
+                return await self.coalescer.send(key, lambda: self.send_uncoalesced(request, type_))
+        return await self.send_uncoalesced(request, type_)
+
+    async def send_uncoalesced(self, request: Request, type_: Type[T]) -> T:
+        if self.listeners:
+            return await self.send_timed(request, type_)
+        response = await self._send_chain(request)
+        return self.parse_response(response, type_)
+
+    async def send_timed(self, request: Request, type_: Type[T]) -> T:
+        """
+        Like `send_uncoalesced`, but times the phases of the request and passes them to the listeners
+        """
+        url_template: Optional[str] = getattr(request, "url_template", None)
+        timing = RequestTiming(getattr(request, "operation_id", None), request.method, url_template or str(request.url))
+        token = request_timing.set(timing)
+        start = monotonic()
+        try:
+            response = await self._send_chain(request)
+            timing.status_code = response.status_code
+            return self.parse_response(response, type_, timing)
+        except Exception as e:
+            timing.error = type(e).__name__
+            raise
+        finally:
+            request_timing.reset(token)
+            timing.total = monotonic() - start
+            for listener in self.listeners:
+                listener(timing)
+
+    def parse_response(self, response: Response, type_: Type[T], timing: RequestTiming = None) -> T:
         if response.status_code in [200, 201]:
+            validate = self.should_validate()
+            # Set by middleware (e.g., cache.ResponseCache) that returns the same response to many requests
+            parsed_cache: Optional[Dict[Any, Any]] = getattr(response, "parsed_cache", None) if validate else None
+            if parsed_cache is not None and type_ in parsed_cache:
+                return parsed_cache[type_]
             try:
-                return parse_obj_as(type_, response.json())
+                if timing is None:
+                    parsed = self.parser_registry.parse(type_, self.codec.loads(response.content), validate)
+                else:
+                    start = monotonic()
+                    content = self.codec.loads(response.content)
+                    decoded = monotonic()
+                    parsed = self.parser_registry.parse(type_, content, validate)
+                    timing.decode = decoded - start
+                    timing.validate = monotonic() - decoded
             except ValidationError as e:
                 raise ResponseHandlingException(e)
+            if parsed_cache is not None:
+                parsed_cache[type_] = parsed
+            return parsed
         raise UnexpectedResponse.for_response(response)
 
+    async def send_iter(self, request: Request, item_type: Type[T]) -> AsyncIterator[T]:
+        response = await self._send_stream_chain(request)
+        try:
+            if response.status_code not in [200, 201]:
+                await response.aread()
+                raise UnexpectedResponse.for_response(response)
+            parser = self.parser_registry.get_parser(item_type, self.should_validate())
+            async for item in iter_json_array(response.aiter_bytes()):
+                try:
+                    parsed = parser(item)
+                except ValidationError as e:
+                    raise ResponseHandlingException(e)
+                yield parsed
+        finally:
+            await response.aclose()
+
     async def send_inner(self, request: Request) -> Response:
+        timing = request_timing.get()
+        if timing is not None:
+            return await self.send_inner_timed(request, timing)
         try:
-            response = await self._async_client.send(request)
+            if self._sync_client is not None and blocking_send.get():
+                response = self._sync_client.send(request)
+            else:
+                response = await self._async_client.send(request)
         except Exception as e:
             raise ResponseHandlingException(e)
         return response
 
+    async def send_inner_untimed(self, request: Request) -> Response:
+        """
+        Like `send_inner`, but not counted in the timing of the request in flight; used for requests sent on behalf of
+        middleware (e.g., the token requests of `AuthMiddleware`)
+        """
+        token = request_timing.set(None)
+        try:
+            return await self.send_inner(request)
+        finally:
+            request_timing.reset(token)
+
+    async def send_inner_timed(self, request: Request, timing: RequestTiming) -> Response:
+        """
+        Like `send_inner`, but reads the response content separately from the headers, to time each of them
+        """
+        timing.attempts += 1
+        timing.request_bytes = int(request.headers.get("content-length", 0))
+        connecting = timing.pool_wait + timing.connect
+        start = monotonic()
+        try:
+            if self._sync_client is not None and blocking_send.get():
+                response = self._sync_client.send(request, stream=True)
+                headers_at = monotonic()
+                try:
+                    response.read()
+                finally:
+                    response.close()
+            else:
+                response = await self._async_client.send(request, stream=True)
+                headers_at = monotonic()
+                try:
+                    await response.aread()
+                finally:
+                    await response.aclose()
+        except Exception as e:
+            raise ResponseHandlingException(e)
+        timing.server += headers_at - start - (timing.pool_wait + timing.connect - connecting)
+        timing.read += monotonic() - headers_at
+        timing.response_bytes = len(response.content)
+        return response
+
+    async def send_inner_stream(self, request: Request) -> Response:
+        """
+        Like `send_inner`, but the response content is left unread so it can be consumed incrementally
+        """
+        try:
+            response = await self._async_client.send(request, stream=True)
+        except Exception as e:
+            raise ResponseHandlingException(e)
+        return response
+
+    async def map(
+        self,
+        func: Callable[[ItemT], Awaitable[T]],
+        items: Iterable[ItemT],
+        *,
+        concurrency: int = 16,
+        progress: BulkProgress = None,
+    ) -> List[BulkResult[ItemT, T]]:
+        """
+        Calls `func` once per item, with at most `concurrency` calls in flight, and returns the results in input order.
+
+        `func` is usually an api method, e.g. `client.map(apis.pet_api.get_pet_by_id, pet_ids, concurrency=64)`.
+        An exception raised by a call is stored on its result instead of cancelling the remaining calls.
+        """
+        results = [
+            result async for result in self.map_as_completed(func, items, concurrency=concurrency, progress=progress)
+        ]
+        results.sort(key=attrgetter("index"))
+        return results
+
+    async def map_as_completed(
+        self,
+        func: Callable[[ItemT], Awaitable[T]],
+        items: Iterable[ItemT],
+        *,
+        concurrency: int = 16,
+        progress: BulkProgress = None,
+    ) -> AsyncIterator[BulkResult[ItemT, T]]:
+        """
+        Like `map`, but yields each result as soon as its call completes.
+
+        If iterating over `items` raises an exception, the calls in flight are cancelled and the exception is raised.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if progress is None:
+            progress = BulkProgress()
+        progress.started_at = monotonic()
+        enumerated_items = enumerate(items)  # shared by the workers, so each item is only taken once
+        queue: "Queue[Optional[BulkResult[ItemT, T]]]" = Queue(maxsize=concurrency)
+        iteration_errors: List[Exception] = []  # raised by `items` itself, rather than by a call
+
+        async def worker(progress: BulkProgress) -> None:
+            try:
+                for index, item in enumerated_items:
+                    progress.submitted += 1
+                    try:
+                        result: BulkResult[ItemT, T] = BulkResult(index, item, value=await func(item))
+                    except CancelledError:
+                        raise
+                    except Exception as e:
+                        progress.failed += 1
+                        result = BulkResult(index, item, error=e)
+                    progress.completed += 1
+                    await queue.put(result)
+            except CancelledError:
+                raise
+            except Exception as e:
+                iteration_errors.append(e)
+            await queue.put(None)
+
+        workers = [ensure_future(worker(progress)) for _ in range(concurrency)]
+        try:
+            running = len(workers)
+            while running:
+                result = await queue.get()
+                if result is None:
+                    running -= 1
+                    if iteration_errors:
+                        raise iteration_errors[0]
+                else:
+                    yield result
+        finally:
+            progress.finished_at = monotonic()
+            for task in workers:
+                task.cancel()
+            await gather(*workers, return_exceptions=True)
+
+    def add_listener(self, listener: RequestListener) -> None:
+        """
+        `listener` is called with the `RequestTiming` of each request made through `send` (but not `send_iter`)
+        once it completes, successfully or not; see `instrumentation.py` for listeners that aggregate them
+        """
+        self.listeners.append(listener)
+
     def add_middleware(self, middleware: MiddlewareT) -> None:
-        current_middleware = self.middleware
+        """
+        Adds `middleware` around the existing middleware, so it sees each request first and each response last
+        """
+        self.middlewares.append(middleware)
+        self.compile_middleware()
+
+    def compile_middleware(self) -> None:
+        """
+        Rebuilds the chains of calls through `middlewares`; call this after modifying `middlewares` directly
+        """
+        self._send_chain = build_middleware_chain(self.middlewares, self.send_inner)
+        self._send_stream_chain = build_middleware_chain(self.middlewares, self.send_inner_stream)
 
-        async def new_middleware(request: Request, call_next: Send) -> Response:
-            async def inner_send(request: Request) -> Response:
-                return await current_middleware(request, call_next)
+    @property
+    def middleware(self) -> MiddlewareT:
+        """
+        The current `middlewares` combined into a single middleware; setting it replaces them all with the given one
+        """
+        middlewares = list(self.middlewares)
 
-            return await middleware(request, inner_send)
+        def middleware(request: Request, call_next: Send) -> Awaitable[Response]:
+            return build_middleware_chain(middlewares, call_next)(request)
 
-        self.middleware = new_middleware
+        return middleware
+
+    @middleware.setter
+    def middleware(self, middleware: MiddlewareT) -> None:
+        self.middlewares = [middleware]
+        self.compile_middleware()
 
 
 class BaseMiddleware:
     async def __call__(self, request: Request, call_next: Send) -> Response:
         return await call_next(request)
+
+
+class MiddlewareLink:
+    """
+    One link of a middleware chain: calls `middleware` with the rest of the chain as `call_next`.
+
+    Links are built once when the middleware changes, and calling one returns the middleware's awaitable
+    directly, so a request doesn't allocate a closure or an extra coroutine per middleware.
+    """
+
+    __slots__ = ("middleware", "call_next")
+
+    def __init__(self, middleware: MiddlewareT, call_next: Send) -> None:
+        self.middleware = middleware
+        self.call_next = call_next
+
+    def __call__(self, request: Request) -> Awaitable[Response]:
+        return self.middleware(request, self.call_next)
+
+
+def build_middleware_chain(middlewares: List[MiddlewareT], send: Send) -> Send:
+    """
+    Returns a `Send` that passes requests through `middlewares` (the last one outermost) and then to `send`
+    """
+    for middleware in middlewares:
+        send = MiddlewareLink(middleware, send)
+    return send
@@ -1,19 +1,22 @@
+from asyncio import CancelledError, Future, ensure_future, get_event_loop, shield, sleep
 from contextlib import suppress
 from datetime import datetime, timedelta
+from threading import Lock
 from typing import Optional
 
-from fastapi.openapi.models import OAuthFlowPassword
 from httpx import Request, Response
 from pydantic import BaseModel
 
-from example.client.api_client import Send
+from example.client.api_client import ApiClient, Send, blocking_send
 from example.client.exceptions import UnexpectedResponse
 from example.client.password_flow_client import (
     AccessTokenRequest,
+    OAuthFlowPassword,
     PasswordFlowClient,
     RefreshTokenRequest,
     TokenSuccessResponse,
 )
+from example.client.token_store import StoredTokens, TokenStore
 
 HTTP_401_UNAUTHORIZED = 401
 
@@ -41,18 +44,64 @@ class AuthState(BaseModel):
             return False
         return self.expires_at < datetime.utcnow() + timedelta(seconds=30)
 
+    def get_stored_tokens(self) -> Optional[StoredTokens]:
+        if self.access_token is None:
+            return None
+        return StoredTokens(
+            access_token=self.access_token,
+            refresh_token=self.refresh_token,
+            expires_at=self.expires_at,
+            scope=self.scope,
+        )
+
+    def set_stored_tokens(self, tokens: StoredTokens) -> None:
+        self.access_token = tokens.access_token
+        self.refresh_token = tokens.refresh_token
+        self.expires_at = tokens.expires_at
+        self.scope = tokens.scope
+
     def update(self, token_success_response: TokenSuccessResponse) -> None:
         self.access_token = token_success_response.access_token
         self.refresh_token = token_success_response.refresh_token
         self.scope = token_success_response.scope
-        if token_success_response.expires_in is not None:
+        if token_success_response.expires_in is None:
+            self.expires_at = None
+        else:
             self.expires_at = datetime.utcnow() + timedelta(seconds=token_success_response.expires_in)
 
 
 class AuthMiddleware:
-    def __init__(self, auth_state: AuthState, flow: OAuthFlowPassword) -> None:
+    """
+    Adds the access token to requests, and refreshes the tokens (or logs in again) when they expire.
+
+    Concurrent requests that find the tokens expired (or get a 401) share a single refresh, rather than each
+    calling the token endpoint. Call `start_background_refresh` to refresh the tokens shortly before they
+    expire, so that requests don't wait on the token endpoint at all.
+
+    With a `token_store`, tokens are shared under `token_key` (by default, the token url and username) with
+    the other middlewares using the store, which may be in other processes: a middleware without tokens
+    starts with the stored ones, and renewals are made by one middleware at a time while holding the store's
+    lock, so the others pick up its tokens instead of calling the token endpoint themselves.
+
+    Pass the `api_client` the middleware is added to, so that token requests reuse its connection pool (and work
+    with `sync_mode="blocking"`).
+    """
+
+    def __init__(
+        self,
+        auth_state: AuthState,
+        flow: OAuthFlowPassword,
+        token_store: TokenStore = None,
+        token_key: str = None,
+        api_client: ApiClient = None,
+    ) -> None:
         self.auth_state = auth_state
-        self.flow_client = PasswordFlowClient(flow)
+        self.flow_client = PasswordFlowClient(flow, api_client)
+        self.token_store = token_store
+        self._token_key = token_key
+        self._refresh_future: "Optional[Future[None]]" = None
+        self._refresh_lock = Lock()
+        self._background_refresh: "Optional[Future[None]]" = None
 
     @staticmethod
     def set_access_header(token: str, request: Request, *, replace: bool) -> None:
@@ -85,10 +134,108 @@ class AuthMiddleware:
                 return token_response
         return None
 
+    async def refresh_or_login(self) -> Optional[TokenSuccessResponse]:
+        tokens = await self.refresh()
+        if tokens is None:
+            tokens = await self.login()
+        return tokens
+
+    @property
+    def token_key(self) -> str:
+        if self._token_key is not None:
+            return self._token_key
+        return f"{self.flow_client.flow.tokenUrl} {self.auth_state.username}"
+
+    def load_stored_tokens(self, stale_access_token: str = None) -> bool:
+        """
+        Updates `auth_state` with the tokens in the token store, if they are unexpired and not `stale_access_token`
+        """
+        if self.token_store is None:
+            return False
+        stored_tokens = self.token_store.load(self.token_key)
+        if stored_tokens is None or stored_tokens.is_expired() or stored_tokens.access_token == stale_access_token:
+            return False
+        self.auth_state.set_stored_tokens(stored_tokens)
+        return True
+
+    async def renew(self, stale_access_token: Optional[str]) -> None:
+        if self.token_store is None:
+            await self.refresh_or_login()
+            return
+        lock = self.token_store.lock(self.token_key)
+        while not lock.acquire(blocking=blocking_send.get()):
+            await sleep(0.05)
+        try:
+            if not self.load_stored_tokens(stale_access_token):
+                await self.refresh_or_login()
+        finally:
+            lock.release()
+
+    async def renew_tokens(self, stale_access_token: Optional[str]) -> Optional[str]:
+        """
+        Refreshes the tokens (or logs in again) unless the access token has changed from `stale_access_token`,
+        and returns the current access token.
+
+        Only one renewal runs at a time; concurrent callers wait for it instead of starting their own.
+        """
+        if self.auth_state.access_token != stale_access_token:
+            return self.auth_state.access_token  # already renewed for another request
+        if blocking_send.get():
+            # Sent without an event loop, so another thread may be renewing the tokens
+            with self._refresh_lock:
+                if self.auth_state.access_token == stale_access_token:
+                    await self.renew(stale_access_token)
+            return self.auth_state.access_token
+        if self._refresh_future is None or self._refresh_future.get_loop() is not get_event_loop():
+            self._refresh_future = ensure_future(self.renew(stale_access_token))
+            self._refresh_future.add_done_callback(self._clear_refresh_future)
+        await shield(self._refresh_future)
+        return self.auth_state.access_token
+
+    def _clear_refresh_future(self, future: "Future[None]") -> None:
+        if self._refresh_future is future:
+            self._refresh_future = None
+
+    def start_background_refresh(self, margin: timedelta = timedelta(seconds=60)) -> "Future[None]":
+        """
+        Starts a task on the running event loop that renews the tokens `margin` before `auth_state.expires_at`
+        """
+        if self._background_refresh is None or self._background_refresh.done():
+            self._background_refresh = ensure_future(self._refresh_before_expiry(margin))
+        return self._background_refresh
+
+    def stop_background_refresh(self) -> None:
+        if self._background_refresh is not None:
+            self._background_refresh.cancel()
+            self._background_refresh = None
+
+    async def _refresh_before_expiry(self, margin: timedelta) -> None:
+        retry_delay = 5.0
+        while True:
+            expires_at = self.auth_state.expires_at
+            if expires_at is None:
+                await sleep(margin.total_seconds())  # wait for a login to set the expiry
+                continue
+            delay = (expires_at - margin - datetime.utcnow()).total_seconds()
+            if delay > 0:
+                await sleep(delay)
+                continue
+            access_token = self.auth_state.access_token
+            try:
+                await self.renew_tokens(access_token)
+            except CancelledError:
+                raise
+            except Exception:
+                pass  # e.g. the token endpoint is unreachable; try again later
+            if self.auth_state.access_token == access_token:
+                await sleep(retry_delay)  # the renewal didn't succeed
+
     async def __call__(self, request: Request, call_next: Send) -> Response:
-        if self.auth_state.is_expired():
-            await self.refresh()
+        if self.auth_state.access_token is None:
+            self.load_stored_tokens()
         access_token = self.auth_state.access_token
+        if self.auth_state.is_expired():
+            access_token = await self.renew_tokens(access_token)
         if access_token is not None:
             self.set_access_header(access_token, request, replace=False)
 
@@ -96,16 +243,23 @@ class AuthMiddleware:
 
         if response.status_code != HTTP_401_UNAUTHORIZED:
             return response
-        tokens = await self.refresh()
-        if tokens is None:
-            tokens = await self.login()
-        if tokens:
-            self.set_access_header(tokens.access_token, request, replace=True)
-            return await call_next(request)  # note: won't work with streaming input
+        if not request.stream.can_replay():
+            return response
+        renewed_access_token = await self.renew_tokens(access_token)
+        if renewed_access_token is not None and renewed_access_token != access_token:
+            self.set_access_header(renewed_access_token, request, replace=True)
+            return await call_next(request)
         return response
 
+    async def aclose(self) -> None:
+        self.stop_background_refresh()
+        await self.flow_client.aclose()
+
     def update_auth_state(self, tokens: TokenSuccessResponse) -> None:
         """
         Override this function if you want a hook for caching the access/refresh tokens
         """
         self.auth_state.update(tokens)
+        stored_tokens = self.auth_state.get_stored_tokens()
+        if self.token_store is not None and stored_tokens is not None:
+            self.token_store.save(self.token_key, stored_tokens)
@@ -0,0 +1,168 @@
+"""
+A middleware that caches GET responses in memory, following the response's `Cache-Control` and `ETag` headers.
+
+Add it with `client.add_middleware(ResponseCache(...))`. Responses are cached by url only, so a client whose requests
+to the same url get different responses depending on their headers (e.g., tokens for different users) should not
+use a shared cache.
+"""
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict, NamedTuple, Optional
+
+from httpx import Request, Response
+from httpx.exceptions import ResponseNotRead
+
+from example.client.api_client import Send
+
+HTTP_200_OK = 200
+HTTP_304_NOT_MODIFIED = 304
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+ENTRY_OVERHEAD = 512  # rough bytes per entry beyond the response content, for the memory bound
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    revalidations: int
+    evictions: int
+    entries: int
+    currsize: int
+
+
+class CacheEntry:
+    __slots__ = ("response", "etag", "expires_at", "size")
+
+    def __init__(self, response: Response, etag: Optional[str], expires_at: float) -> None:
+        self.response = response
+        self.etag = etag
+        self.expires_at = expires_at
+        self.size = len(response.content) + ENTRY_OVERHEAD
+
+    def is_fresh(self) -> bool:
+        return monotonic() < self.expires_at
+
+
+def parse_cache_control(response: Response) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for directive in response.headers.get("cache-control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+class ResponseCache:
+    """
+    * Fresh responses (within `max-age`, or the operation's entry in `ttls`) are returned without a request
+    * Stale responses with an `ETag` are revalidated with `If-None-Match`; a 304 returns the cached response
+    * Responses without `max-age` are kept for `default_ttl` seconds (by default, only to be revalidated)
+    * `no-store` responses are never cached; requests with unsafe methods remove the cached response for their url
+    * The least recently used responses are evicted to keep the cache within roughly `max_bytes`
+
+    With `cache_parsed=True`, the parsed result of a cached response is cached too, so a hit skips parsing and
+    validation. Every hit then returns the *same* model instances, so they must not be modified.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 16 * 1024 * 1024,
+        default_ttl: float = 0.0,
+        ttls: Dict[str, float] = None,
+        cache_parsed: bool = False,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = ttls if ttls is not None else {}
+        self.cache_parsed = cache_parsed
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._currsize = 0
+        self._hits = self._misses = self._revalidations = self._evictions = 0
+
+    async def __call__(self, request: Request, call_next: Send) -> Response:
+        key = str(request.url)
+        if request.method in UNSAFE_METHODS:
+            self.invalidate(key)
+            return await call_next(request)
+        if request.method != "GET":
+            return await call_next(request)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if entry.is_fresh():
+                self._hits += 1
+                return entry.response
+            if entry.etag is not None:
+                request.headers.setdefault("if-none-match", entry.etag)
+
+        response = await call_next(request)
+        if entry is not None and response.status_code == HTTP_304_NOT_MODIFIED:
+            self._revalidations += 1
+            ttl = self.get_ttl(request, response)
+            entry.expires_at = monotonic() + (ttl or 0.0)
+            return entry.response
+        self._misses += 1
+        self.store(key, request, response)
+        return response
+
+    def get_ttl(self, request: Request, response: Response) -> Optional[float]:
+        """
+        Returns how long `response` is fresh for, or None if it mustn't be cached
+        """
+        directives = parse_cache_control(response)
+        if "no-store" in directives:
+            return None
+        operation_id: Optional[str] = getattr(request, "operation_id", None)
+        if operation_id is not None and operation_id in self.ttls:
+            return self.ttls[operation_id]
+        if "no-cache" in directives:
+            return 0.0
+        max_age = directives.get("max-age")
+        if max_age is not None and max_age.isdigit():
+            return float(max_age)
+        return self.default_ttl
+
+    def store(self, key: str, request: Request, response: Response) -> None:
+        self.invalidate(key)
+        if response.status_code != HTTP_200_OK:
+            return
+        ttl = self.get_ttl(request, response)
+        etag = response.headers.get("etag")
+        if ttl is None or (ttl <= 0 and etag is None):
+            return
+        try:
+            entry = CacheEntry(response, etag, monotonic() + ttl)
+        except ResponseNotRead:
+            return  # a streamed response
+        if entry.size > self.max_bytes:
+            return
+        if self.cache_parsed:
+            response.parsed_cache = {}  # type: ignore  # used by ApiClient.send
+        self._entries[key] = entry
+        self._currsize += entry.size
+        while self._currsize > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._currsize -= evicted.size
+            self._evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._currsize -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._currsize = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            revalidations=self._revalidations,
+            evictions=self._evictions,
+            entries=len(self._entries),
+            currsize=self._currsize,
+        )
+
+    def __repr__(self) -> str:
+        return f"ResponseCache({self.stats()})"
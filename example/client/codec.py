@@ -0,0 +1,139 @@
+"""
+JSON encoding/decoding of request and response bodies.
+
+The standard library `json` module is used by default. `OrjsonCodec` (passed as `ApiClient(codec=OrjsonCodec())`)
+uses `orjson`, which is several times faster for large bodies, but doesn't handle everything `json` does; see its
+docstring.
+"""
+import codecs
+import json
+import re
+from importlib import import_module
+from typing import Any, AsyncIterator, List, Optional
+
+try:
+    # Imported by name and typed as Any, so that mypy checks this module the same way whether or not orjson is installed
+    orjson: Optional[Any] = import_module("orjson")
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JsonCodec:
+    """
+    Encodes request bodies to bytes and decodes response content from bytes using the standard library
+    """
+
+    media_type = "application/json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, content: bytes) -> Any:
+        return json.loads(content)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    Encodes and decodes JSON with `orjson` (which must be installed). Unlike `JsonCodec`, it:
+
+    * raises `TypeError` for dicts with keys that aren't strings, which `json` converts to strings
+    * raises `TypeError` for integers outside the 64-bit range, and decodes them as floats
+    * encodes NaN and infinity as `null` (`json` writes them as `NaN` and `Infinity`, which aren't valid JSON), and
+      rejects them when decoding
+    * writes non-ASCII characters as UTF-8 rather than as `\\u` escapes (both are valid JSON)
+    """
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("orjson must be installed to use OrjsonCodec")
+        self.orjson = orjson
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.orjson.dumps(obj)
+
+    def loads(self, content: bytes) -> Any:
+        return self.orjson.loads(content)
+
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+
+class JsonArrayParser:
+    """
+    Incrementally parses the items of a top-level JSON array from chunks of bytes.
+
+    Only the unparsed tail of the content is kept between chunks, so memory use is bounded by the size of
+    a single item rather than the size of the whole array.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+        self._has_items = False
+        self._expect_item = True
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Any]:
+        """
+        Returns the items completed by `chunk`; pass `final=True` once the content is exhausted
+        """
+        buffer = self._buffer + self._text_decoder.decode(chunk, final)
+        position = 0
+        items: List[Any] = []
+        while True:
+            position = skip_whitespace(buffer, position)
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if self._finished:
+                raise json.JSONDecodeError("Extra data", buffer, position)
+            elif not self._started:
+                if char != "[":
+                    raise json.JSONDecodeError("Expecting '['", buffer, position)
+                self._started = True
+                position += 1
+            elif char == "]" and not (self._expect_item and self._has_items):
+                self._finished = True
+                position += 1
+            elif not self._expect_item:
+                if char != ",":
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position)
+                self._expect_item = True
+                position += 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break  # the item is continued by the next chunk
+                if not final and NUMBER_TAIL.fullmatch(buffer, end):
+                    break  # a number may be continued by the next chunk
+                items.append(item)
+                self._has_items = True
+                self._expect_item = False
+                position = end
+        self._buffer = buffer[position:]
+        if final and not self._finished:
+            raise json.JSONDecodeError("Unterminated array", buffer, position)
+        return items
+
+
+def skip_whitespace(text: str, position: int) -> int:
+    match = WHITESPACE.match(text, position)
+    return match.end() if match is not None else position
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Yields the items of a top-level JSON array as soon as each one has been received
+    """
+    parser = JsonArrayParser()
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.feed(b"", final=True):
+        yield item
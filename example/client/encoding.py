@@ -0,0 +1,75 @@
+"""
+Encoding of request bodies into JSON-compatible values.
+
+`encode(obj)` returns the same as FastAPI's `jsonable_encoder(obj)` with its default arguments (fields by alias,
+`None` values included), but the generated models encode themselves with straight-line code (`to_jsonable()`), rather
+than through `BaseModel.dict()` and a recursive walk that inspects the type of every value.
+"""
+from enum import Enum
+from types import GeneratorType
+from typing import Any, Callable, Dict, Tuple
+
+from pydantic import BaseModel
+from pydantic.json import ENCODERS_BY_TYPE
+
+Encoder = Callable[[Any], Any]
+
+SCALAR_TYPES = {str, int, float, bool, type(None)}
+SEQUENCE_TYPES = (list, set, frozenset, GeneratorType, tuple)
+
+
+def encode(obj: Any) -> Any:
+    """
+    Returns `obj` (a model, or a list or dict of them, or any value a model field may hold) as a value that can be
+    serialized to JSON
+    """
+    if type(obj) in SCALAR_TYPES:
+        return obj
+    if isinstance(obj, BaseModel):
+        to_jsonable = getattr(obj, "to_jsonable", None)
+        if to_jsonable is not None:
+            return to_jsonable()
+        return encode(obj.dict(by_alias=True))
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (str, int, float)):
+        return obj
+    if isinstance(obj, dict):
+        return {
+            encode(key): encode(value)
+            for key, value in obj.items()
+            if not (isinstance(key, str) and key.startswith("_sa"))  # as jsonable_encoder, skip SQLAlchemy state
+        }
+    if isinstance(obj, SEQUENCE_TYPES):
+        return [encode(item) for item in obj]
+    return encode_other(obj)
+
+
+def encode_other(obj: Any) -> Any:
+    encoder = ENCODERS_BY_TYPE.get(type(obj))
+    if encoder is not None:
+        return encoder(obj)
+    for classes, encoder in ENCODERS_BY_CLASSES:
+        if isinstance(obj, classes):
+            return encoder(obj)
+    try:
+        data = dict(obj)
+    except Exception as e:
+        try:
+            data = vars(obj)
+        except Exception as e2:
+            raise ValueError([e, e2])
+    return encode(data)
+
+
+def group_encoders(encoders_by_type: Dict[Any, Encoder]) -> Tuple[Tuple[Tuple[type, ...], Encoder], ...]:
+    """
+    Groups pydantic's encoders into (classes, encoder) pairs, for values of subclasses of the types they encode
+    """
+    classes_by_encoder: Dict[Encoder, Tuple[type, ...]] = {}
+    for type_, encoder in encoders_by_type.items():
+        classes_by_encoder[encoder] = classes_by_encoder.get(encoder, ()) + (type_,)
+    return tuple((classes, encoder) for encoder, classes in classes_by_encoder.items())
+
+
+ENCODERS_BY_CLASSES = group_encoders(ENCODERS_BY_TYPE)
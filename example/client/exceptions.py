@@ -44,3 +44,21 @@ class UnexpectedResponse(ApiException):
 class ResponseHandlingException(ApiException):
     def __init__(self, source: Exception):
         self.source = source
+
+
+class ConcurrencyLimitExceeded(ApiException):
+    def __init__(self, limit: int, waited: float) -> None:
+        self.limit = limit
+        self.waited = waited
+
+    def __str__(self) -> str:
+        return f"No request slot became free within {self.waited:.2f}s (concurrency limit {self.limit})"
+
+
+class CircuitOpenError(ApiException):
+    def __init__(self, host: str, retry_in: float) -> None:
+        self.host = host
+        self.retry_in = retry_in
+
+    def __str__(self) -> str:
+        return f"Circuit for {self.host} is open; requests will be let through again in {self.retry_in:.1f}s"
@@ -0,0 +1,214 @@
+"""
+Listeners that aggregate the `RequestTiming`s of an `ApiClient`, added with `client.add_listener(...)`.
+
+* `LatencyCollector` keeps a latency histogram per operation and phase in memory
+* `OpenTelemetryListener` records them as OpenTelemetry metrics (requires `opentelemetry-api`)
+"""
+from bisect import bisect_left
+from importlib import import_module
+from threading import Lock
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from example.client.api_client import RequestTiming
+
+try:
+    # opentelemetry-api is optional; its meters and instruments are only used through untyped attributes anyway
+    otel_metrics: Optional[Any] = import_module("opentelemetry.metrics")
+except ImportError:  # pragma: no cover
+    otel_metrics = None
+
+# Upper bounds in seconds, from 100µs to 60s in roughly 1-2.5-5 steps
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Histogram:
+    """
+    Counts observations in fixed buckets, so that its memory use doesn't grow with the number of observations
+    """
+
+    __slots__ = ("bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket counts the observations beyond the last bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates the `q` quantile (e.g., 0.99) by interpolating within the bucket it falls in
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class PhaseSummary(NamedTuple):
+    requests: int
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+
+class LatencyCollector:
+    """
+    Keeps a `Histogram` per operation (its id, or its method and url template) and phase, including "total", plus
+    counts of status codes and errors and the bytes sent and received.
+
+    `summary()` returns the percentiles of each phase, e.g. to see whether an operation's slow calls are spent
+    waiting for the server or validating a large response.
+    """
+
+    PHASES = RequestTiming.PHASES + ("total",)
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds = bounds
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.statuses: Dict[Tuple[str, str], int] = {}  # by operation and status code, or exception name
+        self.request_bytes: Dict[str, int] = {}
+        self.response_bytes: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def __call__(self, timing: RequestTiming) -> None:
+        operation = timing.operation_id or f"{timing.method} {timing.url_template}"
+        status = timing.error or str(timing.status_code)
+        with self._lock:
+            for phase in self.PHASES:
+                histogram = self.histograms.get((operation, phase))
+                if histogram is None:
+                    histogram = self.histograms[(operation, phase)] = Histogram(self.bounds)
+                histogram.observe(getattr(timing, phase))
+            self.statuses[(operation, status)] = self.statuses.get((operation, status), 0) + 1
+            self.request_bytes[operation] = self.request_bytes.get(operation, 0) + timing.request_bytes
+            self.response_bytes[operation] = self.response_bytes.get(operation, 0) + timing.response_bytes
+
+    def status_counts(self, operation: str) -> Dict[str, int]:
+        """
+        Returns the number of requests for `operation` by status code (or exception name)
+        """
+        return {status: count for (op, status), count in self.statuses.items() if op == operation}
+
+    def operations(self) -> List[str]:
+        return sorted({operation for operation, _ in self.histograms})
+
+    def summary(self) -> Dict[str, Dict[str, PhaseSummary]]:
+        """
+        Returns the summary of each phase by operation, in seconds
+        """
+        with self._lock:
+            return {
+                operation: {
+                    phase: summarize(self.histograms[(operation, phase)])
+                    for phase in self.PHASES
+                    if (operation, phase) in self.histograms
+                }
+                for operation in self.operations()
+            }
+
+    def report(self) -> str:
+        """
+        Returns the summary as a table, in milliseconds
+        """
+        lines = [
+            f"{'operation':<32} {'phase':<10} {'requests':>8} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}"
+        ]
+        for operation, phases in self.summary().items():
+            for phase, s in phases.items():
+                values = " ".join(f"{value * 1000:9.2f}" for value in (s.mean, s.p50, s.p90, s.p99, s.max))
+                lines.append(f"{operation:<32} {phase:<10} {s.requests:>8} {values}")
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.statuses.clear()
+            self.request_bytes.clear()
+            self.response_bytes.clear()
+
+
+def summarize(histogram: Histogram) -> PhaseSummary:
+    return PhaseSummary(
+        requests=histogram.count,
+        mean=histogram.mean,
+        p50=histogram.quantile(0.5),
+        p90=histogram.quantile(0.9),
+        p99=histogram.quantile(0.99),
+        max=histogram.max,
+    )
+
+
+class OpenTelemetryListener:
+    """
+    Records each request as OpenTelemetry metrics:
+
+    * `http.client.duration`: the total duration, in seconds
+    * `http.client.phase.duration`: the duration of each phase, with a `phase` attribute
+    * `http.client.request.size` and `http.client.response.size`, in bytes
+
+    The attributes are the operation id, method, url template (`http.route`, so that they don't vary with the path
+    parameters) and status code. `meter` defaults to the global meter provider's meter for this module.
+    """
+
+    def __init__(self, meter: Any = None) -> None:
+        if otel_metrics is None:
+            raise ImportError("opentelemetry-api must be installed to use OpenTelemetryListener")
+        self.meter = meter if meter is not None else otel_metrics.get_meter(__name__)
+        self.duration = self.meter.create_histogram("http.client.duration", unit="s")
+        self.phase_duration = self.meter.create_histogram("http.client.phase.duration", unit="s")
+        self.request_size = self.meter.create_histogram("http.client.request.size", unit="By")
+        self.response_size = self.meter.create_histogram("http.client.response.size", unit="By")
+
+    def __call__(self, timing: RequestTiming) -> None:
+        attributes: Dict[str, Any] = {
+            "operation_id": timing.operation_id or "",
+            "http.method": timing.method,
+            "http.route": timing.url_template,
+            "http.status_code": timing.status_code or 0,
+        }
+        if timing.error is not None:
+            attributes["error.type"] = timing.error
+        self.duration.record(timing.total, attributes)
+        for phase, duration in timing.phases().items():
+            self.phase_duration.record(duration, {**attributes, "phase": phase})
+        self.request_size.record(timing.request_bytes, attributes)
+        self.response_size.record(timing.response_bytes, attributes)
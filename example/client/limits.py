@@ -0,0 +1,453 @@
+"""
+Middlewares that protect a degraded server (and the client's own callers) from an ever-growing backlog of requests.
+
+* `AdaptiveLimiter` limits the number of requests in flight, adjusting the limit from their latency and errors
+* `RateLimiter` spaces out requests to stay within a host's (or an operation's) rate limit
+* `CircuitBreaker` fails requests to a host immediately while that host keeps failing
+
+Add them in that order, so that requests to a failing host don't wait for a slot, and requests waiting for the rate
+limit don't hold one: e.g., `client.add_middleware(AdaptiveLimiter())`, then `client.add_middleware(RateLimiter(...))`.
+A `RetryMiddleware` added after them makes each attempt go through them, and doesn't retry `CircuitOpenError`s.
+"""
+import time
+from asyncio import Future, TimeoutError, get_event_loop, wait_for
+from collections import deque
+from enum import Enum
+from threading import Condition, Lock
+from typing import Callable, Deque, Dict, NamedTuple, Optional
+
+from httpx import Request, Response
+
+from example.client.api_client import Send, blocking_send
+from example.client.exceptions import CircuitOpenError, ConcurrencyLimitExceeded, ResponseHandlingException
+from example.client.retry import parse_retry_after, sleep
+
+HTTP_429_TOO_MANY_REQUESTS = 429
+HTTP_503_SERVICE_UNAVAILABLE = 503
+OVERLOAD_STATUS_CODES = {429, 502, 503, 504}
+
+
+class LimiterStats(NamedTuple):
+    limit: int
+    in_flight: int
+    waiting: int
+    min_latency: Optional[float]
+    increases: int
+    decreases: int
+    rejected: int
+
+
+class AdaptiveLimiter:
+    """
+    Limits the requests in flight with AIMD (additive increase, multiplicative decrease), as TCP congestion control
+    does, starting from `initial_limit`:
+
+    * A request that fails with a transport error or an overload status (429, 502, 503, 504), or that takes more
+      than `latency_tolerance` times the lowest latency recently observed (or more than `max_latency` seconds),
+      multiplies the limit by `backoff_ratio`
+    * Any other request that completes while at least half of the limit is in use raises the limit by one
+
+    Requests beyond the limit wait for a slot, for at most `queue_timeout` seconds (if given) before raising
+    `ConcurrencyLimitExceeded`. The lowest latency is forgotten every `min_latency_window` seconds, so that the
+    limiter adapts when the server gets permanently slower. `on_limit_change(old, new)` is called on each change of
+    the limit; `stats()` returns the current state.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        backoff_ratio: float = 0.9,
+        latency_tolerance: float = 2.0,
+        max_latency: float = None,
+        min_latency_window: float = 30.0,
+        queue_timeout: float = None,
+        on_limit_change: Callable[[int, int], None] = None,
+    ) -> None:
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.max_latency = max_latency
+        self.min_latency_window = min_latency_window
+        self.queue_timeout = queue_timeout
+        self.on_limit_change = on_limit_change
+        self.in_flight = 0
+        self.min_latency: Optional[float] = None
+        self._min_latency_at = time.monotonic()
+        self._waiters: Deque["Future[None]"] = deque()
+        self._condition = Condition()  # used when the request is being sent without an event loop
+        self._increases = self._decreases = self._rejected = 0
+
+    async def __call__(self, request: Request, call_next: Send) -> Response:
+        await self.acquire()
+        start = time.monotonic()
+        overloaded: Optional[bool] = None  # unknown if e.g. cancelled, which says nothing about the server
+        try:
+            response = await call_next(request)
+            overloaded = response.status_code in OVERLOAD_STATUS_CODES
+            return response
+        except ResponseHandlingException:
+            overloaded = True
+            raise
+        finally:
+            self.release(time.monotonic() - start, overloaded)
+
+    async def acquire(self) -> None:
+        if blocking_send.get():
+            with self._condition:
+                if not self._condition.wait_for(lambda: self.in_flight < self.limit, timeout=self.queue_timeout):
+                    self._rejected += 1
+                    raise ConcurrencyLimitExceeded(self.limit, self.queue_timeout or 0.0)
+                self.in_flight += 1
+            return
+
+        start = time.monotonic()
+        while self.in_flight >= self.limit:
+            waiter: "Future[None]" = get_event_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                if self.queue_timeout is None:
+                    await waiter
+                else:
+                    await wait_for(waiter, max(0.0, start + self.queue_timeout - time.monotonic()))
+            except BaseException as e:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    self.wake_waiters()  # pass on the slot this waiter was woken for
+                if isinstance(e, TimeoutError):
+                    self._rejected += 1
+                    raise ConcurrencyLimitExceeded(self.limit, self.queue_timeout or 0.0)
+                raise
+        self.in_flight += 1
+
+    def release(self, latency: float, overloaded: Optional[bool]) -> None:
+        with self._condition:
+            if overloaded is not None:
+                self.update_limit(latency, overloaded)
+            self.in_flight -= 1
+            self._condition.notify(max(0, self.limit - self.in_flight))
+        self.wake_waiters()
+
+    def wake_waiters(self) -> None:
+        free = self.limit - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def update_limit(self, latency: float, overloaded: bool) -> None:
+        now = time.monotonic()
+        if (
+            self.min_latency is None
+            or latency < self.min_latency
+            or now - self._min_latency_at > self.min_latency_window
+        ):
+            self.min_latency = latency
+            self._min_latency_at = now
+
+        slow = latency > self.min_latency * self.latency_tolerance or (
+            self.max_latency is not None and latency > self.max_latency
+        )
+        old_limit = self.limit
+        if overloaded or slow:
+            self.limit = max(self.min_limit, int(self.limit * self.backoff_ratio))
+            if self.limit < old_limit:
+                self._decreases += 1
+        elif self.in_flight * 2 >= self.limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+            if self.limit > old_limit:
+                self._increases += 1
+        if self.limit != old_limit and self.on_limit_change is not None:
+            self.on_limit_change(old_limit, self.limit)
+
+    def stats(self) -> LimiterStats:
+        return LimiterStats(
+            limit=self.limit,
+            in_flight=self.in_flight,
+            waiting=len(self._waiters),
+            min_latency=self.min_latency,
+            increases=self._increases,
+            decreases=self._decreases,
+            rejected=self._rejected,
+        )
+
+    def __repr__(self) -> str:
+        return f"AdaptiveLimiter({self.stats()})"
+
+
+class Rate(NamedTuple):
+    per_second: float
+    burst: int = 1
+
+
+class TokenBucket:
+    """
+    Holds up to `burst` tokens, refilled at `per_second`. Each request reserves a token, which may leave the bucket
+    in debt; the request then waits until the debt is repaid, so waiting requests are served in order.
+    """
+
+    __slots__ = ("per_second", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: Rate) -> None:
+        self.per_second = rate.per_second
+        self.burst = rate.burst
+        self.tokens = float(rate.burst)
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.per_second)
+        self.updated_at = now
+
+    def reserve(self, now: float) -> float:
+        """
+        Takes a token, and returns how long to wait before using it
+        """
+        self.refill(now)
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.per_second)
+
+    def pause(self, seconds: float, now: float) -> None:
+        """
+        Makes the next request wait for at least `seconds`
+        """
+        self.refill(now)
+        self.tokens = min(self.tokens, 1 - seconds * self.per_second)
+
+
+class RateLimiterStats(NamedTuple):
+    requests: int
+    delayed: int
+    total_delay: float
+    limited: int  # responses with status 429
+
+
+class RateLimiter:
+    """
+    Makes requests wait for capacity in a token bucket per host (with `host`) and per operation id (with
+    `operations`), e.g. `RateLimiter(host=Rate(10, burst=20), operations={"find_pets_by_status": Rate(1)})`.
+
+    With `adapt=True`, the host's bucket follows the server's quota headers: `X-RateLimit-Remaining` and
+    `X-RateLimit-Reset` (or `RateLimit-*`) spread the remaining quota evenly over the rest of the window, and a
+    `Retry-After` on a 429 or 503 response holds requests back for that long. Hosts without a configured `host` rate
+    are only limited once they send these headers.
+    """
+
+    def __init__(self, host: Rate = None, operations: Dict[str, Rate] = None, adapt: bool = True) -> None:
+        self.host_rate = host
+        self.operation_rates = operations if operations is not None else {}
+        self.adapt = adapt
+        self.host_buckets: Dict[str, TokenBucket] = {}
+        self.operation_buckets = {
+            operation_id: TokenBucket(rate) for operation_id, rate in self.operation_rates.items()
+        }
+        self._lock = Lock()
+        self._requests = self._delayed = self._limited = 0
+        self._total_delay = 0.0
+
+    async def __call__(self, request: Request, call_next: Send) -> Response:
+        host = f"{request.url.scheme}://{request.url.authority}"
+        delay = self.reserve(host, getattr(request, "operation_id", None))
+        if delay > 0:
+            await sleep(delay)
+        response = await call_next(request)
+        if response.status_code == HTTP_429_TOO_MANY_REQUESTS:
+            self._limited += 1
+        if self.adapt:
+            self.update_from_headers(host, response)
+        return response
+
+    def reserve(self, host: str, operation_id: Optional[str]) -> float:
+        now = time.monotonic()
+        with self._lock:
+            self._requests += 1
+            delay = 0.0
+            host_bucket = self.host_buckets.get(host)
+            if host_bucket is None and self.host_rate is not None:
+                host_bucket = self.host_buckets[host] = TokenBucket(self.host_rate)
+            if host_bucket is not None:
+                delay = host_bucket.reserve(now)
+            operation_bucket = self.operation_buckets.get(operation_id) if operation_id is not None else None
+            if operation_bucket is not None:
+                delay = max(delay, operation_bucket.reserve(now))
+            if delay > 0:
+                self._delayed += 1
+                self._total_delay += delay
+        return delay
+
+    def update_from_headers(self, host: str, response: Response) -> None:
+        retry_after = None
+        if response.status_code in {HTTP_429_TOO_MANY_REQUESTS, HTTP_503_SERVICE_UNAVAILABLE}:
+            retry_after = parse_retry_after(response)
+        remaining = header_number(response, "ratelimit-remaining")
+        reset = header_number(response, "ratelimit-reset")
+        if reset is not None and reset > 1e9:
+            reset -= time.time()  # a timestamp rather than a number of seconds
+        if retry_after is None and (remaining is None or reset is None):
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self.host_buckets.get(host)
+            if bucket is None:
+                bucket = self.host_buckets[host] = TokenBucket(self.host_rate or Rate(1.0))
+            if remaining is not None and reset is not None and reset > 0:
+                if remaining >= 1:
+                    bucket.refill(now)
+                    bucket.per_second = remaining / reset
+                    bucket.tokens = min(bucket.tokens, remaining)
+                else:
+                    bucket.pause(reset, now)
+            if retry_after is not None:
+                bucket.pause(retry_after, now)
+
+    def stats(self) -> RateLimiterStats:
+        return RateLimiterStats(
+            requests=self._requests, delayed=self._delayed, total_delay=self._total_delay, limited=self._limited
+        )
+
+    def __repr__(self) -> str:
+        return f"RateLimiter({self.stats()})"
+
+
+def header_number(response: Response, name: str) -> Optional[float]:
+    """
+    Returns the value of the `X-` or unprefixed header `name` as a number, if present
+    """
+    value = response.headers.get(f"x-{name}", response.headers.get(name))
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class CircuitState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class Circuit:
+    __slots__ = ("state", "failures", "successes", "probes", "opened_at", "generation")
+
+    def __init__(self) -> None:
+        self.state = CircuitState.closed
+        self.failures = 0  # consecutive, while closed
+        self.successes = 0  # consecutive, while half open
+        self.probes = 0  # in flight, while half open
+        self.opened_at = 0.0
+        # Incremented on each transition, so that probes from an earlier half open state are ignored
+        self.generation = 0
+
+
+class CircuitBreaker:
+    """
+    Tracks each host's consecutive failures (transport errors and 5xx responses):
+
+    * closed: requests are sent; `failure_threshold` consecutive failures open the circuit
+    * open: requests fail immediately with `CircuitOpenError`, for `recovery_timeout` seconds
+    * half open: up to `half_open_probes` requests at a time are sent as probes, and the others fail immediately;
+      `success_threshold` consecutive successful probes close the circuit, and a failed probe opens it again
+
+    `on_state_change(host, old, new)` is called on each transition; `state(host)` returns a host's current state.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_probes: int = 1,
+        success_threshold: int = 1,
+        on_state_change: Callable[[str, CircuitState, CircuitState], None] = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.success_threshold = success_threshold
+        self.on_state_change = on_state_change
+        self.circuits: Dict[str, Circuit] = {}
+        self._lock = Lock()
+
+    async def __call__(self, request: Request, call_next: Send) -> Response:
+        host = f"{request.url.scheme}://{request.url.authority}"
+        probe = self.before_request(host)
+        failed: Optional[bool] = None
+        try:
+            response = await call_next(request)
+            failed = response.status_code >= 500
+            return response
+        except ResponseHandlingException:
+            failed = True
+            raise
+        finally:
+            self.after_request(host, failed, probe)
+
+    def state(self, host: str) -> CircuitState:
+        circuit = self.circuits.get(host)
+        return circuit.state if circuit is not None else CircuitState.closed
+
+    def before_request(self, host: str) -> Optional[int]:
+        """
+        Raises `CircuitOpenError` if the request must not be sent; returns the circuit's generation if the request is
+        a probe (i.e., it is sent while the circuit is half open), and otherwise None
+        """
+        with self._lock:
+            circuit = self.circuits.setdefault(host, Circuit())
+            if circuit.state == CircuitState.open:
+                retry_in = circuit.opened_at + self.recovery_timeout - time.monotonic()
+                if retry_in > 0:
+                    raise CircuitOpenError(host, retry_in)
+                self.transition(host, circuit, CircuitState.half_open)
+            if circuit.state == CircuitState.half_open:
+                if circuit.probes >= self.half_open_probes:
+                    raise CircuitOpenError(host, 0.0)
+                circuit.probes += 1
+                return circuit.generation
+            return None
+
+    def after_request(self, host: str, failed: Optional[bool], probe: Optional[int] = None) -> None:
+        """
+        `failed` is None if the request was interrupted (e.g., cancelled) without an outcome, and `probe` is the value
+        returned by `before_request`.
+
+        Only the probes of the current half open state count towards closing or reopening it; requests sent before
+        the circuit opened don't.
+        """
+        with self._lock:
+            circuit = self.circuits[host]
+            if circuit.state == CircuitState.half_open:
+                if probe != circuit.generation:
+                    return
+                circuit.probes -= 1
+                if failed is None:
+                    return
+                if failed:
+                    self.transition(host, circuit, CircuitState.open)
+                else:
+                    circuit.successes += 1
+                    if circuit.successes >= self.success_threshold:
+                        self.transition(host, circuit, CircuitState.closed)
+            elif circuit.state == CircuitState.closed and probe is None and failed is not None:
+                circuit.failures = circuit.failures + 1 if failed else 0
+                if circuit.failures >= self.failure_threshold:
+                    self.transition(host, circuit, CircuitState.open)
+
+    def transition(self, host: str, circuit: Circuit, state: CircuitState) -> None:
+        old_state = circuit.state
+        circuit.state = state
+        circuit.failures = circuit.successes = circuit.probes = 0
+        circuit.generation += 1
+        if state == CircuitState.open:
+            circuit.opened_at = time.monotonic()
+        if self.on_state_change is not None:
+            self.on_state_change(host, old_state, state)
+
+    def __repr__(self) -> str:
+        states = ", ".join(f"{host}: {circuit.state.value}" for host, circuit in self.circuits.items())
+        return f"CircuitBreaker({states})"
@@ -1,21 +1,36 @@
 from datetime import datetime
 from typing import Any  # noqa
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 from typing_extensions import Literal
 
+from example.client.encoding import encode
+
 
 class ApiResponse(BaseModel):
     code: "Optional[int]" = Field(None, alias="code")
     type: "Optional[str]" = Field(None, alias="type")
     message: "Optional[str]" = Field(None, alias="message")
 
+    def to_jsonable(self) -> Dict[str, Any]:
+        return {
+            "code": self.code,
+            "type": self.type,
+            "message": self.message,
+        }
+
 
 class Category(BaseModel):
     id: "Optional[int]" = Field(None, alias="id")
     name: "Optional[str]" = Field(None, alias="name")
 
+    def to_jsonable(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+        }
+
 
 class Order(BaseModel):
     id: "Optional[int]" = Field(None, alias="id")
@@ -25,6 +40,16 @@ class Order(BaseModel):
     status: "Literal['placed', 'approved', 'delivered']" = Field(None, alias="status")
     complete: "Optional[bool]" = Field(None, alias="complete")
 
+    def to_jsonable(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "petId": self.pet_id,
+            "quantity": self.quantity,
+            "shipDate": None if self.ship_date is None else self.ship_date.isoformat(),
+            "status": self.status,
+            "complete": self.complete,
+        }
+
 
 class Pet(BaseModel):
     id: "Optional[int]" = Field(None, alias="id")
@@ -34,11 +59,27 @@ class Pet(BaseModel):
     tags: "Optional[List[Tag]]" = Field(None, alias="tags")
     status: "Literal['available', 'pending', 'sold']" = Field(None, alias="status")
 
+    def to_jsonable(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "category": encode(self.category),
+            "name": self.name,
+            "photoUrls": encode(self.photo_urls),
+            "tags": encode(self.tags),
+            "status": self.status,
+        }
+
 
 class Tag(BaseModel):
     id: "Optional[int]" = Field(None, alias="id")
     name: "Optional[str]" = Field(None, alias="name")
 
+    def to_jsonable(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+        }
+
 
 class User(BaseModel):
     id: "Optional[int]" = Field(None, alias="id")
@@ -49,3 +90,18 @@ class User(BaseModel):
     password: "Optional[str]" = Field(None, alias="password")
     phone: "Optional[str]" = Field(None, alias="phone")
     user_status: "Optional[int]" = Field(None, alias="userStatus")
+
+    def to_jsonable(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "username": self.username,
+            "firstName": self.first_name,
+            "lastName": self.last_name,
+            "email": self.email,
+            "password": self.password,
+            "phone": self.phone,
+            "userStatus": self.user_status,
+        }
+
+
+Pet.update_forward_refs()
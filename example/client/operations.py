@@ -0,0 +1,94 @@
+"""
+Static descriptions of the operations of the generated apis.
+
+Each api module has an `OPERATIONS` table of `Operation`s, built once when it is imported, so that a call only has to
+fill in its parameters: the path template is split into its literal parts and parameter names ahead of time, and the
+response type, parameter locations and idempotency are known without inspecting the call's arguments.
+"""
+from string import Formatter
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote
+
+# The characters allowed in a path segment (RFC 3986 "pchar"), other than unreserved ones; "/", "?", "#" and "%" in
+# path parameters are percent-encoded so that they can't change the structure of the url
+PATH_SAFE = "!$&'()*+,;=:@"
+
+
+class Operation:
+    """
+    `path` is the operation's url template (e.g., "/pet/{petId}"), and `path_params`, `query_params`, `header_params`,
+    `cookie_params` and `form_params` are the names of its parameters in each location.
+
+    `idempotent` is the value of the operation's `x-idempotent` extension in the spec (`true` or `false`), and otherwise
+    None, so that it depends on the method.
+    """
+
+    __slots__ = (
+        "operation_id",
+        "method",
+        "path",
+        "response_type",
+        "path_params",
+        "query_params",
+        "header_params",
+        "cookie_params",
+        "form_params",
+        "body",
+        "idempotent",
+        "segments",
+    )
+
+    def __init__(
+        self,
+        operation_id: str,
+        method: str,
+        path: str,
+        response_type: Any,
+        *,
+        path_params: Tuple[str, ...] = (),
+        query_params: Tuple[str, ...] = (),
+        header_params: Tuple[str, ...] = (),
+        cookie_params: Tuple[str, ...] = (),
+        form_params: Tuple[str, ...] = (),
+        body: bool = False,
+        idempotent: bool = None,
+    ) -> None:
+        self.operation_id = operation_id
+        self.method = method.upper()
+        self.path = path
+        self.response_type = response_type
+        self.path_params = path_params
+        self.query_params = query_params
+        self.header_params = header_params
+        self.cookie_params = cookie_params
+        self.form_params = form_params
+        self.body = body
+        self.idempotent = idempotent
+        self.segments = compile_path(path)
+
+    def build_path(self, path_params: Optional[Dict[str, str]]) -> str:
+        """
+        Returns the path with the (percent-encoded) values of `path_params` substituted
+        """
+        if not self.segments:
+            return self.path
+        assert path_params is not None
+        parts = []
+        for literal, name in self.segments:
+            parts.append(literal)
+            if name is not None:
+                parts.append(quote(path_params[name], safe=PATH_SAFE))
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return f"Operation({self.operation_id!r}, {self.method!r}, {self.path!r})"
+
+
+def compile_path(path: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """
+    Splits `path` into (literal, parameter name) pairs; returns an empty tuple if it has no parameters
+    """
+    segments = tuple((literal, name) for literal, name, _, _ in Formatter().parse(path))
+    if all(name is None for _, name in segments):
+        return ()
+    return segments
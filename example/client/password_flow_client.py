@@ -4,21 +4,34 @@ Attempting to follow the "password" flow as described in RFC 6749: https://tools
 from asyncio import get_event_loop
 from contextlib import suppress
 from enum import Enum
-from typing import Any, Dict, List, Optional, Type, TypeVar, Union
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, List, Optional, Type, TypeVar, Union
 
-from fastapi.openapi.models import OAuthFlowPassword
-from httpx import AsyncClient, Response
+from httpx import AsyncClient, Request, Response
 from pydantic import BaseModel, ValidationError
 from typing_extensions import Literal
 
 from example.client.exceptions import UnexpectedResponse
 
+if TYPE_CHECKING:
+    from example.client.api_client import ApiClient
+
 TokenRequestT = TypeVar("TokenRequestT", bound="BaseTokenRequest")
 HTTP_200_OK = 200
 HTTP_400_BAD_REQUEST = 400
 HTTP_401_UNAUTHORIZED = 401
 
 
+class OAuthFlowPassword(BaseModel):
+    """
+    The "password" flow of an OpenAPI OAuth2 security scheme, with the same fields as FastAPI's
+    `fastapi.openapi.models.OAuthFlowPassword` (so that the client doesn't depend on FastAPI)
+    """
+
+    refreshUrl: Optional[str] = None
+    scopes: Dict[str, str] = {}
+    tokenUrl: str
+
+
 class BaseTokenRequest(BaseModel):
     scope: Optional[str]
 
@@ -87,21 +100,42 @@ def parse_token_response(response: Response) -> TokenResponse:
 
 
 class PasswordFlowClient:
-    def __init__(self, flow: OAuthFlowPassword) -> None:
+    """
+    If `api_client` is provided, token requests are sent through its connection pool (bypassing its middleware);
+    otherwise the flow client uses a connection pool of its own, which is closed by `aclose`.
+    """
+
+    def __init__(self, flow: OAuthFlowPassword, api_client: "ApiClient" = None) -> None:
         self.flow = flow
-        self._async_client = AsyncClient()
+        self.api_client = api_client
+        self._async_client = AsyncClient() if api_client is None else None
+
+    async def send(self, request: Request) -> Response:
+        if self.api_client is not None:
+            return await self.api_client.send_inner_untimed(request)
+        assert self._async_client is not None
+        return await self._async_client.send(request)
 
     async def request_access_token(self, access_token_request: AccessTokenRequest) -> TokenResponse:
-        response = await self._async_client.post(self.flow.tokenUrl, data=access_token_request.request_dict())
-        return parse_token_response(response)
+        request = Request("POST", self.flow.tokenUrl, data=access_token_request.request_dict())
+        return parse_token_response(await self.send(request))
 
     async def request_refresh_token(self, refresh_token_request: RefreshTokenRequest) -> TokenResponse:
         refresh_url = self.flow.refreshUrl or self.flow.tokenUrl
-        response = await self._async_client.post(refresh_url, data=refresh_token_request.request_dict())
-        return parse_token_response(response)
+        request = Request("POST", refresh_url, data=refresh_token_request.request_dict())
+        return parse_token_response(await self.send(request))
 
     def request_access_token_sync(self, access_token_request: AccessTokenRequest) -> TokenResponse:
-        return get_event_loop().run_until_complete(self.request_access_token(access_token_request))
+        return self.run_sync(self.request_access_token(access_token_request))
 
     def request_refresh_token_sync(self, refresh_token_request: RefreshTokenRequest) -> TokenResponse:
-        return get_event_loop().run_until_complete(self.request_refresh_token(refresh_token_request))
+        return self.run_sync(self.request_refresh_token(refresh_token_request))
+
+    def run_sync(self, awaitable: Awaitable[TokenResponse]) -> TokenResponse:
+        if self.api_client is not None:
+            return self.api_client.run_sync(awaitable)
+        return get_event_loop().run_until_complete(awaitable)
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
@@ -0,0 +1,182 @@
+"""
+A middleware that retries requests that failed for reasons that are likely to be temporary.
+
+Add it with `client.add_middleware(RetryMiddleware(...))`, after any middleware whose work should be repeated for
+each attempt.
+"""
+import asyncio
+import errno
+import random
+import socket
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from httpx import Request, Response
+from httpx.exceptions import ConnectTimeout, HTTPError, NetworkError, PoolTimeout
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, NewConnectionError
+
+from example.client.api_client import IDEMPOTENT_METHODS, Send, blocking_send
+from example.client.exceptions import ResponseHandlingException
+
+HTTP_429_TOO_MANY_REQUESTS = 429
+RETRY_STATUS_CODES = {502, 503, 504}
+# Errors opening a connection (other than ConnectionRefusedError and socket.gaierror); read and write errors are
+# raised as NetworkError from OSError too, so other OSErrors can't be assumed to have occurred before sending
+CONNECT_ERRNOS = {errno.ENETUNREACH, errno.EHOSTUNREACH, errno.EADDRNOTAVAIL}
+
+
+class RetryBudget:
+    """
+    Limits retries to `ratio` of the requests made, plus `min_per_second` so that a client making few requests can
+    still retry. Retries beyond the budget are not made, so that an outage doesn't multiply the load on the server.
+
+    Retry tokens accumulate up to `max_tokens`; one budget can be shared by several clients.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, max_tokens: float = 10.0) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.updated_at = time.monotonic()
+        self.retries = 0
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        """
+        Called for each request (but not for each retry)
+        """
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Returns whether a retry may be made
+        """
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self.updated_at) * self.min_per_second)
+        self.updated_at = now
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+    def __repr__(self) -> str:
+        return f"RetryBudget(tokens={self.tokens:.1f}, retries={self.retries}, exhausted={self.exhausted})"
+
+
+def parse_retry_after(response: Response) -> Optional[float]:
+    """
+    Returns the number of seconds to wait from a `Retry-After` header, given in seconds or as an HTTP date
+    """
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_connect_error(error: Exception) -> bool:
+    """
+    Returns whether `error` occurred before the request was sent, so that retrying it can't repeat its effects
+    """
+    if isinstance(error, (ConnectTimeout, PoolTimeout)):
+        return True
+    if not isinstance(error, NetworkError):
+        return False
+    cause = error.__cause__
+    if isinstance(cause, MaxRetryError):
+        # From the blocking client (urllib3)
+        return isinstance(cause.reason, (NewConnectionError, ConnectTimeoutError))
+    if isinstance(cause, (ConnectionRefusedError, socket.gaierror)):  # including DNS failures
+        return True
+    return isinstance(cause, OSError) and cause.errno in CONNECT_ERRNOS
+
+
+class RetryMiddleware:
+    """
+    Retries requests that fail with a connection error, with 429 Too Many Requests, or (if the request is idempotent)
+    with 502, 503 or 504 or another transport error.
+
+    Requests are idempotent if their method is GET, HEAD, PUT, DELETE or OPTIONS, unless their operation has an
+    `x-idempotent` extension in the OpenAPI spec, which decides it; `idempotent` overrides both per operation id.
+
+    Attempts are spaced with "decorrelated jitter" exponential backoff between `base_delay` and `max_delay` seconds,
+    or by the response's `Retry-After` header; a response asking for a longer wait than `max_retry_after` is returned.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 10.0,
+        max_retry_after: float = 60.0,
+        budget: RetryBudget = None,
+        idempotent: Dict[str, bool] = None,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget = budget if budget is not None else RetryBudget()
+        self.idempotent = idempotent if idempotent is not None else {}
+
+    def is_idempotent(self, request: Request) -> bool:
+        operation_id: Optional[str] = getattr(request, "operation_id", None)
+        if operation_id is not None and operation_id in self.idempotent:
+            return self.idempotent[operation_id]
+        idempotent: bool = getattr(request, "idempotent", request.method in IDEMPOTENT_METHODS)
+        return idempotent
+
+    def next_delay(self, delay: float) -> float:
+        return min(self.max_delay, random.uniform(self.base_delay, delay * 3))
+
+    async def __call__(self, request: Request, call_next: Send) -> Response:
+        self.budget.deposit()
+        idempotent = self.is_idempotent(request)
+        delay = self.base_delay
+        attempt = 1
+        while True:
+            can_retry = attempt < self.max_attempts and request.stream.can_replay()
+            try:
+                response = await call_next(request)
+            except ResponseHandlingException as e:
+                error = e.source
+                retryable = is_connect_error(error) or (idempotent and isinstance(error, HTTPError))
+                if not (can_retry and retryable and self.budget.withdraw()):
+                    raise
+                retry_after = None
+            else:
+                retryable = response.status_code == HTTP_429_TOO_MANY_REQUESTS or (
+                    idempotent and response.status_code in RETRY_STATUS_CODES
+                )
+                if not retryable:
+                    return response
+                retry_after = parse_retry_after(response)
+                if not can_retry or (retry_after or 0) > self.max_retry_after or not self.budget.withdraw():
+                    return response
+                await close_response(response)
+
+            delay = self.next_delay(delay)
+            await sleep(retry_after if retry_after is not None else delay)
+            attempt += 1
+
+
+async def close_response(response: Response) -> None:
+    if blocking_send.get():
+        response.close()
+    else:
+        await response.aclose()
+
+
+async def sleep(seconds: float) -> None:
+    if blocking_send.get():
+        time.sleep(seconds)  # the request is being sent without an event loop
+    else:
+        await asyncio.sleep(seconds)
@@ -0,0 +1,120 @@
+"""
+Request content streams that can be sent more than once, e.g. when a request is retried after a 401.
+
+httpx can only replay request content it holds in memory; content from a file or an iterator is consumed by the
+first attempt. These streams replay it without building the request again, and without holding it all in memory.
+They implement httpx 0.11's `ContentStream` interface (which is why the generated requirements pin httpx to 0.11.x).
+"""
+import os
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any, AsyncIterator, Dict, Iterator, Optional, Union
+
+from httpx.content_streams import ContentStream
+
+CHUNK_SIZE = 64 * 1024
+
+
+class FileStream(ContentStream):
+    """
+    Content read in chunks from a seekable file, starting from its position when the stream was created
+    """
+
+    def __init__(self, file: IO[bytes], chunk_size: int = CHUNK_SIZE) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.start = file.tell()
+
+    def can_replay(self) -> bool:
+        return True
+
+    def get_headers(self) -> Dict[str, str]:
+        position = self.file.tell()
+        try:
+            size = self.file.seek(0, os.SEEK_END) - self.start
+        finally:
+            self.file.seek(position)
+        return {"Content-Length": str(size)}
+
+    def __iter__(self) -> Iterator[bytes]:
+        self.file.seek(self.start)
+        while True:
+            chunk = self.file.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self:
+            yield chunk
+
+
+class BufferedStream(ContentStream):
+    """
+    Content from a one-shot iterator of bytes, buffered as it is sent so that it can be sent again.
+
+    The buffer is kept in memory up to `max_memory` bytes, and in a temporary file beyond that. If an attempt
+    stops before the iterator is exhausted, the next one sends the buffered content and then carries on with
+    the iterator.
+    """
+
+    def __init__(self, iterator: Union[Iterator[bytes], AsyncIterator[bytes]], max_memory: int = 1024 * 1024) -> None:
+        self.iterator = iterator
+        self.buffer = SpooledTemporaryFile(max_size=max_memory)
+        self.is_exhausted = False
+
+    def can_replay(self) -> bool:
+        return True
+
+    def get_headers(self) -> Dict[str, str]:
+        return {"Transfer-Encoding": "chunked"}
+
+    def replay_buffer(self) -> Iterator[bytes]:
+        self.buffer.seek(0)
+        while True:
+            chunk = self.buffer.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def __iter__(self) -> Iterator[bytes]:
+        if isinstance(self.iterator, AsyncIterator):
+            raise RuntimeError("Attempted to call a sync iterator on an async stream.")
+        yield from self.replay_buffer()
+        if not self.is_exhausted:
+            for chunk in self.iterator:
+                self.buffer.write(chunk)
+                yield chunk
+            self.is_exhausted = True
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self.replay_buffer():
+            yield chunk
+        if self.is_exhausted:
+            return
+        if isinstance(self.iterator, AsyncIterator):
+            async for chunk in self.iterator:
+                self.buffer.write(chunk)
+                yield chunk
+        else:
+            for chunk in self.iterator:
+                self.buffer.write(chunk)
+                yield chunk
+        self.is_exhausted = True
+
+    def close(self) -> None:
+        self.buffer.close()
+
+    async def aclose(self) -> None:
+        self.buffer.close()
+
+
+def replayable_stream(data: Any) -> Optional[ContentStream]:
+    """
+    Returns a replayable stream for `data` if it is a file or an iterator (including generators), which httpx would
+    only send once; other iterables, such as lists or tuples of form fields, are left to httpx to encode
+    """
+    if hasattr(data, "read") and hasattr(data, "seek"):
+        return FileStream(data)
+    if isinstance(data, (Iterator, AsyncIterator)):
+        return BufferedStream(data)
+    return None
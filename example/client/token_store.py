@@ -0,0 +1,232 @@
+"""
+Stores for sharing OAuth tokens between `AuthMiddleware` instances, including ones in other processes.
+
+Each store also provides a lock per key, which `AuthMiddleware` holds while renewing the tokens, so that
+only one process calls the token endpoint and the others pick up its tokens from the store.
+"""
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from hashlib import sha256
+from threading import Lock
+from typing import IO, Any, Dict, Iterator, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel
+from typing_extensions import Protocol
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+
+class StoredTokens(BaseModel):
+    access_token: str
+    refresh_token: Optional[str]
+    expires_at: Optional[datetime]  # should be UTC
+    scope: Optional[str]
+
+    def is_expired(self) -> bool:
+        if self.expires_at is None:
+            return False
+        return self.expires_at < datetime.utcnow() + timedelta(seconds=30)
+
+
+class StoreLock(Protocol):
+    def acquire(self, blocking: bool = True) -> bool:
+        ...
+
+    def release(self) -> None:
+        ...
+
+
+class TokenStore(ABC):
+    """
+    Subclass this to store tokens somewhere else (e.g., in redis, to share them between hosts)
+    """
+
+    @abstractmethod
+    def load(self, key: str) -> Optional[StoredTokens]:
+        ...
+
+    @abstractmethod
+    def save(self, key: str, tokens: StoredTokens) -> None:
+        ...
+
+    @abstractmethod
+    def lock(self, key: str) -> StoreLock:
+        ...
+
+
+class MemoryTokenStore(TokenStore):
+    """
+    Shares tokens between the clients of a single process
+    """
+
+    def __init__(self) -> None:
+        self._tokens: Dict[str, StoredTokens] = {}
+        self._locks: Dict[str, Lock] = {}
+        self._locks_lock = Lock()
+
+    def load(self, key: str) -> Optional[StoredTokens]:
+        return self._tokens.get(key)
+
+    def save(self, key: str, tokens: StoredTokens) -> None:
+        self._tokens[key] = tokens
+
+    def lock(self, key: str) -> StoreLock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, Lock())
+
+
+class FileLock:
+    """
+    An exclusive `flock` on a file; separate instances exclude each other, even within a process
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: Optional[IO[Any]] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        file = open(self.path, "a")
+        try:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            return False
+        self._file = file
+        return True
+
+    def release(self) -> None:
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class FileTokenStore(TokenStore):
+    """
+    Shares tokens between the processes on a host through a JSON file.
+
+    The file is replaced atomically on each save, so it can be read without locking. Requires `fcntl` (i.e.,
+    not Windows).
+    """
+
+    def __init__(self, path: str) -> None:
+        if fcntl is None:
+            raise ImportError("FileTokenStore requires fcntl")
+        self.path = path
+
+    def load(self, key: str) -> Optional[StoredTokens]:
+        tokens = self._read().get(key)
+        return StoredTokens.parse_obj(tokens) if tokens is not None else None
+
+    def save(self, key: str, tokens: StoredTokens) -> None:
+        with self._write_lock():
+            contents = self._read()
+            contents[key] = json.loads(tokens.json())
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as file:
+                json.dump(contents, file)
+            os.replace(temp_path, self.path)
+
+    def lock(self, key: str) -> StoreLock:
+        return FileLock(f"{self.path}.{key_digest(key)}.lock")
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as file:
+                contents: Dict[str, Any] = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return contents
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        lock = FileLock(f"{self.path}.lock")
+        lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()
+
+
+class SqliteLock:
+    """
+    A lease on a row of the `token_leases` table, so that a process that dies while holding it can't block the
+    others for longer than `lease`. Each lock only releases its own lease, so that a holder whose lease expired
+    doesn't release another's.
+    """
+
+    def __init__(self, store: "SqliteTokenStore", key: str) -> None:
+        self.store = store
+        self.key = key
+        self.owner = uuid4().hex
+
+    def acquire(self, blocking: bool = True) -> bool:
+        while not self._try_acquire():
+            if not blocking:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def release(self) -> None:
+        with self.store.transaction() as connection:
+            connection.execute("DELETE FROM token_leases WHERE key = ? AND owner = ?", (self.key, self.owner))
+
+    def _try_acquire(self) -> bool:
+        now = time.time()
+        with self.store.transaction() as connection:
+            connection.execute("DELETE FROM token_leases WHERE key = ? AND expires < ?", (self.key, now))
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO token_leases (key, owner, expires) VALUES (?, ?, ?)",
+                (self.key, self.owner, now + self.store.lease),
+            )
+            return cursor.rowcount == 1
+
+
+class SqliteTokenStore(TokenStore):
+    """
+    Shares tokens between the processes on a host through a sqlite database
+    """
+
+    def __init__(self, path: str, lease: float = 30.0) -> None:
+        self.path = path
+        self.lease = lease
+        with self.transaction() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS tokens (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS token_leases "
+                "(key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=10, isolation_level="IMMEDIATE")
+        try:
+            with connection:  # commits, or rolls back on an exception
+                yield connection
+        finally:
+            connection.close()
+
+    def load(self, key: str) -> Optional[StoredTokens]:
+        with self.transaction() as connection:
+            row = connection.execute("SELECT value FROM tokens WHERE key = ?", (key,)).fetchone()
+        return StoredTokens.parse_raw(row[0]) if row is not None else None
+
+    def save(self, key: str, tokens: StoredTokens) -> None:
+        with self.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO tokens (key, value) VALUES (?, ?)", (key, tokens.json()))
+
+    def lock(self, key: str) -> StoreLock:
+        return SqliteLock(self, key)
+
+
+def key_digest(key: str) -> str:
+    return sha256(key.encode("utf-8")).hexdigest()[:16]
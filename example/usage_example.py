@@ -1,11 +1,10 @@
 from asyncio.events import get_event_loop
 from functools import lru_cache
 
-from fastapi.openapi.models import OAuthFlowPassword
-
 from example.client.api_client import ApiClient, AsyncApis, SyncApis
 from example.client.auth import AuthMiddleware, AuthState
 from example.client.models import User
+from example.client.password_flow_client import OAuthFlowPassword
 
 
 class AutoAuthClient(ApiClient):
@@ -19,7 +18,7 @@ class AutoAuthClient(ApiClient):
         super().__init__(host)
         self.auth_state = AuthState()
         flow = OAuthFlowPassword(tokenUrl=tokenUrl)
-        auth_middleware = AuthMiddleware(auth_state=self.auth_state, flow=flow)
+        auth_middleware = AuthMiddleware(auth_state=self.auth_state, flow=flow, api_client=self)
         self.add_middleware(auth_middleware)
 
     def set_creds(self, username: str, password: str) -> None:
@@ -19,13 +19,14 @@ WORK_DIR=""
 TEMP_DIR=""
 WITH_META=""
 MAP_LOCALHOST=""
+SPLIT_MODELS=""
 
 usage() {
   exitcode="$1"
   cat <<USAGE >&2
 
 Usage:
-  $CMDNAME -i INPUT -p PACKAGE_NAME -o OUTPUT_PATH [-n IMPORT_NAME] [--include-auth] -- [*openapi-generator-cli args]
+  $CMDNAME -i INPUT -p PACKAGE_NAME -o OUTPUT_PATH [-n IMPORT_NAME] [--include-auth] [--split-models] -- [*openapi-generator-cli args]
 
 Options:
   -i, --input              The location of the OpenAPI spec, as URL or file
@@ -35,6 +36,7 @@ Options:
   -t, --temp-dir           The location for temporary files
   -m, --map-localhost      (OSX): Map localhost / 127.0.0.1 to host.docker.internal
   --with-meta              Generate meta-data (setup.py, docs, tests)
+  --split-models           Generate a module per model, imported when the model is first used, instead of models.py
   -h, --help               Show this message
 USAGE
   exit "$exitcode"
@@ -50,12 +52,13 @@ main() {
 
   cd "${PROJECT_ROOT}"
 
+  add_support_files "$WORK_DIR"
   if [ -n "$INCLUDE_AUTH" ]; then
     add_auth_files "$WORK_DIR"
   fi
   fill_import_name_templates "$WORK_DIR"
 
-  ./scripts/util/postprocess.sh -p "${PACKAGE_NAME}" -w "$WORK_DIR"
+  ./scripts/util/postprocess.sh -p "${PACKAGE_NAME}" -w "$WORK_DIR" ${SPLIT_MODELS:+ --split-models}
   clean_openapi_generator_output "$WORK_DIR"
   move_generated_output "$WORK_DIR"
   echo "Generation succeeded 🚀"
@@ -102,10 +105,23 @@ setup_openapi_generation() {
   rm "$WORK_DIR"/.openapi-generator-ignore.bak
 }
 
+add_support_files() {
+  WORK_DIR=$1
+  add_extra_python_template "$WORK_DIR" codec
+  add_extra_python_template "$WORK_DIR" encoding
+  add_extra_python_template "$WORK_DIR" operations
+  add_extra_python_template "$WORK_DIR" streams
+  add_extra_python_template "$WORK_DIR" cache
+  add_extra_python_template "$WORK_DIR" retry
+  add_extra_python_template "$WORK_DIR" limits
+  add_extra_python_template "$WORK_DIR" instrumentation
+}
+
 add_auth_files() {
   WORK_DIR=$1
   add_extra_python_template "$WORK_DIR" auth
   add_extra_python_template "$WORK_DIR" password_flow_client
+  add_extra_python_template "$WORK_DIR" token_store
 }
 
 fill_import_name_templates() {
@@ -120,6 +136,12 @@ fill_import_name_templates() {
   done
   popd
 
+  pushd "${PACKAGE_DIR}/models"
+  find . -name "*.py" | while read -r filename; do
+    fill_import_name_template "$filename"
+  done
+  popd
+
 }
 
 clean_openapi_generator_output() {
@@ -195,6 +217,10 @@ while [ $# -gt 0 ]; do
     WITH_META="yes"
     shift 1
     ;;
+  --split-models)
+    SPLIT_MODELS="yes"
+    shift 1
+    ;;
   --)
     shift 1
     break
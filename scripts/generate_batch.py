@@ -0,0 +1,115 @@
+"""
+Generates many clients concurrently, from a JSON manifest listing them.
+
+The manifest is a list with the `scripts/generate.sh` arguments of each client:
+
+    [
+        {"input": "specs/users.json", "package_name": "users_client", "output_path": "clients"},
+        {
+            "input": "http://localhost:8001/openapi.json",
+            "package_name": "orders_client",
+            "output_path": "clients",
+            "import_name": "clients.orders_client",
+            "include_auth": true,
+            "split_models": true
+        }
+    ]
+
+"input", "package_name" and "output_path" are required; "import_name", "temp_dir", "include_auth", "split_models",
+"with_meta", "map_localhost" and "generator_args" (a list of arguments for openapi-generator) are optional. Relative
+paths are relative to the manifest's folder.
+
+Each client is generated by its own `generate.sh` process, `--jobs` at a time. The output of the clients that fail is
+printed, and the exit code is non-zero if any of them do.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+GENERATE = os.path.join(ROOT, "scripts", "generate.sh")
+
+OPTIONS = {"import_name": "-n", "temp_dir": "-t"}
+FLAGS = {
+    "include_auth": "--include-auth",
+    "split_models": "--split-models",
+    "with_meta": "--with-meta",
+    "map_localhost": "--map-localhost",
+}
+REQUIRED = ("input", "package_name", "output_path")
+
+
+def resolve_path(path: str, base_dir: str) -> str:
+    if "://" in path:
+        return path  # a url
+    return os.path.join(base_dir, path)
+
+
+def generate_args(entry: Dict[str, Any], base_dir: str) -> List[str]:
+    missing = [key for key in REQUIRED if key not in entry]
+    unknown = set(entry) - set(REQUIRED) - set(OPTIONS) - set(FLAGS) - {"generator_args"}
+    if missing or unknown:
+        raise ValueError(f"Invalid manifest entry {entry}: missing {missing}, unknown {sorted(unknown)}")
+    args = [
+        GENERATE,
+        "-i",
+        resolve_path(entry["input"], base_dir),
+        "-p",
+        entry["package_name"],
+        "-o",
+        resolve_path(entry["output_path"], base_dir),
+    ]
+    for key, option in OPTIONS.items():
+        if key in entry:
+            value = resolve_path(entry[key], base_dir) if key == "temp_dir" else entry[key]
+            args += [option, value]
+    args += [flag for key, flag in FLAGS.items() if entry.get(key)]
+    if entry.get("generator_args"):
+        args += ["--", *entry["generator_args"]]
+    return args
+
+
+def generate(args: List[str]) -> Tuple[int, str, float]:
+    start = time.perf_counter()
+    process = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    return process.returncode, process.stdout.decode("utf-8", errors="replace"), time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="The JSON manifest of the clients to generate")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Clients to generate at a time")
+    parser.add_argument("--replace", action="store_true", help="Remove the clients' existing folders first")
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        entries = json.load(f)
+    base_dir = os.path.dirname(os.path.realpath(args.manifest))
+    commands = [generate_args(entry, base_dir) for entry in entries]
+    if args.replace:
+        for entry in entries:
+            package_dir = os.path.join(resolve_path(entry["output_path"], base_dir), entry["package_name"])
+            shutil.rmtree(package_dir, ignore_errors=True)
+
+    start = time.perf_counter()
+    failed = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        for entry, (returncode, output, elapsed) in zip(entries, executor.map(generate, commands)):
+            package_name = entry["package_name"]
+            print(f"{package_name:<40} {'ok' if returncode == 0 else 'FAILED':>6} {elapsed:>8.1f}s")
+            if returncode != 0:
+                failed.append(package_name)
+                sys.stderr.write(output)
+    print(f"Generated {len(commands) - len(failed)} of {len(commands)} clients in {time.perf_counter() - start:.1f}s")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Postprocesses the output of openapi-generator: merges (or indexes) the models, deletes the unused modules, and formats
+the package with autoflake, isort and black.
+
+The formatters are run in-process, on each file in parallel across processes, so this only needs autoflake, isort >= 5
+and black >= 20.8b0 to be installed (`scripts/util/postprocess.sh` runs it in docker if they aren't; `--check` exits
+with a non-zero code if they aren't).
+
+Usage: python postprocess.py -p PACKAGE_NAME [-w WORK_DIR] [--split-models] [-j JOBS]
+       python postprocess.py --check
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import autoflake
+import black
+import isort
+from resolve_forward_refs import resolve_merged, resolve_split
+
+ANY_OF = re.compile(r"AnyOf[a-zA-Z0-9]*")
+LINE_LENGTH = 120
+
+
+def formatters_supported() -> bool:
+    """
+    Returns whether the installed isort and black have the APIs used here (isort 4 and black < 20.8b0 don't)
+    """
+    return hasattr(isort, "code") and hasattr(black, "Mode")
+
+
+def merge_generated_models(package_dir: str) -> None:
+    """
+    Merges the generated models into a single file, to prevent circular imports
+    """
+    models_dir = os.path.join(package_dir, "models")
+    models_path = os.path.join(package_dir, "models.py")
+    with open(models_path, "w") as models_file:
+        for filename in sorted(os.listdir(models_dir)):
+            if filename.endswith(".py") and filename != "__init__.py":
+                with open(os.path.join(models_dir, filename)) as f:
+                    models_file.write(f.read())
+    resolve_merged(models_path)
+    shutil.rmtree(models_dir)
+
+
+def index_split_models(package_dir: str) -> None:
+    """
+    Replaces the generated models/__init__.py with one that imports each model when it is first used
+    """
+    resolve_split(os.path.join(package_dir, "models"))
+
+
+def delete_unused(package_dir: str) -> None:
+    shutil.rmtree(os.path.join(package_dir, "test"), ignore_errors=True)
+    for filename in ("rest.py", "configuration.py"):
+        path = os.path.join(package_dir, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def find_files(root: str, extensions: List[str]) -> List[str]:
+    return sorted(
+        os.path.join(directory, filename)
+        for directory, _, filenames in os.walk(root)
+        for filename in filenames
+        if os.path.splitext(filename)[1] in extensions
+    )
+
+
+def fix_any_of(work_dir: str) -> None:
+    for path in find_files(work_dir, [".py", ".md"]):
+        with open(path) as f:
+            source = f.read()
+        fixed = ANY_OF.sub("Any", source)
+        if fixed != source:
+            with open(path, "w") as f:
+                f.write(fixed)
+
+
+def format_file(path: str, package_name: str, settings_path: str) -> None:
+    """
+    Applies the same formatting as `autoflake`, `isort --float-to-top -m 3 ...` and `black --fast` to the file
+    """
+    with open(path) as f:
+        source = f.read()
+    formatted = source
+    if os.path.basename(path) != "__init__.py":
+        formatted = autoflake.fix_code(formatted, remove_all_unused_imports=True, remove_unused_variables=True)
+    formatted = isort.code(
+        formatted,
+        settings_path=settings_path,
+        float_to_top=True,
+        line_length=LINE_LENGTH,
+        multi_line_output=3,
+        include_trailing_comma=True,
+        force_grid_wrap=0,
+        combine_as_imports=True,
+        known_first_party=[package_name],
+    )
+    mode = black.Mode(line_length=LINE_LENGTH, target_versions={black.TargetVersion.PY36})
+    formatted = black.format_str(formatted, mode=mode)
+    if formatted != source:
+        with open(path, "w") as f:
+            f.write(formatted)
+
+
+def apply_formatters(work_dir: str, package_name: str, jobs: Optional[int]) -> None:
+    paths = find_files(os.path.join(work_dir, package_name), [".py"])
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for future in [executor.submit(format_file, path, package_name, work_dir) for path in paths]:
+            future.result()
+
+
+def add_py_typed(work_dir: str, package_name: str) -> None:
+    open(os.path.join(work_dir, package_name, "py.typed"), "w").close()
+    with open(os.path.join(work_dir, "MANIFEST.in"), "w") as f:
+        f.write(f"include {package_name}/py.typed\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-p", "--package-name", help="The name to use for the generated package")
+    parser.add_argument("-w", "--work-dir", default=".", help="The working directory used for generator output")
+    parser.add_argument("--split-models", action="store_true", help="Keep a module per model")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Files to format in parallel (default: cores)")
+    parser.add_argument("--check", action="store_true", help="Only check that the formatters are supported")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(0 if formatters_supported() else 1)
+    if args.package_name is None:
+        parser.error("the following arguments are required: -p/--package-name")
+
+    package_dir = os.path.join(args.work_dir, args.package_name)
+    if args.split_models:
+        index_split_models(package_dir)
+    else:
+        merge_generated_models(package_dir)
+    delete_unused(package_dir)
+    fix_any_of(args.work_dir)
+    apply_formatters(args.work_dir, args.package_name, args.jobs)
+    add_py_typed(args.work_dir, args.package_name)
+
+
+if __name__ == "__main__":
+    main()
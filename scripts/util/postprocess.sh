@@ -8,12 +8,15 @@ CMDNAME=${0##*/}
 
 PACKAGE_NAME=""
 WORK_DIR=""
+PYTHON="${PYTHON:-python3}"
+SPLIT_MODELS=""
 
 usage() {
   exitcode="$1"
   cat <<USAGE >&2
 
-Use docker to postprocess the output of openapi-generator
+Postprocess the output of openapi-generator with scripts/util/postprocess.py, in docker unless \$PYTHON
+(by default, python3) has autoflake, isort >= 5 and black >= 20.8b0 installed
 
 Usage:
   $CMDNAME -p PACKAGE_NAME
@@ -21,6 +24,7 @@ Usage:
 Options:
   -p, --package-name       The name to use for the generated package
   -w, --work-dir           The working directory used for generator output
+  --split-models           Keep a module per model, instead of merging them into models.py
   -h, --help               Show this message
 USAGE
   exit "$exitcode"
@@ -28,14 +32,12 @@ USAGE
 
 main() {
   validate_inputs
-  docker build -t fastapi-client-generator:latest .
-  docker run --rm --user $(id -u):$(id -g) -v "$WORK_DIR":/generator-output fastapi-client-generator:latest -p "${PACKAGE_NAME}"
-  add_py_typed
-}
-
-add_py_typed() {
-  touch "$WORK_DIR"/"${PACKAGE_NAME}"/py.typed
-  echo "include ${PACKAGE_NAME}/py.typed" > "$WORK_DIR"/MANIFEST.in
+  if "$PYTHON" scripts/util/postprocess.py --check >/dev/null 2>&1; then
+    "$PYTHON" scripts/util/postprocess.py -p "${PACKAGE_NAME}" -w "$WORK_DIR" ${SPLIT_MODELS:+ --split-models}
+  else
+    docker build -t fastapi-client-generator:latest .
+    docker run --rm --user $(id -u):$(id -g) -v "$WORK_DIR":/generator-output fastapi-client-generator:latest -p "${PACKAGE_NAME}" ${SPLIT_MODELS:+ --split-models}
+  fi
 }
 
 validate_inputs() {
@@ -59,6 +61,10 @@ while [ $# -gt 0 ]; do
     WORK_DIR=$2
     shift 2
     ;;
+  --split-models)
+    SPLIT_MODELS="yes"
+    shift 1
+    ;;
   -h | --help)
     usage 0
     ;;
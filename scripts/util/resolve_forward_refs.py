@@ -0,0 +1,187 @@
+"""
+Resolves the references between the generated models.
+
+The generated field annotations are strings, which pydantic resolves when each class is created; only the references
+to models defined later (or to the model itself) are left unresolved. Finding those here means the generated package
+doesn't have to inspect every model when it is imported.
+
+Usage:
+  python resolve_forward_refs.py path/to/models.py
+    Appends `update_forward_refs()` calls for the models that need them to a merged models.py
+  python resolve_forward_refs.py --split path/to/models
+    Writes path/to/models/__init__.py for a package with a module per model, which imports each model when it is first
+    used, along with the models it refers to
+"""
+import argparse
+import ast
+import os
+from typing import Dict, List, Optional, Set
+
+LAZY_MODELS_INIT = '''"""
+The models, each in its own module, which is imported (with the models it refers to) when the model is first used
+"""
+from importlib import import_module
+from threading import RLock
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+if TYPE_CHECKING:
+{type_checking_imports}
+
+MODULES = {{
+{modules}
+}}
+
+# The models whose annotations refer to models in other modules (or to themselves), and the models they refer to
+REFERENCES: Dict[str, Tuple[str, ...]] = {{
+{references}
+}}
+
+_loaded: Dict[str, Any] = {{}}
+_load_lock = RLock()
+
+
+def __getattr__(name: str) -> Any:
+    if name not in MODULES:
+        raise AttributeError(f"module {{__name__!r}} has no attribute {{name!r}}")
+    return load_model(name)
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(MODULES))
+
+
+def load_model(name: str) -> Any:
+    """
+    Imports the model's module and resolves its references, which loads the models it refers to
+    """
+    with _load_lock:
+        model = _loaded.get(name)
+        if model is None:
+            model = getattr(import_module(f"{{__name__}}.{{MODULES[name]}}"), name)
+            _loaded[name] = model  # before resolving the references, so that a cycle of references ends here
+            references = REFERENCES.get(name)
+            if references:
+                model.update_forward_refs(**{{reference: load_model(reference) for reference in references}})
+            globals()[name] = model  # later uses don't go through __getattr__
+        return model
+'''
+
+
+def annotation_names(annotation: ast.expr) -> Set[str]:
+    source = string_value(annotation)
+    if source is not None:
+        annotation = ast.parse(source, mode="eval").body
+    return {node.id for node in ast.walk(annotation) if isinstance(node, ast.Name)}
+
+
+def string_value(node: ast.expr) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    value = getattr(node, "s", None)  # ast.Str, before Python 3.8
+    return value if isinstance(value, str) else None
+
+
+def class_references(node: ast.ClassDef, class_names: Set[str]) -> Set[str]:
+    """
+    Returns the names in `class_names` that the class's field annotations refer to
+    """
+    references: Set[str] = set()
+    for statement in node.body:
+        if isinstance(statement, ast.AnnAssign):
+            references |= annotation_names(statement.annotation) & class_names
+    return references
+
+
+def module_classes(path: str) -> List[ast.ClassDef]:
+    with open(path) as f:
+        return [node for node in ast.parse(f.read()).body if isinstance(node, ast.ClassDef)]
+
+
+def models_with_forward_refs(classes: List[ast.ClassDef]) -> List[str]:
+    class_names = {node.name for node in classes}
+    defined: Set[str] = set()
+    result = []
+    for node in classes:
+        if class_references(node, class_names - defined):
+            result.append(node.name)
+        defined.add(node.name)
+    return result
+
+
+def resolve_merged(path: str) -> None:
+    models = models_with_forward_refs(module_classes(path))
+    if not models:
+        return
+    with open(path, "a") as f:
+        f.write("\n\n")
+        for name in models:
+            f.write(f"{name}.update_forward_refs()\n")
+
+
+def add_type_checking_imports(path: str, names: Set[str], modules: Dict[str, str]) -> None:
+    """
+    Imports the models in other modules that the module's annotations refer to, for type checkers only (at runtime,
+    they are resolved when the models are loaded)
+    """
+    with open(path) as f:
+        lines = f.read().splitlines(keepends=True)
+    first_class = min(node.lineno for node in ast.parse("".join(lines)).body if isinstance(node, ast.ClassDef))
+    imports = ["from typing import TYPE_CHECKING\n", "\n", "if TYPE_CHECKING:\n"]
+    imports += [f"    from .{modules[name]} import {name}  # noqa F401\n" for name in sorted(names)]
+    lines[first_class - 1 : first_class - 1] = imports + ["\n", "\n"]
+    with open(path, "w") as f:
+        f.write("".join(lines))
+
+
+def resolve_split(models_dir: str) -> None:
+    classes_by_module: Dict[str, List[ast.ClassDef]] = {}
+    for filename in sorted(os.listdir(models_dir)):
+        module, extension = os.path.splitext(filename)
+        if extension == ".py" and module != "__init__":
+            classes_by_module[module] = module_classes(os.path.join(models_dir, filename))
+    modules = {node.name: module for module, classes in classes_by_module.items() for node in classes}
+    references: Dict[str, List[str]] = {}
+    for module, classes in classes_by_module.items():
+        for node in classes:
+            # Within a module, only the references to the model itself or to later models are left unresolved
+            defined_before = {other.name for other in classes[: classes.index(node)]}
+            node_references = class_references(node, set(modules) - defined_before)
+            if node_references:
+                references[node.name] = sorted(node_references)
+        other_module_references = {
+            reference for node in classes for reference in references.get(node.name, ()) if modules[reference] != module
+        }
+        if other_module_references:
+            add_type_checking_imports(os.path.join(models_dir, f"{module}.py"), other_module_references, modules)
+
+    type_checking_imports = []
+    module_items = []
+    for name, module in sorted(modules.items()):
+        type_checking_imports.append(f"    from .{module} import {name}  # noqa F401")
+        module_items.append(f'    "{name}": "{module}",')
+    reference_items = []
+    for name, names in sorted(references.items()):
+        quoted = ", ".join(f'"{reference}"' for reference in names)
+        reference_items.append(f'    "{name}": ({quoted}{"," if len(names) == 1 else ""}),')
+    init_source = LAZY_MODELS_INIT.format(
+        type_checking_imports="\n".join(type_checking_imports) or "    pass",
+        modules="\n".join(module_items),
+        references="\n".join(reference_items),
+    )
+    with open(os.path.join(models_dir, "__init__.py"), "w") as f:
+        f.write(init_source)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="The merged models.py, or the models package with --split")
+    parser.add_argument("--split", action="store_true", help="The models are in a module each")
+    args = parser.parse_args()
+    if args.split:
+        resolve_split(args.path)
+    else:
+        resolve_merged(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ import subprocess
 import sys
 import time
 from multiprocessing import Process
+from pathlib import Path
+from typing import Callable, List
 
 import pytest
 from fastapi import FastAPI
@@ -27,6 +29,37 @@ os.makedirs(LOG_DIR, exist_ok=True)
 CLIENT_NAME = "generated_client"
 CLIENT_DIR = os.path.join(ROOT, CLIENT_NAME)
 
+UTIL_DIR = os.path.join(os.path.dirname(ROOT), "scripts", "util")
+MODELS_CLIENT_NAME = "models_client"
+# Model modules as openapi-generator writes them (before postprocessing), with references between modules, to the
+# model itself, and in both directions between Pet and Tag
+MODEL_HEADER = """from datetime import date, datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+"""
+MODEL_MODULES = {
+    "category": """
+class Category(BaseModel):
+    id: "Optional[int]" = Field(None, alias="id")
+    parent: "Optional[Category]" = Field(None, alias="parent")
+""",
+    "pet": """
+class Pet(BaseModel):
+    name: "str" = Field(..., alias="name")
+    category: "Optional[Category]" = Field(None, alias="category")
+    tags: "Optional[List[Tag]]" = Field(None, alias="tags")
+""",
+    "tag": """
+class Tag(BaseModel):
+    name: "str" = Field(..., alias="name")
+    pets: "Optional[List[Pet]]" = Field(None, alias="pets")
+""",
+    "user": """
+class User(BaseModel):
+    username: "str" = Field(..., alias="username")
+""",
+}
+
 
 def run_server(app: FastAPI, host: str, port: int, log_level: str, log_dir: str) -> None:
     import uvicorn
@@ -93,6 +126,35 @@ def delete_generated_client() -> None:
     shutil.rmtree(CLIENT_DIR, ignore_errors=True)
 
 
+@pytest.fixture
+def generator_output(tmp_path: Path) -> Path:
+    """
+    Writes a `models_client` package with the models in MODEL_MODULES to `tmp_path`, as openapi-generator would, and
+    returns the package's folder
+    """
+    package_dir = tmp_path / MODELS_CLIENT_NAME
+    (package_dir / "models").mkdir(parents=True)
+    (package_dir / "__init__.py").write_text(f"from {MODELS_CLIENT_NAME} import models\n")
+    (package_dir / "models" / "__init__.py").write_text("")
+    (package_dir / "rest.py").write_text("")
+    for module, source in MODEL_MODULES.items():
+        (package_dir / "models" / f"{module}.py").write_text(MODEL_HEADER + source)
+    return package_dir
+
+
+@pytest.fixture
+def run_util_script() -> Callable[..., "subprocess.CompletedProcess[bytes]"]:
+    """
+    Returns a function that runs a script from scripts/util with the current interpreter and the given arguments
+    """
+
+    def run(script: str, *args: str, check: bool = True) -> "subprocess.CompletedProcess[bytes]":
+        command: List[str] = [sys.executable, os.path.join(UTIL_DIR, script), *args]
+        return subprocess.run(command, check=check, stderr=None if check else subprocess.DEVNULL)
+
+    return run
+
+
 def pytest_configure() -> None:  # pragma: no cover
     """
     Called before the test run.
@@ -2,6 +2,8 @@
 Test harness app implementing the server endpoints required for
 fastapi_client testing.
 """
+from typing import Any, Dict
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
@@ -24,6 +26,25 @@ async def startup() -> None:
 app.include_router(auth_router(), tags=["auth"])
 app.include_router(client_router(), tags=["client"])
 
+# The x-idempotent extension of operations, by operation_id; FastAPI can't add extensions to a route's operation
+X_IDEMPOTENT = {"flaky_update": False}
+fastapi_openapi = app.openapi
+
+
+def openapi() -> Dict[str, Any]:
+    """
+    Add the x-idempotent extensions to the generated schema
+    """
+    schema = fastapi_openapi()
+    for path_item in schema["paths"].values():
+        for operation in path_item.values():
+            if operation["operationId"] in X_IDEMPOTENT:
+                operation["x-idempotent"] = X_IDEMPOTENT[operation["operationId"]]
+    return schema
+
+
+app.openapi = openapi  # type: ignore
+
 
 def main() -> None:
     """ Kick off uvicorn on port 8000"""
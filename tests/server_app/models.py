@@ -3,9 +3,12 @@
 Pydantic data models for the server.
 """
 
+from datetime import date, datetime
+from enum import Enum
 from typing import List, Optional
+from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class FormPostResponse(BaseModel):
@@ -21,3 +24,32 @@ class ListTagsResponse(BaseModel):
     """Response from lists in query test"""
 
     tags: List[str]
+
+
+class ListItem(BaseModel):
+    """Item of the list response test"""
+
+    id: int
+    name: str
+
+
+class OrderStatus(str, Enum):
+    """Status of the body encoding test order"""
+
+    placed = "placed"
+    delivered = "delivered"
+
+
+class Order(BaseModel):
+    """Request and response of the body encoding test"""
+
+    id: UUID
+    placed_at: datetime = Field(..., alias="placedAt")
+    delivery_date: Optional[date] = Field(None, alias="deliveryDate")
+    status: OrderStatus = OrderStatus.placed
+    items: List[ListItem] = []
+    main_item: Optional[ListItem] = Field(None, alias="mainItem")
+    note: Optional[str] = None
+
+    class Config:
+        allow_population_by_field_name = True
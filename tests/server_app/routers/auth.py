@@ -1,11 +1,13 @@
 """
 Test oauth apis
 """
+import hashlib
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
+from starlette.requests import Request
 from starlette.responses import JSONResponse
 from starlette.status import HTTP_401_UNAUTHORIZED
 
@@ -37,6 +39,14 @@ def auth_router() -> APIRouter:
 
         return JSONResponse(content={"result": "success"})
 
+    @router.post("/upload")
+    async def upload(request: Request, token: str = Depends(reusable_oauth2)) -> JSONResponse:
+        if token != "access_token":
+            raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Not authorized")
+
+        body = await request.body()
+        return JSONResponse(content={"length": len(body), "sha256": hashlib.sha256(body).hexdigest()})
+
     @router.post("/token")
     def get_tokens(form_data: OAuth2PasswordRequestForm = Depends()) -> TokenSuccessResponse:
         if form_data.username == "username" and form_data.password == "password":
@@ -2,12 +2,14 @@
 Regression tests for fastapi_client
 """
 import hashlib
-from typing import Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, File, Form, Query
 from starlette.requests import Request
+from starlette.responses import Response
 
-from ..models import FormPostResponse, ListTagsResponse
+from ..models import FormPostResponse, ListItem, ListTagsResponse, Order
 
 
 def client_router() -> APIRouter:
@@ -15,6 +17,8 @@ def client_router() -> APIRouter:
     Returns the router for regression test endpoints
     """
     router = APIRouter()
+    flaky_attempts: Dict[str, int] = {}
+    quota_windows: Dict[str, Tuple[float, int]] = {}
 
     @router.get("/any")
     async def no_schema() -> Dict[str, str]:
@@ -59,4 +63,67 @@ def client_router() -> APIRouter:
         """
         return ListTagsResponse(tags=tags)
 
+    @router.get("/items_list", response_model=List[ListItem])
+    async def items_list(count: int) -> List[ListItem]:
+        """
+        Check client with a list response. The client should also be able to stream the items
+        """
+        return [ListItem(id=i, name=f"item-{i}") for i in range(count)]
+
+    @router.get("/cached_item/{item_id}", response_model=ListItem)
+    async def cached_item(item_id: int, request: Request, response: Response) -> Any:
+        """
+        Check client caching. Responds with an ETag that must be revalidated,
+        and with 304 Not Modified if the request's If-None-Match matches it
+        """
+        etag = f'"item-{item_id}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+        response.headers["etag"] = etag
+        response.headers["cache-control"] = "no-cache"
+        return ListItem(id=item_id, name=f"item-{item_id}")
+
+    @router.get("/flaky_item/{key}", response_model=ListItem)
+    async def flaky_item(key: str, failures: int) -> Any:
+        """
+        Check client retries. Responds with 503 Service Unavailable to the first `failures` requests for `key`
+        """
+        flaky_attempts[key] = flaky_attempts.get(key, 0) + 1
+        if flaky_attempts[key] <= failures:
+            return Response(status_code=503, headers={"retry-after": "0"})
+        return ListItem(id=flaky_attempts[key], name=key)
+
+    @router.put("/flaky_item/{key}", response_model=ListItem)
+    async def flaky_update(key: str, failures: int) -> Any:
+        """
+        Check that operations marked `x-idempotent: false` aren't retried, although PUT is idempotent by default.
+        Responds like flaky_item
+        """
+        return await flaky_item(key, failures)
+
+    @router.get("/quota_item/{key}", response_model=ListItem)
+    async def quota_item(key: str, quota: int, window: float, response: Response) -> Any:
+        """
+        Check client rate limiting. Allows `quota` requests for `key` per `window` seconds, reports the remaining quota
+        in X-RateLimit-* headers, and responds with 429 Too Many Requests beyond it
+        """
+        now = time.monotonic()
+        start, used = quota_windows.get(key, (now, 0))
+        if now - start >= window:
+            start, used = now, 0
+        reset = f"{start + window - now:.3f}"
+        if used >= quota:
+            return Response(status_code=429, headers={"x-ratelimit-remaining": "0", "x-ratelimit-reset": reset})
+        quota_windows[key] = (start, used + 1)
+        response.headers["x-ratelimit-remaining"] = str(quota - used - 1)
+        response.headers["x-ratelimit-reset"] = reset
+        return ListItem(id=used, name=key)
+
+    @router.post("/echo_order", response_model=Order)
+    async def echo_order(order: Order) -> Order:
+        """
+        Check client body encoding. Responds with the sent order
+        """
+        return order
+
     return router
@@ -1,8 +1,14 @@
-from typing import Dict
+import hashlib
+import time
+from asyncio import gather, get_event_loop, sleep
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
 
-from fastapi.openapi.models import OAuthFlowPassword
 from generated_client.api_client import ApiClient
 from generated_client.auth import AuthMiddleware, AuthState
+from generated_client.password_flow_client import OAuthFlowPassword, TokenSuccessResponse
+from generated_client.token_store import FileTokenStore, MemoryTokenStore, SqliteTokenStore, TokenStore
 
 
 class AutoAuthClient(ApiClient):
@@ -14,7 +20,7 @@ class AutoAuthClient(ApiClient):
         super().__init__(host)
         self.auth_state = AuthState()
         flow = OAuthFlowPassword(tokenUrl=tokenUrl)
-        auth_middleware = AuthMiddleware(auth_state=self.auth_state, flow=flow)
+        auth_middleware = AuthMiddleware(auth_state=self.auth_state, flow=flow, api_client=self)
         self.add_middleware(auth_middleware)
 
     def set_creds(self, username: str, password: str) -> None:
@@ -28,3 +34,107 @@ def test_auth() -> None:
     result = client.request_sync(type_=Dict, method="GET", url="/")
     assert result == {"result": "success"}
     assert client.auth_state.access_token == "access_token"
+
+
+class CountingAuthMiddleware(AuthMiddleware):
+    logins = 0
+
+    async def login(self) -> Optional[TokenSuccessResponse]:
+        self.logins += 1
+        return await super().login()
+
+
+def test_concurrent_renewal() -> None:
+    """
+    Concurrent requests that are rejected as unauthorized should share a single login
+    """
+    client = ApiClient(host="http://localhost:8000")
+    auth_state = AuthState(username="username", password="password")
+    auth_middleware = CountingAuthMiddleware(auth_state, OAuthFlowPassword(tokenUrl="http://localhost:8000/token"))
+    client.add_middleware(auth_middleware)
+
+    async def send_requests() -> List[Dict[str, Any]]:
+        return await gather(*(client.request(type_=Dict[str, Any], method="GET", url="/") for _ in range(20)))
+
+    results = get_event_loop().run_until_complete(send_requests())
+    assert results == [{"result": "success"}] * 20
+    assert auth_middleware.logins == 1
+
+
+def test_background_refresh() -> None:
+    """
+    The background refresh should renew tokens that are about to expire without waiting for a request
+    """
+    auth_state = AuthState(
+        username="username",
+        password="password",
+        access_token="expiring",
+        expires_at=datetime.utcnow() + timedelta(seconds=30),
+    )
+    auth_middleware = AuthMiddleware(auth_state, OAuthFlowPassword(tokenUrl="http://localhost:8000/token"))
+
+    async def refresh_in_background() -> None:
+        auth_middleware.start_background_refresh(margin=timedelta(seconds=60))
+        for _ in range(100):
+            if auth_state.access_token != "expiring":
+                break
+            await sleep(0.05)
+        auth_middleware.stop_background_refresh()
+
+    get_event_loop().run_until_complete(refresh_in_background())
+    assert auth_state.access_token == "access_token"
+    assert auth_state.expires_at is None
+
+
+def test_token_stores(tmp_path: Path) -> None:
+    """
+    Middlewares sharing a token store should use the tokens obtained by the first one instead of logging in
+    """
+    stores: List[TokenStore] = [
+        MemoryTokenStore(),
+        FileTokenStore(str(tmp_path / "tokens.json")),
+        SqliteTokenStore(str(tmp_path / "tokens.sqlite")),
+    ]
+    for token_store in stores:
+        logins = 0
+        for _ in range(3):
+            client = ApiClient(host="http://localhost:8000")
+            auth_state = AuthState(username="username", password="password")
+            flow = OAuthFlowPassword(tokenUrl="http://localhost:8000/token")
+            auth_middleware = CountingAuthMiddleware(auth_state, flow, token_store=token_store)
+            client.add_middleware(auth_middleware)
+            assert client.request_sync(type_=Dict[str, Any], method="GET", url="/") == {"result": "success"}
+            logins += auth_middleware.logins
+        assert logins == 1
+
+
+def test_sqlite_lock_lease(tmp_path: Path) -> None:
+    """
+    A lock whose lease expired shouldn't release the lease taken over by another lock
+    """
+    token_store = SqliteTokenStore(str(tmp_path / "tokens.sqlite"), lease=0.1)
+    first, second = token_store.lock("key"), token_store.lock("key")
+    assert first.acquire(blocking=False)
+    assert not second.acquire(blocking=False)
+    time.sleep(0.15)
+    assert second.acquire(blocking=False)
+    first.release()
+    assert not token_store.lock("key").acquire(blocking=False)
+    second.release()
+    assert token_store.lock("key").acquire(blocking=False)
+
+
+def test_replayed_upload() -> None:
+    """
+    A streamed request body should be sent again in full when the request is retried after a 401
+    """
+    client = AutoAuthClient(host="http://localhost:8000", tokenUrl="http://localhost:8000/token")
+    client.set_creds("username", "password")
+    chunks = [bytes([i]) * 100_000 for i in range(20)]
+
+    def generate_chunks() -> Iterator[bytes]:
+        yield from chunks
+
+    result = client.request_sync(type_=Dict[str, Any], method="POST", url="/upload", data=generate_chunks())
+    body = b"".join(chunks)
+    assert result == {"length": len(body), "sha256": hashlib.sha256(body).hexdigest()}
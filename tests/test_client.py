@@ -3,11 +3,56 @@
 Regression tests
 """
 import hashlib
-from asyncio import get_event_loop
-from typing import Tuple, Type
+import json
+import os
+import pkgutil
+import socket
+import subprocess
+import sys
+import time
+from asyncio import gather, get_event_loop
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from enum import Enum
+from importlib import import_module
+from io import BytesIO
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+from uuid import UUID, uuid4
 
+import pytest
+from fastapi.encoders import jsonable_encoder
+from httpx import Request, Response
+from httpx.exceptions import NetworkError
+from pydantic import BaseModel
+
+import generated_client.api
 import generated_client.models as models
-from generated_client.api_client import ApiClient, SyncApis
+from generated_client.api.client_api import OPERATIONS
+from generated_client.api_client import (
+    ApiClient,
+    AsyncApis,
+    BulkProgress,
+    ParserRegistry,
+    PoolSettings,
+    RequestTiming,
+    Send,
+    SyncApis,
+    SyncMode,
+    build_middleware_chain,
+)
+from generated_client.cache import ResponseCache
+from generated_client.codec import JsonCodec, OrjsonCodec
+from generated_client.encoding import encode
+from generated_client.exceptions import (
+    CircuitOpenError,
+    ConcurrencyLimitExceeded,
+    ResponseHandlingException,
+    UnexpectedResponse,
+)
+from generated_client.instrumentation import LatencyCollector
+from generated_client.limits import AdaptiveLimiter, CircuitBreaker, CircuitState, LimiterStats, Rate, RateLimiter
+from generated_client.retry import RetryBudget, RetryMiddleware, is_connect_error
+from generated_client.streams import replayable_stream
 from mypy.ipc import TracebackType
 
 
@@ -23,7 +68,7 @@ class Client(SyncApis):
         return self
 
     def __exit__(self, exc_type: Type[Exception], exc_val: Exception, exc_tb: TracebackType) -> None:
-        get_event_loop().run_until_complete(self.client._async_client.close())
+        self.client.close()
 
 
 def test_any() -> None:
@@ -91,3 +136,702 @@ def test_list_query() -> None:
     with Client() as client:
         ret = client.client_api.tags_list(tags=tags)
         assert ret.tags == tags
+
+
+def test_parser_cache() -> None:
+    """
+    Response parsers should be built once per type and reused by later calls
+    """
+    with Client() as client:
+        registry = client.client.parser_registry
+        registry.cache_clear()
+        client.client_api.tags_list(tags=["1"])
+        client.client_api.tags_list(tags=["2"])
+        info = registry.cache_info()
+        assert info.misses == 1
+        assert info.hits == 1
+        assert info.currsize == 1
+
+
+def test_list_iter() -> None:
+    """
+    Streaming a list response should yield the same items as the buffered response
+    """
+    apis = AsyncApis(ApiClient(host="http://localhost:8000"))
+
+    async def collect() -> List[models.ListItem]:
+        return [item async for item in apis.client_api.items_list_iter(count=1000)]
+
+    loop = get_event_loop()
+    items = loop.run_until_complete(collect())
+    assert len(items) == 1000
+    assert items == loop.run_until_complete(apis.client_api.items_list(count=1000))
+
+
+def test_map() -> None:
+    """
+    Bulk calls should return results in input order, keep at most `concurrency` calls in flight, and capture failures
+    without stopping the other calls
+    """
+    apis = AsyncApis(ApiClient(host="http://localhost:8000"))
+    in_flight = [0, 0]  # current, peak
+
+    async def get_items(count: int) -> List[models.ListItem]:
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+        try:
+            if count == 3:
+                raise ValueError("bad count")
+            return await apis.client_api.items_list(count=count)
+        finally:
+            in_flight[0] -= 1
+
+    progress = BulkProgress()
+    results = get_event_loop().run_until_complete(
+        apis.client.map(get_items, range(10), concurrency=4, progress=progress)
+    )
+    assert in_flight == [0, 4]
+    assert [result.item for result in results] == list(range(10))
+    assert [len(result.unwrap()) for result in results if result.ok] == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert isinstance(results[3].error, ValueError)
+    assert progress.completed == 10
+    assert progress.failed == 1
+    assert progress.in_flight == 0
+
+    def failing_items() -> Iterator[int]:
+        yield from range(5)
+        raise RuntimeError("items failed")
+
+    with pytest.raises(RuntimeError, match="items failed"):
+        get_event_loop().run_until_complete(apis.client.map(get_items, failing_items(), concurrency=4))
+
+
+def test_background_loop_sync_mode() -> None:
+    """
+    A client using the background loop should be usable from the sync apis of many threads at once
+    """
+    apis = SyncApis(ApiClient(host="http://localhost:8000", sync_mode="background_loop"))
+
+    def get_count(count: int) -> int:
+        return len(apis.client_api.items_list(count=count))
+
+    with ThreadPoolExecutor(8) as executor:
+        counts = list(executor.map(get_count, range(32)))
+    assert counts == list(range(32))
+
+
+def test_blocking_sync_mode() -> None:
+    """
+    A client using the blocking mode should work from a thread without an event loop, and return the same
+    results as the default mode
+    """
+    apis = SyncApis(ApiClient(host="http://localhost:8000", sync_mode="blocking"))
+
+    with ThreadPoolExecutor(1) as executor:
+        items = executor.submit(apis.client_api.items_list, count=10).result()
+    assert items == SyncApis(ApiClient(host="http://localhost:8000")).client_api.items_list(count=10)
+
+
+def test_warm_up() -> None:
+    """
+    Connections opened by warm_up should be reused by the following requests
+    """
+
+    async def warm_up_and_call() -> ApiClient:
+        pool = PoolSettings(max_keepalive_connections=4, keepalive_expiry=30)
+        async with ApiClient(host="http://localhost:8000", pool=pool) as client:
+            assert await client.warm_up(4) == 4
+            apis = AsyncApis(client)
+            await gather(*(apis.client_api.items_list(count=1) for _ in range(4)))
+        return client
+
+    stats = get_event_loop().run_until_complete(warm_up_and_call()).connection_stats
+    assert stats.new == 4
+    assert stats.reused == 4
+
+
+def test_middleware_order() -> None:
+    """
+    The last middleware added should see each request first and each response last, through the compiled chain and
+    the combined `middleware`
+    """
+    calls: List[str] = []
+
+    def make_middleware(name: str) -> Any:
+        async def middleware(request: Request, call_next: Send) -> Response:
+            calls.append(f"{name} request")
+            response = await call_next(request)
+            calls.append(f"{name} response")
+            return response
+
+        return middleware
+
+    async def send(request: Request) -> Response:
+        calls.append("send")
+        return Response(200, request=request)
+
+    first, second = make_middleware("first"), make_middleware("second")
+    order = ["second request", "first request", "send", "first response", "second response"]
+    request = Request("GET", "http://localhost:8000/items_list?count=1")
+    get_event_loop().run_until_complete(build_middleware_chain([first, second], send)(request))
+    assert calls == order
+
+    client = ApiClient(host="http://localhost:8000")
+    client.add_middleware(first)
+    client.add_middleware(second)
+    assert client.middlewares == [first, second]
+    calls.clear()
+    get_event_loop().run_until_complete(client.middleware(request, send))
+    assert calls == order
+
+    calls.clear()
+    SyncApis(client).client_api.items_list(count=1)
+    assert calls == [call for call in order if call != "send"]
+
+    client.middlewares.remove(first)
+    client.compile_middleware()
+    calls.clear()
+    SyncApis(client).client_api.items_list(count=1)
+    assert calls == ["second request", "second response"]
+
+    client.middleware = first
+    calls.clear()
+    SyncApis(client).client_api.items_list(count=1)
+    assert calls == ["first request", "first response"]
+
+
+def test_response_cache() -> None:
+    """
+    Cached responses should be reused while fresh, and revalidated with their ETag once stale
+    """
+    cache = ResponseCache(ttls={"items_list": 60}, cache_parsed=True)
+    client = ApiClient(host="http://localhost:8000")
+    client.add_middleware(cache)
+    apis = SyncApis(client)
+
+    items = apis.client_api.items_list(count=3)
+    assert apis.client_api.items_list(count=3) is items
+    assert apis.client_api.items_list(count=4) is not items
+
+    item = apis.client_api.cached_item(item_id=1)
+    assert apis.client_api.cached_item(item_id=1) == item
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.revalidations, stats.entries) == (1, 3, 1, 3)
+
+
+def test_coalesce_requests() -> None:
+    """
+    Identical concurrent GET requests should share one request, and get the same result
+    """
+    client = ApiClient(host="http://localhost:8000", coalesce_requests=True)
+    apis = AsyncApis(client)
+
+    async def get_items() -> List[List[models.ListItem]]:
+        return await gather(*(apis.client_api.items_list(count=count) for count in [5] * 10 + [6]))
+
+    results = get_event_loop().run_until_complete(get_items())
+    assert all(result is results[0] for result in results[:10])
+    assert len(results[10]) == 6
+    assert client.coalescer is not None
+    assert (client.coalescer.sent, client.coalescer.collapsed) == (2, 9)
+
+
+def test_retry() -> None:
+    """
+    Requests failing with 503 should be retried, within the retry budget
+    """
+    budget = RetryBudget(max_tokens=3, min_per_second=0)
+    client = ApiClient(host="http://localhost:8000")
+    client.add_middleware(RetryMiddleware(max_attempts=3, base_delay=0.01, budget=budget))
+    apis = SyncApis(client)
+
+    item = apis.client_api.flaky_item(key=str(uuid4()), failures=2)
+    assert item.id == 3
+    assert budget.retries == 2
+
+    with pytest.raises(UnexpectedResponse):
+        apis.client_api.flaky_item(key=str(uuid4()), failures=2)
+    assert budget.retries == 3
+    assert budget.exhausted == 1
+
+
+def test_retry_not_idempotent() -> None:
+    """
+    Operations marked `x-idempotent: false` in the spec shouldn't be retried, whatever their method
+    """
+    assert OPERATIONS["flaky_update"].idempotent is False
+    assert OPERATIONS["flaky_item"].idempotent is None
+
+    budget = RetryBudget(max_tokens=3, min_per_second=0)
+    client = ApiClient(host="http://localhost:8000")
+    client.add_middleware(RetryMiddleware(max_attempts=3, base_delay=0.01, budget=budget))
+    apis = SyncApis(client)
+
+    with pytest.raises(UnexpectedResponse):
+        apis.client_api.flaky_update(key=str(uuid4()), failures=1)
+    assert budget.retries == 0
+
+    client.middleware = RetryMiddleware(max_attempts=3, base_delay=0.01, idempotent={"flaky_update": True})
+    assert apis.client_api.flaky_update(key=str(uuid4()), failures=1).id == 2
+
+
+def test_retry_connect_errors() -> None:
+    """
+    Requests that fail to connect should be retried even if they aren't idempotent, including in blocking sync mode
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]  # nothing is listening on it
+    sync_modes: List[SyncMode] = ["event_loop", "blocking"]
+    for sync_mode in sync_modes:
+        budget = RetryBudget(max_tokens=10, min_per_second=0)
+        client = ApiClient(host=f"http://127.0.0.1:{port}", sync_mode=sync_mode)
+        client.add_middleware(RetryMiddleware(max_attempts=3, base_delay=0.01, budget=budget))
+        with pytest.raises(ResponseHandlingException):
+            client.request_sync(type_=None, method="POST", url="/items")
+        assert budget.retries == 2
+
+    def network_error(cause: Exception) -> NetworkError:
+        error = NetworkError(cause)
+        error.__cause__ = cause
+        return error
+
+    assert is_connect_error(network_error(socket.gaierror(socket.EAI_NONAME, "Name or service not known")))
+    assert not is_connect_error(network_error(ConnectionResetError()))
+
+
+def test_adaptive_limiter() -> None:
+    """
+    The requests in flight should stay within the limit, which should back off when the server is overloaded
+    """
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=4, latency_tolerance=1000)
+    peak = 0
+
+    async def track_in_flight(request: Any, call_next: Send) -> Any:
+        nonlocal peak
+        peak = max(peak, limiter.in_flight)
+        return await call_next(request)
+
+    client = ApiClient(host="http://localhost:8000")
+    client.add_middleware(track_in_flight)
+    client.add_middleware(limiter)
+    apis = AsyncApis(client)
+
+    async def get_items() -> List[List[models.ListItem]]:
+        return await gather(*(apis.client_api.items_list(count=10) for _ in range(20)))
+
+    assert len(get_event_loop().run_until_complete(get_items())) == 20
+    assert peak <= 4
+    assert limiter.stats().in_flight == limiter.stats().waiting == 0
+
+    limit = limiter.limit
+    with pytest.raises(UnexpectedResponse):
+        SyncApis(client).client_api.flaky_item(key=str(uuid4()), failures=1)
+    assert limiter.limit == max(1, int(limit * 0.9))
+
+
+def test_adaptive_limiter_updates() -> None:
+    """
+    The limit should grow by one per success while at least half of it is in use, and back off on overload or slowness
+    """
+    changes: List[Tuple[int, int]] = []
+    limiter = AdaptiveLimiter(
+        initial_limit=4,
+        min_limit=2,
+        max_limit=5,
+        backoff_ratio=0.5,
+        latency_tolerance=2.0,
+        queue_timeout=0.0,
+        on_limit_change=lambda old, new: changes.append((old, new)),
+    )
+
+    def acquire(count: int) -> None:
+        for _ in range(count):
+            get_event_loop().run_until_complete(limiter.acquire())
+
+    acquire(2)
+    limiter.release(0.1, False)  # 2 of 4 in use
+    assert limiter.limit == 5
+    limiter.release(0.1, False)  # 1 of 5 in use
+    assert limiter.limit == 5
+    acquire(5)
+    limiter.release(0.1, False)  # already at max_limit
+    with pytest.raises(ConcurrencyLimitExceeded):
+        acquire(2)
+    limiter.release(0.1, True)  # overloaded
+    assert limiter.limit == 2
+    limiter.release(0.3, False)  # slower than twice the lowest latency, but already at min_limit
+    limiter.release(10.0, None)  # no outcome (e.g., cancelled), which doesn't change the limit
+    limiter.release(0.1, False)
+    limiter.release(0.1, False)
+    assert changes == [(4, 5), (5, 2), (2, 3)]
+    assert limiter.stats() == LimiterStats(
+        limit=3, in_flight=0, waiting=0, min_latency=0.1, increases=2, decreases=1, rejected=1
+    )
+
+
+def test_circuit_breaker() -> None:
+    """
+    Consecutive failures should open the circuit, and a successful probe should close it again
+    """
+    transitions: List[CircuitState] = []
+    breaker = CircuitBreaker(
+        failure_threshold=2, recovery_timeout=60, on_state_change=lambda host, old, new: transitions.append(new)
+    )
+    client = ApiClient(host="http://localhost:8000")
+    client.add_middleware(breaker)
+    apis = SyncApis(client)
+    key = str(uuid4())
+    host = "http://localhost:8000"
+
+    for _ in range(2):
+        with pytest.raises(UnexpectedResponse):
+            apis.client_api.flaky_item(key=key, failures=3)
+    with pytest.raises(CircuitOpenError):
+        apis.client_api.flaky_item(key=key, failures=3)
+    assert breaker.state(host) == CircuitState.open
+
+    breaker.circuits[host].opened_at -= 60  # the recovery timeout has passed
+    with pytest.raises(UnexpectedResponse):
+        apis.client_api.flaky_item(key=key, failures=3)
+    breaker.circuits[host].opened_at -= 60
+    assert apis.client_api.flaky_item(key=key, failures=3).id == 4
+    assert transitions == [
+        CircuitState.open,
+        CircuitState.half_open,
+        CircuitState.open,
+        CircuitState.half_open,
+        CircuitState.closed,
+    ]
+
+
+def test_circuit_breaker_probes() -> None:
+    """
+    Only the probes sent while the circuit is half open should count towards closing or reopening it
+    """
+    transitions: List[CircuitState] = []
+    breaker = CircuitBreaker(
+        failure_threshold=2,
+        recovery_timeout=60,
+        success_threshold=2,
+        on_state_change=lambda host, old, new: transitions.append(new),
+    )
+    host = "http://localhost:8000"
+
+    def request(failed: Optional[bool]) -> None:
+        breaker.after_request(host, failed, breaker.before_request(host))
+
+    early = breaker.before_request(host)  # completes after the circuit has opened
+    assert early is None
+    request(True)
+    request(False)  # resets the consecutive failures
+    request(True)
+    assert breaker.state(host) == CircuitState.closed
+    request(True)
+    assert transitions == [CircuitState.open]
+    with pytest.raises(CircuitOpenError):
+        request(False)
+
+    breaker.circuits[host].opened_at -= 60
+    probe = breaker.before_request(host)
+    assert breaker.state(host) == CircuitState.half_open
+    breaker.after_request(host, False, early)  # not a probe, so it doesn't free the probe's slot or count
+    with pytest.raises(CircuitOpenError):
+        request(False)
+    breaker.after_request(host, False, probe)
+    request(None)  # a cancelled probe frees its slot without an outcome
+    assert breaker.state(host) == CircuitState.half_open
+    request(True)
+    assert breaker.state(host) == CircuitState.open
+
+    breaker.circuits[host].opened_at -= 60
+    request(False)
+    request(False)
+    assert transitions == [
+        CircuitState.open,
+        CircuitState.half_open,
+        CircuitState.open,
+        CircuitState.half_open,
+        CircuitState.closed,
+    ]
+
+
+def test_rate_limiter() -> None:
+    """
+    Requests should wait for the configured rate, and for the quota the server reports, rather than getting 429s
+    """
+    limiter = RateLimiter(operations={"items_list": Rate(20)})
+    client = ApiClient(host="http://localhost:8000")
+    client.add_middleware(limiter)
+    apis = AsyncApis(client)
+
+    async def get_items() -> List[List[models.ListItem]]:
+        return await gather(*(apis.client_api.items_list(count=1) for _ in range(11)))
+
+    start = time.monotonic()
+    get_event_loop().run_until_complete(get_items())
+    assert time.monotonic() - start >= 0.45
+
+    key = str(uuid4())
+    items = [SyncApis(client).client_api.quota_item(key=key, quota=3, window=0.3) for _ in range(10)]
+    assert len(items) == 10
+    assert limiter.stats().limited == 0
+
+
+def test_request_timing() -> None:
+    """
+    Listeners should get the phases of each request, by operation and url template
+    """
+    timings: List[RequestTiming] = []
+    collector = LatencyCollector()
+    client = ApiClient(host="http://localhost:8000")
+    client.add_listener(timings.append)
+    client.add_listener(collector)
+    client.add_middleware(RetryMiddleware(base_delay=0.01))
+    apis = SyncApis(client)
+
+    apis.client_api.items_list(count=100)
+    apis.client_api.flaky_item(key=str(uuid4()), failures=1)
+    with pytest.raises(UnexpectedResponse):
+        apis.client_api.flaky_item(key=str(uuid4()), failures=5)
+
+    items_timing, flaky_timing, failed_timing = timings
+    assert items_timing.url_template == "/items_list"
+    assert items_timing.status_code == 200
+    assert items_timing.response_bytes > 0
+    assert items_timing.server > 0 and items_timing.validate > 0
+    assert sum(items_timing.phases().values()) <= items_timing.total
+    assert flaky_timing.url_template == "/flaky_item/{key}"
+    assert flaky_timing.attempts == 2
+    assert failed_timing.error == "UnexpectedResponse"
+
+    assert collector.summary()[items_timing.operation_id or ""]["total"].requests == 1
+    assert collector.status_counts(flaky_timing.operation_id or "") == {"200": 1, "UnexpectedResponse": 1}
+
+    # Requests sent on behalf of middleware (e.g., token requests) aren't counted in the request in flight
+    async def send_side_request(request: Any, call_next: Send) -> Any:
+        await client.send_inner_untimed(Request("GET", "http://localhost:8000/items_list?count=100"))
+        return await call_next(request)
+
+    client.add_middleware(send_side_request)
+    apis.client_api.flaky_item(key=str(uuid4()), failures=0)
+    side_timing = timings[-1]
+    assert side_timing.attempts == 1
+    assert side_timing.response_bytes < items_timing.response_bytes
+
+
+def test_replayable_stream() -> None:
+    """
+    Files and iterators should be sent through replayable streams, and other form data left to httpx
+    """
+    assert replayable_stream([("name", "rex"), ("status", "sold")]) is None
+    assert replayable_stream({"name": "rex"}) is None
+    buffered = replayable_stream(chunk for chunk in [b"ab", b"cd"])
+    assert buffered is not None
+    assert b"".join(buffered) == b"".join(buffered) == b"abcd"
+
+    file = BytesIO(b"0123456789")
+    file.seek(2)
+    file_stream = replayable_stream(file)
+    assert file_stream is not None
+    assert file_stream.get_headers() == {"Content-Length": "8"}
+    assert file.tell() == 2
+    assert b"".join(file_stream) == b"".join(file_stream) == b"23456789"
+
+
+def test_validation_modes() -> None:
+    """
+    Responses parsed without validation should be equal to validated ones; "sample" validates some of them
+    """
+    client = ApiClient(host="http://localhost:8000", validate="none")
+    apis = SyncApis(client)
+    items = apis.client_api.items_list(count=10)
+    assert all(isinstance(item, models.ListItem) for item in items)
+    with client.validation("full"):
+        assert apis.client_api.items_list(count=10) == items
+
+    registry = ParserRegistry()
+    assert registry.parse(models.ListItem, {"id": "1", "name": "a"}, validate=False).id == "1"
+    assert registry.parse(models.ListItem, {"id": "1", "name": "a"}).id == 1
+
+    assert ApiClient(validate="sample", validate_sample_rate=1).should_validate()
+    assert not ApiClient(validate="sample", validate_sample_rate=0).should_validate()
+
+
+SAMPLE_VALUES = {int: 1, float: 1.5, bool: True, datetime: datetime(2020, 1, 2, 3, 4, 5), date: date(2020, 1, 2)}
+
+
+def _sample_model(model: Type[BaseModel], optionals: bool) -> BaseModel:
+    """ Return an instance of model with a value of its type in each field, or None in optional fields """
+    values: Dict[str, Any] = {}
+    for field in model.__fields__.values():
+        type_ = field.type_
+        if not (optionals or field.required):
+            value: Any = None
+        elif isinstance(type_, type) and issubclass(type_, BaseModel):
+            value = _sample_model(type_, optionals)
+        elif isinstance(type_, type) and issubclass(type_, Enum):
+            value = list(type_)[0]
+        elif type_ is UUID:
+            value = uuid4()
+        else:
+            value = SAMPLE_VALUES.get(type_, "sample")
+        values[field.name] = [value] if value is not None and field.outer_type_ is not type_ else value
+    return model.construct(**values)
+
+
+def test_body_encoding() -> None:
+    """
+    Every model should encode itself as jsonable_encoder does, and bodies should be sent encoded
+    """
+    model_classes = [
+        value
+        for value in vars(models).values()
+        if isinstance(value, type) and issubclass(value, BaseModel) and value.__module__ == models.__name__
+    ]
+    assert models.Order in model_classes
+    for model in model_classes:
+        for optionals in (True, False):
+            instance = _sample_model(model, optionals)
+            assert encode(instance) == jsonable_encoder(instance)
+            assert list(encode(instance)) == list(jsonable_encoder(instance))
+            assert encode([instance]) == jsonable_encoder([instance])
+
+    order = models.Order.parse_obj(
+        {
+            "id": str(uuid4()),
+            "placedAt": "2020-01-02T03:04:05.000006+01:00",
+            "deliveryDate": "2020-01-03",
+            "status": "delivered",
+            "items": [{"id": 1, "name": "first"}, {"id": 2, "name": "second"}],
+            "mainItem": {"id": 1, "name": "first"},
+        }
+    )
+    with Client() as client:
+        assert client.client_api.echo_order(order) == order
+
+
+@pytest.mark.parametrize("codec_class", [JsonCodec, OrjsonCodec])
+def test_codec(codec_class: Type[JsonCodec]) -> None:
+    """
+    Both codecs should round-trip JSON values, and encode the same values as the standard library
+    """
+    if codec_class is OrjsonCodec:
+        pytest.importorskip("orjson")
+    codec = codec_class()
+    value = {"id": 2 ** 40, "name": "rex \u00e9\U0001f415", "weight": 0.5, "tags": [None, True, False, {}], "x": ""}
+    assert codec.loads(codec.dumps(value)) == value
+    assert json.loads(codec.dumps(value)) == value
+    assert codec.loads(json.dumps(value).encode()) == value
+    assert type(ApiClient(host="http://localhost:8000").codec) is JsonCodec  # orjson is opt-in
+
+
+def test_orjson_codec_differences() -> None:
+    """
+    The documented differences of OrjsonCodec from JsonCodec
+    """
+    pytest.importorskip("orjson")
+    json_codec, orjson_codec = JsonCodec(), OrjsonCodec()
+    assert json_codec.dumps({1: "a"}) == b'{"1":"a"}'
+    with pytest.raises(TypeError):
+        orjson_codec.dumps({1: "a"})
+    assert json_codec.loads(json_codec.dumps(2 ** 70)) == 2 ** 70
+    with pytest.raises(TypeError):
+        orjson_codec.dumps(2 ** 70)
+    assert orjson_codec.loads(str(2 ** 70).encode()) == float(2 ** 70)
+    assert json_codec.dumps(float("nan")) == b"NaN"
+    assert orjson_codec.dumps(float("nan")) == b"null"
+    assert json_codec.dumps("\u00e9") == b'"\\u00e9"'
+    assert orjson_codec.dumps("\u00e9") == '"\u00e9"'.encode()
+
+
+def test_operation_table() -> None:
+    """
+    Each generated api module should describe its operations, and path parameters should be percent-encoded
+    """
+    operation = OPERATIONS["flaky_item"]
+    assert (operation.method, operation.path, operation.response_type) == ("GET", "/flaky_item/{key}", models.ListItem)
+    assert operation.path_params == ("key",)
+    assert operation.query_params == ("failures",)
+    assert operation.build_path({"key": "a b?c#d"}) == "/flaky_item/a%20b%3Fc%23d"
+
+    with Client() as client:
+        assert client.client_api.flaky_item(key="a b?c#d", failures=0).name == "a b?c#d"
+
+
+def test_operation_requests() -> None:
+    """
+    The requests built from the operation tables should be the same as those built by formatting and parsing the url
+    """
+    api_client = ApiClient(host="http://localhost:8000/v1")
+    for module_info in pkgutil.iter_modules(generated_client.api.__path__):
+        operations = getattr(import_module(f"generated_client.api.{module_info.name}"), "OPERATIONS")
+        for operation in operations.values():
+            if operation.form_params:
+                continue  # built by build_request either way
+            kwargs: Dict[str, Any] = {
+                "path_params": {name: f"{name}-1" for name in operation.path_params},
+                "params": {name: f"{name} ?&" for name in operation.query_params},
+                "headers": {name: f"{name}-value" for name in operation.header_params},
+                "cookies": {name: f"{name}-value" for name in operation.cookie_params},
+                "json": {"key": "value"} if operation.body else None,
+            }
+            direct = api_client.build_operation_request(operation, **kwargs)
+            parsed = api_client.build_request(
+                method=operation.method,
+                url=operation.path,
+                operation_id=operation.operation_id,
+                idempotent=operation.idempotent,
+                **kwargs,
+            )
+            assert (direct.method, direct.url, direct.url.full_path) == (
+                parsed.method,
+                parsed.url,
+                parsed.url.full_path,
+            )
+            assert direct.headers.raw == parsed.headers.raw
+            assert direct.read() == parsed.read()
+            assert (direct.operation_id, direct.url_template, direct.idempotent) == (
+                parsed.operation_id,
+                operation.path,
+                parsed.idempotent,
+            )
+
+
+def test_lazy_apis() -> None:
+    """
+    Api groups should only be loaded when first used
+    """
+    apis = SyncApis(ApiClient(host="http://localhost:8000"))
+    assert "client_api" not in vars(apis)
+    assert apis.client_api is apis.client_api
+    assert "client_api" in vars(apis)
+    with pytest.raises(AttributeError):
+        getattr(apis, "missing_api")  # mypy rejects `apis.missing_api`
+
+
+IMPORT_TIME_BUDGET_US = 250_000  # for the package's own modules, leaving plenty of room for slow machines
+
+
+def test_import_time() -> None:
+    """
+    Importing the package should only import httpx and pydantic (not FastAPI or Starlette), within a time budget
+    """
+    client_parent_dir = os.path.dirname(os.path.dirname(os.path.realpath(models.__file__)))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import generated_client.auth"],
+        cwd=client_parent_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    self_times: Dict[str, int] = {}
+    for line in process.stderr.splitlines():
+        prefix, _, module = line.split("|")
+        self_time = prefix.split(":")[1].strip()
+        if self_time.isdigit():  # not the header line
+            self_times[module.strip()] = int(self_time)
+    assert "generated_client.auth" in self_times
+    assert not {module.split(".")[0] for module in self_times} & {"fastapi", "starlette"}
+    assert sum(t for module, t in self_times.items() if module.startswith("generated_client")) < IMPORT_TIME_BUDGET_US
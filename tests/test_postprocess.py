@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the native postprocessing of the generator output
+"""
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+PET = {"name": "rex", "tags": [{"name": "dog"}]}
+
+
+@pytest.mark.parametrize("split_models", [False, True])
+def test_postprocess(
+    generator_output: Path, run_util_script: Callable[..., "subprocess.CompletedProcess[bytes]"], split_models: bool
+) -> None:
+    """
+    The models should be merged (or indexed) and formatted, and the unused modules removed
+    """
+    if run_util_script("postprocess.py", "--check", check=False).returncode != 0:
+        pytest.skip("autoflake, isort >= 5 and black >= 20.8b0 are needed to postprocess natively")
+    work_dir, package_name = generator_output.parent, generator_output.name
+    args = ["-p", package_name, "-w", str(work_dir), "-j", "2"]
+    run_util_script("postprocess.py", *args, *(["--split-models"] if split_models else []))
+
+    assert (generator_output / "py.typed").exists()
+    assert not (generator_output / "rest.py").exists()
+    if split_models:
+        assert not (generator_output / "models.py").exists()
+        pet_source = (generator_output / "models" / "pet.py").read_text()
+    else:
+        assert not (generator_output / "models").exists()
+        pet_source = (generator_output / "models.py").read_text()
+        assert pet_source.endswith("\n\nCategory.update_forward_refs()\nPet.update_forward_refs()\n")
+    assert "datetime" not in pet_source  # removed by autoflake
+    assert "List, Optional\n\nfrom pydantic import BaseModel, Field\n" in pet_source  # sorted by isort
+
+    check = f"import {package_name}.models as m; print(m.Pet.parse_obj({PET!r}).tags)"
+    process = subprocess.run([sys.executable, "-c", check], cwd=work_dir, stdout=subprocess.PIPE, check=True)
+    assert process.stdout == b"[Tag(name='dog', pets=None)]\n"
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the models package generated with --split-models
+"""
+import subprocess
+import sys
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Callable, Set
+
+
+def test_split_models(
+    generator_output: Path, run_util_script: Callable[..., "subprocess.CompletedProcess[bytes]"]
+) -> None:
+    """
+    Models should be imported when first used, with their references to models in other modules resolved
+    """
+    models_dir = generator_output / "models"
+    run_util_script("resolve_forward_refs.py", "--split", str(models_dir))
+    assert "if TYPE_CHECKING:" in (models_dir / "pet.py").read_text()
+    assert "TYPE_CHECKING" not in (models_dir / "user.py").read_text()
+
+    sys.path.insert(0, str(generator_output.parent))
+    try:
+        check_split_models(generator_output.name, import_module(f"{generator_output.name}.models"))
+    finally:
+        sys.path.remove(str(generator_output.parent))
+        for name in [name for name in sys.modules if name.startswith(generator_output.name)]:
+            del sys.modules[name]
+
+
+def check_split_models(package_name: str, models: Any) -> None:
+    prefix = f"{package_name}.models."
+
+    def loaded_modules() -> Set[str]:
+        return {name[len(prefix) :] for name in sys.modules if name.startswith(prefix)}
+
+    assert loaded_modules() == set()
+    assert "User" in dir(models)
+
+    tags = [{"name": "dog", "pets": [{"name": "fido"}]}]
+    pet = models.Pet.parse_obj({"name": "rex", "category": {"id": 1, "parent": {"id": 0}}, "tags": tags})
+    assert pet.category.parent.id == 0
+    assert pet.tags[0].pets[0].name == "fido"
+    assert loaded_modules() == {"category", "pet", "tag"}
+
+    tag_class = getattr(import_module(f"{prefix}tag"), "Tag")
+    assert tag_class is models.Tag
+    assert tag_class.parse_obj({"name": "cat", "pets": [{"name": "tom"}]}).pets[0].name == "tom"
+    assert "user" not in loaded_modules()